@@ -0,0 +1,3 @@
+#! /bin/bash
+# Benchmark the markdown pipeline; pass --save FILE / --compare FILE to track baselines
+PYTHONPATH=src python3 bench/bench_pipeline.py "$@"
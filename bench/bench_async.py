@@ -0,0 +1,108 @@
+"""
+Compare the sequential page loop with the asyncio pipeline on a slow filesystem.
+
+Run from the repository root:
+
+    PYTHONPATH=src python3 bench/bench_async.py [--pages N] [--io-latency MS] [--jobs N]
+
+Every read and every write sleeps for --io-latency milliseconds, standing
+in for a network filesystem. The sequential loop pays for I/O and rendering
+one after the other; the pipeline should take about as long as the larger
+of the two.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from async_pipeline import AsyncPipeline
+from corpus import synthetic_document
+from main import collect_page_tasks
+from page_renderer import PageRenderer
+from template import Template
+
+
+TEMPLATE = "<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+
+
+class _SlowIORenderer(PageRenderer):
+    """PageRenderer whose file reads and writes each take latency seconds longer."""
+
+    def __init__(self, template, latency):
+        super().__init__(template)
+        self.latency = latency
+
+    def _read_source(self, from_path):
+        time.sleep(self.latency)
+        return super()._read_source(from_path)
+
+    def _open_output(self, dest_path, counters=None):
+        time.sleep(self.latency)
+        return super()._open_output(dest_path, counters)
+
+
+def _write_corpus(root, pages, size):
+    content = os.path.join(root, "content")
+    for i in range(pages):
+        path = os.path.join(content, f"section{i % 10}", f"page{i}", "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(synthetic_document(size, seed=i))
+    return content
+
+
+def time_sequential(tasks, renderer):
+    start = time.perf_counter()
+    for from_path, dest_path in tasks:
+        renderer.generate(from_path, dest_path)
+    return time.perf_counter() - start
+
+
+def time_pipeline(tasks, renderer, pipeline, jobs):
+    start = time.perf_counter()
+    pipeline.run(tasks, renderer, jobs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200, help="Number of pages (default: 200)")
+    parser.add_argument("--size", type=int, default=8_000, help="Markdown bytes per page (default: 8000)")
+    parser.add_argument("--io-latency", type=float, default=5.0, metavar="MS",
+                        help="Milliseconds added to every read and write (default: 5)")
+    parser.add_argument("--jobs", type=int, default=1, help="Render processes of the pipeline (default: 1)")
+    parser.add_argument("--io-threads", type=int, default=8, help="Pipeline I/O threads (default: 8)")
+    parser.add_argument("--queue", type=int, default=16, help="Depth of both pipeline queues (default: 16)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content = _write_corpus(tmp, args.pages, args.size)
+        template = Template(TEMPLATE)
+
+        def run(name, latency, timer):
+            tasks = collect_page_tasks(content, os.path.join(tmp, name))
+            renderer = _SlowIORenderer(template, latency)
+            renderer.prepare_outputs(dest for _, dest in tasks)
+            return timer(tasks, renderer)
+
+        pipeline = AsyncPipeline(args.io_threads, args.queue, args.queue)
+        latency = args.io_latency / 1000
+        io_time = 2 * args.pages * latency
+        render_time = run("render", 0, time_sequential)
+        sequential = run("sequential", latency, time_sequential)
+        pipelined = run("pipeline", latency, lambda tasks, renderer: time_pipeline(tasks, renderer, pipeline,
+                                                                                   args.jobs))
+
+    print(f"{args.pages} pages, {args.io_latency:g} ms per read and write")
+    print(f"  added I/O latency    {io_time:7.2f} s")
+    print(f"  sequential, no delay {render_time:7.2f} s")
+    print(f"  sequential           {sequential:7.2f} s")
+    print(f"  pipeline             {pipelined:7.2f} s  ({sequential / pipelined:.1f}x faster, "
+          f"{pipelined / max(io_time / args.io_threads, render_time):.2f}x the slower stage)")
+
+
+if __name__ == "__main__":
+    main()
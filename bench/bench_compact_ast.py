@@ -0,0 +1,67 @@
+"""
+Compare the node tree with the compact array-backed document on a large page.
+
+Run from the repository root:
+
+    PYTHONPATH=src python3 bench/bench_compact_ast.py [--size BYTES] [--repeat N]
+
+Reports the memory blocks and bytes each representation keeps allocated,
+the time to parse and to render it, and the size and load time of the
+serialized compact document.
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import best_time
+from compact_ast import CompactDocument, markdown_to_compact
+from corpus import synthetic_document
+from markdown_blocks import markdown_to_html_node
+
+
+def retained(build):
+    """Return (result, memory blocks, bytes) still allocated by build()."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return result, sum(stat.count_diff for stat in stats), sum(stat.size_diff for stat in stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000,
+                        help="Size of the synthetic markdown document (default: 1 MB)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs, best taken (default: 5)")
+    args = parser.parse_args()
+
+    markdown = synthetic_document(args.size)
+    tree, tree_blocks, tree_bytes = retained(lambda: markdown_to_html_node(markdown))
+    compact, compact_blocks, compact_bytes = retained(lambda: markdown_to_compact(markdown))
+    if tree.to_html() != compact.to_html():
+        sys.exit("The compact document renders different HTML")
+
+    print(f"Document: {len(markdown):,} chars, {len(compact):,} compact nodes")
+    print(f"  {'':<8} {'blocks':>10} {'bytes':>13} {'parse':>9} {'render':>9}")
+    for label, blocks, size, parse, document in (
+        ("tree", tree_blocks, tree_bytes, markdown_to_html_node, tree),
+        ("compact", compact_blocks, compact_bytes, markdown_to_compact, compact),
+    ):
+        parse_time = best_time(lambda: parse(markdown), args.repeat)
+        render_time = best_time(document.to_html, args.repeat)
+        print(f"  {label:<8} {blocks:>10,} {size:>13,} {parse_time * 1000:7.1f}ms {render_time * 1000:7.1f}ms")
+    print(f"  {tree_blocks / max(compact_blocks, 1):.0f}x fewer blocks, "
+          f"{1 - compact_bytes / tree_bytes:.0%} fewer bytes (the compact text includes the source)")
+
+    data = compact.to_bytes()
+    load_time = best_time(lambda: CompactDocument.from_bytes(data), args.repeat)
+    print(f"Serialized: {len(data):,} bytes, loaded in {load_time * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compare rendering with HTML escaping against the unescaped output.
+
+Run from the repository root:
+
+    PYTHONPATH=src python3 bench/bench_escape.py [--size BYTES] [--repeat N]
+
+Every corpus shape is parsed once and rendered with to_html(), first with
+the escaping leaves and then with leaves that interpolate their text raw,
+as they did before escaping. The escape functions themselves are also
+timed on clean and on dirty text.
+"""
+import argparse
+import html
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import best_time
+from corpus import CORPUS_SHAPES, synthetic_corpus
+from htmlnode import LeafNode, ParentNode, escape_attribute, escape_html
+from markdown_blocks import markdown_to_html_node
+
+
+def _raw_props_to_html(node):
+    if node.props is None:
+        return ""
+    html_attrs = [f'{key}="{value}"' for key, value in node.props.items()]
+    return " " + " ".join(html_attrs) if html_attrs else ""
+
+
+class _RawLeafNode(LeafNode):
+    """LeafNode as it was before escaping."""
+
+    __slots__ = ()
+
+    props_to_html = _raw_props_to_html
+
+    def to_html(self):
+        if self.value is None:
+            raise ValueError("All leaf nodes must have a value")
+        if self.tag is None:
+            return self.value
+        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+
+class _RawParentNode(ParentNode):
+    """ParentNode as it was before attribute values were escaped."""
+
+    __slots__ = ()
+
+    props_to_html = _raw_props_to_html
+
+    def _write_html(self, write):
+        write(f"<{self.tag}{self.props_to_html()}>")
+        for child in self.children:
+            child._write_html(write)
+        write(f"</{self.tag}>")
+
+
+def _unescaped_copy(node):
+    """Return a copy of a tree whose nodes render without escaping."""
+    if isinstance(node, LeafNode):
+        return _RawLeafNode(node.tag, node.value, node.props)
+    return _RawParentNode(node.tag, [_unescaped_copy(child) for child in node.children], node.props)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=2_000_000,
+                        help="Size of each synthetic corpus in characters (default: 2 MB)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Runs per measurement; the fastest counts (default: 5)")
+    args = parser.parse_args()
+
+    print(f"  {'shape':<14}{'raw ms':>10}{'escaped ms':>12}{'change':>10}")
+    for shape in CORPUS_SHAPES:
+        trees = [markdown_to_html_node(page) for page in synthetic_corpus(shape, args.size)]
+        raw_trees = [_unescaped_copy(tree) for tree in trees]
+        # Alternate the two so that machine noise hits both alike
+        raw = escaped = float("inf")
+        for _ in range(args.repeat):
+            raw = min(raw, best_time(lambda: [tree.to_html() for tree in raw_trees], 1))
+            escaped = min(escaped, best_time(lambda: [tree.to_html() for tree in trees], 1))
+        print(f"  {shape:<14}{raw * 1000:>10.2f}{escaped * 1000:>12.2f}{(escaped / raw - 1) * 100:>+9.1f}%")
+
+    clean = "A sentence of ordinary prose, with punctuation but nothing to escape. " * 4
+    dirty = 'if a < b && c > d: print("<p>")' * 8
+    count = 100_000
+    print(f"\nEscaping {count:,} strings:")
+    print(f"  {'function':<18}{'clean ms':>10}{'dirty ms':>10}")
+    for name, func in (
+        ("escape_html", escape_html),
+        ("escape_attribute", escape_attribute),
+        ("html.escape", html.escape),
+    ):
+        clean_time = best_time(lambda: [func(clean) for _ in range(count)], args.repeat)
+        dirty_time = best_time(lambda: [func(dirty) for _ in range(count)], args.repeat)
+        print(f"  {name:<18}{clean_time * 1000:>10.2f}{dirty_time * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
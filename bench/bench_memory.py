@@ -0,0 +1,126 @@
+"""
+Measure the memory used by the node objects of a parsed page.
+
+Run from the repository root:
+
+    PYTHONPATH=src python3 bench/bench_memory.py [--size BYTES]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import synthetic_document
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from inline_markdown import text_to_textnodes
+from markdown_blocks import markdown_to_html_node
+from page_renderer import PageRenderer
+from template import Template
+from textnode import TextNode, TextType
+
+
+class _UnslottedTextNode:
+    """TextNode as it was before __slots__, with a per-instance __dict__."""
+
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class _UnslottedHTMLNode:
+    """HTMLNode as it was before __slots__, with a per-instance __dict__."""
+
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def _count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        count += 1
+        if current.children:
+            stack.extend(current.children)
+    return count
+
+
+def _measure(build):
+    """Return (result, bytes still allocated by build())."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def bytes_per_instance(factory, count=100_000):
+    """Bytes allocated per object when creating count objects."""
+    objects, used = _measure(lambda: [factory(i) for i in range(count)])
+    # Exclude the list holding the objects
+    return (used - sys.getsizeof(objects)) / count
+
+
+def peak_generate_bytes(markdown, **options):
+    """Peak bytes allocated while generating one page from a file with PageRenderer options."""
+    with tempfile.TemporaryDirectory() as tmp:
+        src_path = os.path.join(tmp, "page.md")
+        with open(src_path, 'w') as f:
+            f.write(markdown)
+        renderer = PageRenderer(Template("<html>{{ Title }}{{ Content }}</html>"), **options)
+        tracemalloc.start()
+        renderer.generate(src_path, os.path.join(tmp, "page.html"))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000,
+                        help="Size of the synthetic markdown document (default: 1 MB)")
+    args = parser.parse_args()
+
+    markdown = synthetic_document(args.size)
+    tree, tree_bytes = _measure(lambda: markdown_to_html_node(markdown))
+    nodes = _count_nodes(tree)
+    print(f"Document: {len(markdown):,} chars, {nodes:,} HTML nodes")
+    print(f"HTML tree: {tree_bytes:,} bytes, {tree_bytes / nodes:.1f} bytes/node "
+          "(including text and props)")
+
+    text_nodes, text_bytes = _measure(lambda: text_to_textnodes(markdown.replace("\n", " ")))
+    print(f"TextNodes: {len(text_nodes):,} nodes, {text_bytes / len(text_nodes):.1f} bytes/node "
+          "(including text)")
+
+    print("\nPer-object overhead (100k objects, attribute values shared):")
+    cases = [
+        ("TextNode", lambda i: TextNode("x", TextType.TEXT),
+         lambda i: _UnslottedTextNode("x", TextType.TEXT)),
+        ("LeafNode", lambda i: LeafNode("b", "x"),
+         lambda i: _UnslottedHTMLNode("b", "x")),
+        ("ParentNode", lambda i: ParentNode("p", []),
+         lambda i: _UnslottedHTMLNode("p", None, [])),
+        ("HTMLNode", lambda i: HTMLNode("p"),
+         lambda i: _UnslottedHTMLNode("p")),
+    ]
+    for name, slotted, unslotted in cases:
+        after = bytes_per_instance(slotted)
+        before = bytes_per_instance(unslotted)
+        print(f"  {name:<10} {before:6.1f} -> {after:6.1f} bytes ({1 - after / before:.0%} smaller)")
+
+    print("\nPeak memory generating the document as one page:")
+    for label, options in (("tree", {}), ("streaming", {"streaming": True}), ("mmap", {"mmap_min_bytes": 1})):
+        peak = peak_generate_bytes(markdown, **options)
+        print(f"  {label:<10} {peak:>14,} bytes ({peak / len(markdown):.2f}x the markdown)")
+
+
+if __name__ == "__main__":
+    main()
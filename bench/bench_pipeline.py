@@ -0,0 +1,180 @@
+"""
+Time each stage of the markdown pipeline on synthetic corpora.
+
+Run from the repository root:
+
+    PYTHONPATH=src python3 bench/bench_pipeline.py [--size BYTES] [--save FILE] [--compare FILE]
+
+Every stage is timed on its own, best of --repeat runs, and reported as
+input throughput (MB/s) and output rate (nodes/s). --save writes the
+results as a baseline; --compare reports the change against one and exits
+with status 1 if any stage got slower than --threshold.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import CORPUS_SHAPES, synthetic_corpus
+from inline_markdown import text_to_textnodes
+from markdown_blocks import block_to_block_type, markdown_to_blocks, markdown_to_html_node
+
+
+def _count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        count += 1
+        if current.children:
+            stack.extend(current.children)
+    return count
+
+
+def _inline_texts(pages):
+    """The text each block hands to the inline parser, as the converters do."""
+    texts = []
+    for page in pages:
+        for block in markdown_to_blocks(page):
+            block_type = block_to_block_type(block)
+            if block_type in ("unordered_list", "ordered_list"):
+                texts.extend(line.split(" ", 1)[1] for line in block.split("\n"))
+            elif block_type == "quote":
+                texts.append("\n".join(line[1:].strip() for line in block.split("\n")))
+            elif block_type == "heading":
+                texts.append(block.lstrip("#")[1:])
+            elif block_type == "paragraph":
+                texts.append(block.replace("\n", " "))
+    return texts
+
+
+def pipeline_stages(pages):
+    """
+    Prepare the input of every stage, outside the timed region.
+
+    Returns:
+        List of (stage name, function to time, input bytes, nodes produced)
+        tuples; to_html counts the markdown its trees were parsed from
+    """
+    blocks = [block for page in pages for block in markdown_to_blocks(page)]
+    texts = _inline_texts(pages)
+    trees = [markdown_to_html_node(page) for page in pages]
+    html_nodes = sum(_count_nodes(tree) for tree in trees)
+    text_nodes = sum(len(text_to_textnodes(text)) for text in texts)
+    page_bytes = sum(len(page.encode()) for page in pages)
+    block_bytes = sum(len(block.encode()) for block in blocks)
+    text_bytes = sum(len(text.encode()) for text in texts)
+
+    return [
+        ("markdown_to_blocks", lambda: [markdown_to_blocks(page) for page in pages], page_bytes,
+         len(blocks)),
+        ("block_to_block_type", lambda: [block_to_block_type(block) for block in blocks], block_bytes,
+         len(blocks)),
+        ("text_to_textnodes", lambda: [text_to_textnodes(text) for text in texts], text_bytes,
+         text_nodes),
+        ("markdown_to_html_node", lambda: [markdown_to_html_node(page) for page in pages], page_bytes,
+         html_nodes),
+        ("to_html", lambda: [tree.to_html() for tree in trees], page_bytes, html_nodes),
+    ]
+
+
+def best_time(func, repeat):
+    """Return the fastest of repeat runs of func, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(shapes, size, repeat):
+    """
+    Benchmark every stage on every corpus shape.
+
+    Returns:
+        {shape: {"pages", "bytes", "stages": {stage: {"seconds", "mb_per_s", "nodes_per_s"}}}}
+    """
+    results = {}
+    for shape in shapes:
+        pages = synthetic_corpus(shape, size)
+        size_bytes = sum(len(page.encode()) for page in pages)
+        stages = {}
+        for name, func, input_bytes, nodes in pipeline_stages(pages):
+            seconds = best_time(func, repeat)
+            stages[name] = {
+                "seconds": seconds,
+                "mb_per_s": input_bytes / seconds / 1e6,
+                "nodes_per_s": nodes / seconds,
+            }
+        results[shape] = {"pages": len(pages), "bytes": size_bytes, "stages": stages}
+    return results
+
+
+def print_results(results, baseline=None):
+    """Print a table per shape, with the change against baseline if given."""
+    for shape, result in results.items():
+        print(f"\n{shape}: {result['pages']} pages, {result['bytes'] / 1e6:.2f} MB")
+        print(f"  {'stage':<24}{'ms':>10}{'MB/s':>10}{'nodes/s':>14}{'change':>10}")
+        for name, stage in result["stages"].items():
+            change = ""
+            base = (baseline or {}).get(shape, {}).get("stages", {}).get(name)
+            if base:
+                change = f"{(stage['seconds'] / base['seconds'] - 1) * 100:+.1f}%"
+            print(f"  {name:<24}{stage['seconds'] * 1000:>10.2f}{stage['mb_per_s']:>10.2f}"
+                  f"{stage['nodes_per_s']:>14,.0f}{change:>10}")
+
+
+def regressions(results, baseline, threshold):
+    """Return (shape, stage, slowdown) for stages slower than baseline by more than threshold."""
+    slower = []
+    for shape, result in results.items():
+        for name, stage in result["stages"].items():
+            base = baseline.get(shape, {}).get("stages", {}).get(name)
+            if base and stage["seconds"] > base["seconds"] * (1 + threshold):
+                slower.append((shape, name, stage["seconds"] / base["seconds"] - 1))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=2_000_000,
+                        help="Size of each synthetic corpus in characters (default: 2 MB)")
+    parser.add_argument("--shape", action="append", choices=sorted(CORPUS_SHAPES),
+                        help="Corpus shape to run; repeat for several (default: all)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Runs per stage; the fastest counts (default: 5)")
+    parser.add_argument("--save", metavar="FILE", help="Write the results to FILE as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a baseline saved with --save")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Slowdown against the baseline that counts as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = run(args.shape or list(CORPUS_SHAPES), args.size, args.repeat)
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.save}")
+
+    if baseline is not None:
+        slower = regressions(results, baseline, args.threshold)
+        if slower:
+            print(f"\nRegressions (> {args.threshold:.0%} slower):")
+            for shape, name, slowdown in slower:
+                print(f"  {shape} / {name}: {slowdown:+.1%}")
+            sys.exit(1)
+        print(f"\nNo stage is more than {args.threshold:.0%} slower than the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Deterministic synthetic markdown for the benchmarks."""
+import random
+
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron "
+    "while elves dwarves and men received lesser rings from celebrimbor"
+).split()
+
+
+def _sentence(rng, words=12):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _inline_paragraph(rng, sentences=4):
+    parts = []
+    for _ in range(sentences):
+        parts.append(_sentence(rng))
+        roll = rng.random()
+        if roll < 0.2:
+            parts.append(f"**{rng.choice(WORDS)}**")
+        elif roll < 0.4:
+            parts.append(f"_{rng.choice(WORDS)}_")
+        elif roll < 0.5:
+            parts.append(f"`{rng.choice(WORDS)}()`")
+        elif roll < 0.65:
+            parts.append(f"[{rng.choice(WORDS)}](/blog/{rng.choice(WORDS)})")
+        elif roll < 0.7:
+            parts.append(f"![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}.png)")
+    return " ".join(parts)
+
+
+def synthetic_block(rng):
+    """Return one random markdown block."""
+    roll = rng.random()
+    if roll < 0.1:
+        return "#" * rng.randint(1, 3) + " " + _sentence(rng, 5)
+    if roll < 0.2:
+        return "\n".join(f"- {_inline_paragraph(rng, 1)}" for _ in range(rng.randint(2, 6)))
+    if roll < 0.3:
+        return "\n".join(f"{i}. {_sentence(rng, 6)}" for i in range(1, rng.randint(2, 6) + 1))
+    if roll < 0.35:
+        return "\n".join(f"> {_sentence(rng)}" for _ in range(rng.randint(1, 3)))
+    if roll < 0.4:
+        lines = (f"    {rng.choice(WORDS)}({rng.choice(WORDS)})" for _ in range(rng.randint(2, 8)))
+        return "```\n" + "\n".join(lines) + "\n```"
+    return _inline_paragraph(rng)
+
+
+def synthetic_document(size, seed=0):
+    """
+    Build a markdown document of roughly size characters.
+
+    Args:
+        size: Target length in characters
+        seed: Random seed, so every run produces the same document
+    """
+    rng = random.Random(seed)
+    blocks = ["# " + _sentence(rng, 5)]
+    length = len(blocks[0])
+    while length < size:
+        block = synthetic_block(rng)
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+def _pages(rng, total_size, page_size, make_block, title_words=5):
+    """Split total_size characters of blocks into pages of about page_size."""
+    pages = []
+    length = 0
+    while length < total_size:
+        blocks = ["# " + _sentence(rng, title_words)]
+        page_length = len(blocks[0])
+        while page_length < page_size:
+            block = make_block(rng)
+            blocks.append(block)
+            page_length += len(block) + 2
+        pages.append("\n\n".join(blocks))
+        length += page_length
+    return pages
+
+
+def _link_dense_block(rng):
+    links = []
+    for _ in range(rng.randint(6, 14)):
+        word = rng.choice(WORDS)
+        if rng.random() < 0.2:
+            links.append(f"![{word}](/images/{word}.png)")
+        else:
+            links.append(f"[{word}](/blog/{word}) {rng.choice(WORDS)}")
+    return " ".join(links)
+
+
+def _deep_list_block(rng):
+    items = rng.randint(40, 200)
+    if rng.random() < 0.5:
+        return "\n".join(f"- {_inline_paragraph(rng, 1)}" for _ in range(items))
+    return "\n".join(f"{i}. {_sentence(rng, 8)}" for i in range(1, items + 1))
+
+
+def _long_code_block(rng):
+    lines = (f"    {rng.choice(WORDS)} = {rng.choice(WORDS)}({rng.randint(0, 99)})"
+             for _ in range(rng.randint(100, 500)))
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+def _code_heavy_block(rng):
+    return _long_code_block(rng) if rng.random() < 0.5 else _inline_paragraph(rng, 2)
+
+
+# Corpus shape -> function(rng, total_size) returning a list of pages
+CORPUS_SHAPES = {
+    "small_pages": lambda rng, size: _pages(rng, size, 2_000, synthetic_block),
+    "huge_pages": lambda rng, size: _pages(rng, size, max(size // 3, 1), synthetic_block),
+    "link_dense": lambda rng, size: _pages(rng, size, 20_000, _link_dense_block),
+    "deep_lists": lambda rng, size: _pages(rng, size, 50_000, _deep_list_block),
+    "long_code": lambda rng, size: _pages(rng, size, 50_000, _code_heavy_block),
+}
+
+
+def synthetic_corpus(shape, size, seed=0):
+    """
+    Build a list of markdown pages of a given shape.
+
+    Args:
+        shape: One of CORPUS_SHAPES
+        size: Target total length in characters
+        seed: Random seed, so every run produces the same corpus
+    """
+    return CORPUS_SHAPES[shape](random.Random(seed), size)
@@ -1,3 +1,3 @@
 #! /bin/bash
-python3 src/main.py
-cd public && python3 -m http.server 8888
+# Build the site, then serve docs/ and rebuild on changes with live reload
+python3 src/watch.py "$@"
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import profiling
+
+
+# Per-process renderer of the render stage's worker processes
+_worker_renderer = None
+
+
+def _init_render_worker(renderer, profile=False):
+    """Receive the template and cache settings once per render process."""
+    global _worker_renderer
+    _worker_renderer = renderer
+    if profile:
+        profiling.start_worker()
+
+
+def _render_in_worker(from_path, source, title):
+    html, delta, _ = _render(_worker_renderer, from_path, source, title)
+    profiler = profiling.current()
+    return html, delta, profiler.drain() if profiler is not None else None
+
+
+def _render(renderer, from_path, source, title):
+    """
+    Render one page, returning its HTML, the change in the cache counters
+    and the timings for the parent's Profiler, None in the parent itself.
+    """
+    before = renderer.stats()
+    with profiling.page(from_path):
+        html = renderer.render_source(source, title)
+    return html, renderer.stats() - before, None
+
+
+def _read(renderer, from_path):
+    with profiling.page(from_path):
+        return renderer._read_source(from_path)
+
+
+def _write(renderer, from_path, dest_path, html):
+    with profiling.page(from_path):
+        return renderer.write_output(dest_path, html)
+
+
+class AsyncPipeline:
+    """
+    Page generation as three overlapping stages connected by bounded queues.
+
+    Readers load markdown files on a thread pool, the render stage turns
+    them into HTML in an executor, and writers store the pages on the same
+    thread pool. While one page renders, others are being read and written,
+    so a build on a slow filesystem takes about as long as its I/O or its
+    rendering, whichever is larger, instead of their sum.
+
+    The queues bound how far reading runs ahead of rendering and rendering
+    ahead of writing, and with it the number of pages held in memory.
+    Pages are rendered whole, so the renderer's streaming and mmap modes
+    do not apply. Tasks are pulled on the I/O threads too, since a task
+    iterator may read files, as manifest filtering does.
+
+    With a Profiler installed, the read, render and write of each page
+    add up to one page entry.
+    """
+
+    def __init__(self, io_threads=8, read_queue=16, write_queue=16):
+        """
+        Args:
+            io_threads: Threads reading and writing files; that many reads
+                and writes are in flight at once (default: 8)
+            read_queue: Pages read and waiting to be rendered, at most
+                (default: 16)
+            write_queue: Pages rendered and waiting to be written, at most
+                (default: 16)
+        """
+        if min(io_threads, read_queue, write_queue) < 1:
+            raise ValueError("Pipeline threads and queue depths must be at least 1")
+        self.io_threads = io_threads
+        self.read_queue = read_queue
+        self.write_queue = write_queue
+
+    def run(self, tasks, renderer, jobs=1, on_page=None):
+        """
+        Generate pages through the pipeline.
+
+        Args:
+            tasks: Iterable of (markdown path, HTML path) tuples, consumed
+                lazily
+            renderer: PageRenderer; shipped to the render processes when
+                jobs > 1, otherwise used on one render thread
+            jobs: Number of render processes; 1 renders on a thread of this
+                process and 0 uses one process per CPU (default: 1)
+            on_page: Optional function called with (markdown path, HTML path)
+                after each page is written
+
+        Returns:
+            Counter of cache and output counters of the build
+        """
+        jobs = jobs or os.cpu_count() or 1
+        return asyncio.run(self._run(iter(tasks), renderer, jobs, on_page))
+
+    async def _run(self, tasks, renderer, jobs, on_page):
+        loop = asyncio.get_running_loop()
+        read = asyncio.Queue(self.read_queue)
+        rendered = asyncio.Queue(self.write_queue)
+        stats = Counter()
+        profiler = profiling.current()
+        tasks_lock = threading.Lock()
+
+        if jobs == 1:
+            render_executor = ThreadPoolExecutor(max_workers=1)
+            render_args = (_render, renderer)
+        else:
+            render_executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_render_worker,
+                                                  initargs=(renderer, profiler is not None))
+            render_args = (_render_in_worker,)
+
+        def next_task():
+            # The walk is shared by all readers, one next() at a time
+            with tasks_lock:
+                return next(tasks, None)
+
+        async def reader():
+            while (task := await loop.run_in_executor(io_executor, next_task)) is not None:
+                from_path, dest_path = task
+                source = await loop.run_in_executor(io_executor, _read, renderer, from_path)
+                await read.put((from_path, dest_path, source))
+
+        async def render():
+            while (item := await read.get()) is not None:
+                from_path, dest_path, source = item
+                html, delta, timings = await loop.run_in_executor(render_executor, *render_args, from_path,
+                                                                  source, renderer.title_of(from_path))
+                stats.update(delta)
+                if timings is not None:
+                    profiler.merge(timings)
+                await rendered.put((from_path, dest_path, html))
+
+        async def writer():
+            while (item := await rendered.get()) is not None:
+                from_path, dest_path, html = item
+                stats.update(await loop.run_in_executor(io_executor, _write, renderer, from_path, dest_path,
+                                                        html))
+                if on_page is not None:
+                    on_page(from_path, dest_path)
+
+        async def stage(workers, count, queue, next_count):
+            # Run count workers, then tell each worker of the next stage to stop
+            await asyncio.gather(*(workers() for _ in range(count)))
+            for _ in range(next_count):
+                await queue.put(None)
+
+        with ThreadPoolExecutor(max_workers=self.io_threads) as io_executor, render_executor:
+            await asyncio.gather(
+                stage(reader, self.io_threads, read, jobs),
+                stage(render, jobs, rendered, self.io_threads),
+                *(writer() for _ in range(self.io_threads)),
+            )
+        return stats
@@ -0,0 +1,426 @@
+import struct
+import sys
+from array import array
+from enum import IntEnum
+from htmlnode import escape_attribute, escape_html
+from inline_markdown import iter_inline_spans
+from markdown_blocks import (
+    BLOCK_CONVERTERS, BlockType, block_to_html_node, code_to_html_node, heading_to_html_node,
+    iter_block_spans, ordered_list_to_html_node, paragraph_to_html_node, quote_to_html_node,
+    unordered_list_to_html_node,
+)
+from textnode import TextType
+
+
+class NodeKind(IntEnum):
+    DOCUMENT = 0
+    PARAGRAPH = 1
+    HEADING1 = 2
+    HEADING2 = 3
+    HEADING3 = 4
+    HEADING4 = 5
+    HEADING5 = 6
+    HEADING6 = 7
+    QUOTE = 8
+    UNORDERED_LIST = 9
+    ORDERED_LIST = 10
+    LIST_ITEM = 11
+    CODE_BLOCK = 12
+    TEXT = 13
+    BOLD = 14
+    ITALIC = 15
+    CODE = 16
+    LINK = 17
+    IMAGE = 18
+    # Rendered HTML of a block a plugin converter produced
+    HTML = 19
+
+
+# Set on the kind of leaves of a paragraph that span line breaks, which
+# render as spaces
+FOLDED = 0x80
+_KIND_MASK = 0x7F
+
+# Tags of the element nodes, indexed by kind
+_TAGS = ["div", "p", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "ul", "ol", "li"]
+_OPEN_TAGS = [f"<{tag}>" for tag in _TAGS]
+_CLOSE_TAGS = [f"</{tag}>" for tag in _TAGS]
+_FIRST_LEAF = NodeKind.CODE_BLOCK
+
+_INLINE_KINDS = {
+    TextType.TEXT: NodeKind.TEXT,
+    TextType.BOLD: NodeKind.BOLD,
+    TextType.ITALIC: NodeKind.ITALIC,
+    TextType.CODE: NodeKind.CODE,
+    TextType.LINK: NodeKind.LINK,
+    TextType.IMAGE: NodeKind.IMAGE,
+}
+
+# Width of the delimiters around the text of delimited leaves
+_DELIMITER_WIDTHS = {NodeKind.BOLD: 2, NodeKind.ITALIC: 1, NodeKind.CODE: 1}
+
+# (delimiter width, opening tag, closing tag) of the leaves that wrap their
+# text, indexed by kind
+_INLINE_TAGS = [None] * len(NodeKind)
+_INLINE_TAGS[NodeKind.TEXT] = (0, "", "")
+_INLINE_TAGS[NodeKind.BOLD] = (2, "<b>", "</b>")
+_INLINE_TAGS[NodeKind.ITALIC] = (1, "<i>", "</i>")
+_INLINE_TAGS[NodeKind.CODE] = (1, "<code>", "</code>")
+
+# Block types compiled into nodes, while their built-in converter is in use;
+# any other block is stored as its rendered HTML
+_COMPILED_CONVERTERS = {
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+    BlockType.UNORDERED_LIST: unordered_list_to_html_node,
+    BlockType.ORDERED_LIST: ordered_list_to_html_node,
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+}
+
+# Serialized form: header, kinds, then starts, ends and extents as
+# little-endian uint32, then the text as UTF-8
+_MAGIC = b"SSGA"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHIII")
+_OFFSET_TYPE = "I"
+_MAX_OFFSET = 2 ** 32 - 1
+
+
+class CompactDocument:
+    """
+    A parsed markdown document stored in four parallel arrays instead of a
+    tree of node objects.
+
+    Nodes are numbered in document order, parents before their children.
+    Node i has a kind, a span starts[i]:ends[i] of the document text, and
+    an extent: its descendants are the nodes i + 1 up to extents[i], so
+    its children are found by hopping from one extent to the next.
+
+    Spans point into the markdown source. Leaves span their whole syntax,
+    delimiters and link brackets included; elements span their block or
+    list item line. The rewritten text of quote blocks and the HTML of
+    blocks converted by plugins are appended to the text after the source,
+    at offsets from source_length on.
+
+    A page is a handful of allocations however many nodes it has, it
+    renders to the same HTML as markdown_to_html_node, and to_bytes and
+    from_bytes turn it into bytes for caching and back.
+    """
+
+    __slots__ = ("text", "source_length", "kinds", "starts", "ends", "extents")
+
+    def __init__(self, text, source_length, kinds, starts, ends, extents):
+        self.text = text
+        self.source_length = source_length
+        self.kinds = kinds
+        self.starts = starts
+        self.ends = ends
+        self.extents = extents
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactDocument):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"CompactDocument({len(self)} nodes, {self.source_length} source chars)"
+
+    @property
+    def source(self):
+        """The markdown the document was parsed from."""
+        return self.text[:self.source_length]
+
+    def kind(self, node):
+        """Return the NodeKind of a node."""
+        return NodeKind(self.kinds[node] & _KIND_MASK)
+
+    def span(self, node):
+        """Return the (start, end) offsets of a node in the document text."""
+        return self.starts[node], self.ends[node]
+
+    def children(self, node=0):
+        """Yield the indexes of a node's children, by default the blocks."""
+        child = node + 1
+        end = self.extents[node]
+        while child < end:
+            yield child
+            child = self.extents[child]
+
+    def text_of(self, node):
+        """
+        Return the text a leaf displays: its content without delimiters,
+        the anchor of a link, the alt text of an image or the code of a
+        code block.
+        """
+        value = self._leaf_text(node)
+        if self.kinds[node] & FOLDED:
+            value = value.replace("\n", " ")
+        return value
+
+    def url(self, node):
+        """Return the URL of a link or image node."""
+        value = self._url(node)
+        if self.kinds[node] & FOLDED:
+            value = value.replace("\n", " ")
+        return value
+
+    def _leaf_text(self, node):
+        text = self.text
+        kind = self.kinds[node] & _KIND_MASK
+        start, end = self.starts[node], self.ends[node]
+        if kind == NodeKind.TEXT or kind == NodeKind.HTML:
+            return text[start:end]
+        if kind == NodeKind.LINK or kind == NodeKind.IMAGE:
+            open_at = start + (2 if kind == NodeKind.IMAGE else 1)
+            # Anchor and alt text cannot contain brackets
+            return text[open_at:text.index("]", open_at)]
+        if kind == NodeKind.CODE_BLOCK:
+            code = text[start + 3:end - 3]
+            return code[1:] if code.startswith("\n") else code
+        width = _DELIMITER_WIDTHS.get(kind)
+        if width is None:
+            raise ValueError(f"Node {node} is a {NodeKind(kind).name} element, not a leaf")
+        return text[start + width:end - width]
+
+    def _url(self, node):
+        kind = self.kinds[node] & _KIND_MASK
+        if kind != NodeKind.LINK and kind != NodeKind.IMAGE:
+            raise ValueError(f"Node {node} is a {NodeKind(kind).name}, not a link or image")
+        # "](" follows the anchor, and ")" ends the URL
+        return self.text[self.text.index("]", self.starts[node]) + 2:self.ends[node] - 1]
+
+    def write_html(self, out):
+        """Stream the document's HTML to a file-like object with a write() method."""
+        self._write_html(out.write)
+
+    def to_html(self):
+        fragments = []
+        self._write_html(fragments.append)
+        return "".join(fragments)
+
+    def _write_html(self, write):
+        text = self.text
+        # Extents and closing tags of the elements still open
+        open_extents = []
+        close_tags = []
+        next_close = len(self.kinds)
+
+        for node, (kind, start, end, extent) in enumerate(zip(self.kinds, self.starts, self.ends,
+                                                              self.extents)):
+            while node >= next_close:
+                write(close_tags.pop())
+                open_extents.pop()
+                next_close = open_extents[-1] if open_extents else len(self.kinds)
+
+            folded = kind & FOLDED
+            kind &= _KIND_MASK
+            if kind < _FIRST_LEAF:
+                write(_OPEN_TAGS[kind])
+                open_extents.append(extent)
+                close_tags.append(_CLOSE_TAGS[kind])
+                next_close = extent
+                continue
+
+            inline = _INLINE_TAGS[kind]
+            if inline is not None:
+                width, open_tag, close_tag = inline
+                value = text[start + width:end - width]
+            elif kind == NodeKind.LINK or kind == NodeKind.IMAGE:
+                open_at = start + (1 if kind == NodeKind.LINK else 2)
+                close = text.index("]", open_at)
+                label = text[open_at:close]
+                url = text[close + 2:end - 1]
+                if folded:
+                    label = label.replace("\n", " ")
+                    url = url.replace("\n", " ")
+                url = escape_attribute(url)
+                if kind == NodeKind.LINK:
+                    write(f'<a href="{url}">{escape_html(label)}</a>')
+                else:
+                    write(f'<img src="{url}" alt="{escape_attribute(label)}"></img>')
+                continue
+            elif kind == NodeKind.HTML:
+                write(text[start:end])
+                continue
+            else:
+                value = self._leaf_text(node)
+                open_tag, close_tag = "<pre><code>", "</code></pre>"
+
+            if folded:
+                value = value.replace("\n", " ")
+            # Checked inline; most leaves need no escaping and skip the call
+            if "&" in value or "<" in value or ">" in value:
+                value = escape_html(value)
+            write(f"{open_tag}{value}{close_tag}" if open_tag else value)
+
+        while close_tags:
+            write(close_tags.pop())
+
+    def to_bytes(self):
+        """Serialize the document, for caching."""
+        text = self.text.encode("utf-8")
+        header = _HEADER.pack(_MAGIC, _FORMAT_VERSION, len(self), self.source_length, len(text))
+        parts = [header, self.kinds.tobytes()]
+        for offsets in (self.starts, self.ends, self.extents):
+            if sys.byteorder == "big":
+                offsets = array(_OFFSET_TYPE, offsets)
+                offsets.byteswap()
+            parts.append(offsets.tobytes())
+        parts.append(text)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Load a document serialized with to_bytes.
+
+        Raises:
+            ValueError: If data is not a serialized document of this format
+        """
+        view = memoryview(data)
+        if len(view) < _HEADER.size:
+            raise ValueError("Truncated compact document")
+        magic, version, count, source_length, text_length = _HEADER.unpack_from(view)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError("Not a compact document of format version "
+                             f"{_FORMAT_VERSION}")
+        offset_size = array(_OFFSET_TYPE).itemsize
+        if len(view) != _HEADER.size + count * (1 + 3 * offset_size) + text_length:
+            raise ValueError("Truncated compact document")
+
+        pos = _HEADER.size
+        kinds = array("B")
+        kinds.frombytes(view[pos:pos + count])
+        pos += count
+        arrays = []
+        for _ in range(3):
+            offsets = array(_OFFSET_TYPE)
+            offsets.frombytes(view[pos:pos + count * offset_size])
+            if sys.byteorder == "big":
+                offsets.byteswap()
+            arrays.append(offsets)
+            pos += count * offset_size
+        text = str(view[pos:], "utf-8")
+        return cls(text, source_length, kinds, *arrays)
+
+
+class _Builder:
+    """Appends nodes to the arrays of a CompactDocument being compiled."""
+
+    def __init__(self, markdown):
+        if len(markdown) > _MAX_OFFSET:
+            raise ValueError("Markdown too large for a compact document")
+        self.markdown = markdown
+        self.kinds = array("B")
+        self.starts = array(_OFFSET_TYPE)
+        self.ends = array(_OFFSET_TYPE)
+        self.extents = array(_OFFSET_TYPE)
+        # Text appended after the source, and where the next piece goes
+        self.extra = []
+        self.extra_end = len(markdown)
+
+    def open(self, kind, start, end):
+        """Add an element node; close() it after adding its children."""
+        node = len(self.kinds)
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.extents.append(0)
+        return node
+
+    def close(self, node):
+        self.extents[node] = len(self.kinds)
+
+    def leaf(self, kind, start, end):
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.extents.append(len(self.kinds))
+
+    def inline(self, text, start, end, offset=0):
+        """Add the inline nodes of text[start:end], shifting their spans by offset."""
+        for text_type, node_start, node_end in iter_inline_spans(text, start, end):
+            self.leaf(_INLINE_KINDS[text_type], node_start + offset, node_end + offset)
+
+    def folded_inline(self, text, start, end):
+        """Add the inline nodes of a paragraph, flagging those that span line breaks."""
+        for text_type, node_start, node_end in iter_inline_spans(text, start, end):
+            kind = _INLINE_KINDS[text_type]
+            if text.find("\n", node_start, node_end) != -1:
+                kind |= FOLDED
+            self.leaf(kind, node_start, node_end)
+
+    def append_text(self, text):
+        """Store text after the source, returning its offset."""
+        start = self.extra_end
+        self.extra.append(text)
+        self.extra_end += len(text)
+        return start
+
+    def block(self, block_type, start, end):
+        markdown = self.markdown
+        if BLOCK_CONVERTERS.get(block_type) is not _COMPILED_CONVERTERS.get(block_type, False):
+            html = block_to_html_node(block_type, markdown[start:end]).to_html()
+            offset = self.append_text(html)
+            self.leaf(NodeKind.HTML, offset, offset + len(html))
+        elif block_type == BlockType.PARAGRAPH:
+            node = self.open(NodeKind.PARAGRAPH, start, end)
+            if markdown.find("\n", start, end) == -1:
+                self.inline(markdown, start, end)
+            else:
+                self.folded_inline(markdown, start, end)
+            self.close(node)
+        elif block_type == BlockType.HEADING:
+            level = 1
+            while markdown[start + level] == "#":
+                level += 1
+            node = self.open(NodeKind.HEADING1 + level - 1, start, end)
+            self.inline(markdown, start + level + 1, end)
+            self.close(node)
+        elif block_type == BlockType.CODE:
+            self.leaf(NodeKind.CODE_BLOCK, start, end)
+        elif block_type == BlockType.QUOTE:
+            node = self.open(NodeKind.QUOTE, start, end)
+            # The > markers and the whitespace around each line are dropped,
+            # so the quoted text is no longer a span of the source
+            text = "\n".join(line[1:].strip() for line in markdown[start:end].split("\n"))
+            self.inline(text, 0, len(text), offset=self.append_text(text))
+            self.close(node)
+        else:
+            ordered = block_type == BlockType.ORDERED_LIST
+            node = self.open(NodeKind.ORDERED_LIST if ordered else NodeKind.UNORDERED_LIST, start, end)
+            line_start = start
+            while line_start <= end:
+                line_end = markdown.find("\n", line_start, end)
+                if line_end == -1:
+                    line_end = end
+                # Every line starts with "- ", "* " or its number and ". "
+                text_start = markdown.index(". ", line_start) + 2 if ordered else line_start + 2
+                item = self.open(NodeKind.LIST_ITEM, line_start, line_end)
+                self.inline(markdown, text_start, line_end)
+                self.close(item)
+                line_start = line_end + 1
+            self.close(node)
+
+    def finish(self):
+        text = self.markdown + "".join(self.extra) if self.extra else self.markdown
+        return CompactDocument(text, len(self.markdown), self.kinds, self.starts, self.ends, self.extents)
+
+
+def markdown_to_compact(markdown):
+    """
+    Parse a markdown string into a CompactDocument.
+
+    Raises:
+        ValueError: If an inline delimiter is not closed
+    """
+    builder = _Builder(markdown)
+    document = builder.open(NodeKind.DOCUMENT, 0, len(markdown))
+    for block_type, start, end in iter_block_spans(markdown):
+        builder.block(block_type, start, end)
+    builder.close(document)
+    return builder.finish()
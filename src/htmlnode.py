@@ -1,7 +1,45 @@
 import textnode
 
 
+class Markup(str):
+    """
+    A string that is already HTML, such as a cached rendered fragment.
+
+    Leaf values and attribute values of this type are written as they are
+    instead of being escaped again.
+    """
+
+    __slots__ = ()
+
+
+def escape_html(text):
+    """
+    Escape &, < and > for use as HTML text.
+
+    Most text contains none of them, so it is only scanned for them and
+    returned as is; Markup is never escaped.
+    """
+    if "&" in text or "<" in text or ">" in text:
+        if isinstance(text, Markup):
+            return text
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value):
+    """Escape &, <, > and double quotes for use in a double-quoted attribute value."""
+    if "&" in value or "<" in value or ">" in value or '"' in value:
+        if isinstance(value, Markup):
+            return value
+        return (value.replace("&", "&amp;").replace("<", "&lt;")
+                .replace(">", "&gt;").replace('"', "&quot;"))
+    return value
+
+
 class HTMLNode:
+    # Pages allocate tens of thousands of nodes; slots keep them compact
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -11,50 +49,83 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError()
 
+    def write_html(self, out):
+        """Stream the node's HTML to a file-like object with a write() method."""
+        self._write_html(out.write)
+
+    def _write_html(self, write):
+        # Nodes without children render in one piece
+        write(self.to_html())
+
     def props_to_html(self):
-        if self.props is None:
+        if not self.props:
             return ""
 
         html_attrs = []
         for key, value in self.props.items():
-            html_attrs.append(f'{key}="{value}"')
+            if value.__class__ is not str:
+                # Numbers, None and other values render as their str()
+                if not isinstance(value, Markup):
+                    value = escape_attribute(str(value))
+            elif "&" in value or '"' in value or "<" in value or ">" in value:
+                value = escape_attribute(value)
+            html_attrs.append(f' {key}="{value}"')
 
-        return " " + " ".join(html_attrs) if html_attrs else ""
+        return "".join(html_attrs)
 
     def __repr__(self):
         return f"HTMLNode({self.tag!r}, {self.value!r}, {self.children!r}, {self.props!r})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
     def to_html(self):
-        if self.value is None:
+        value = self.value
+        if value is None:
             raise ValueError("All leaf nodes must have a value")
 
+        if value.__class__ is not str:
+            if not isinstance(value, Markup):
+                value = escape_html(str(value))
+        # Checked inline; most leaves need no escaping and skip the call
+        elif "&" in value or "<" in value or ">" in value:
+            value = escape_html(value)
+
         if self.tag is None:
-            return self.value
+            return value
 
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        if self.props is None:
+            return f"<{self.tag}>{value}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        # Collect fragments from the whole subtree and join them once
+        fragments = []
+        self._write_html(fragments.append)
+        return "".join(fragments)
+
+    def _write_html(self, write):
         if self.tag is None:
             raise ValueError("All ParentNode objects must have a tag value")
 
         if self.children is None:
             raise ValueError("All ParentNode children must be defined")
 
-        html = ""
+        write(f"<{self.tag}>" if self.props is None else f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
-            html += child.to_html()
-
-        return f"<{self.tag}{self.props_to_html()}>{html}</{self.tag}>"
+            child._write_html(write)
+        write(f"</{self.tag}>")
 
 
 def text_node_to_html_node(text_node):
@@ -1,104 +1,244 @@
+import argparse
+import itertools
 import os
 import sys
 import shutil
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from textnode import TextNode, TextType
-from markdown_blocks import markdown_to_html_node, extract_title
-
-
-def copy_static_to_public(src_dir, dest_dir):
+from template import Template
+from page_renderer import PageRenderer, format_stats
+from parse_cache import ParseCache, PARSE_CACHE_DIR
+from static_sync import StaticSync, LINK_MODES, remove_stale_files
+import profiling
+from manifest import BuildManifest, MANIFEST_PATH, hash_file, generator_version
+from site_index import SiteIndex, SITE_INDEX_PATH
+from sharding import Shard, SHARD_DIR, verify_shards
+from async_pipeline import AsyncPipeline
+
+
+def copy_static_to_public(src_dir, dest_dir, syncer=None):
     """
     Recursively copies all contents from source directory to destination directory.
-    Deletes destination directory first to ensure a clean copy.
+    Deletes destination directory first to ensure a clean copy, unless a
+    StaticSync is given, in which case only changed files are copied.
 
     Args:
         src_dir: Source directory path
         dest_dir: Destination directory path
+        syncer: Optional StaticSync for incremental copying
+
+    Returns:
+        The StaticSync used, whose outputs lists the files in dest_dir
     """
-    # Delete destination directory if it exists
-    if os.path.exists(dest_dir):
-        print(f"Deleting {dest_dir}...")
-        shutil.rmtree(dest_dir)
+    if syncer is None:
+        # Delete destination directory if it exists
+        if os.path.exists(dest_dir):
+            print(f"Deleting {dest_dir}...")
+            shutil.rmtree(dest_dir)
 
-    # Create the destination directory
-    print(f"Creating {dest_dir}...")
-    os.mkdir(dest_dir)
+        # Create the destination directory
+        print(f"Creating {dest_dir}...")
+        os.mkdir(dest_dir)
+
+        syncer = StaticSync()
 
     # Recursively copy contents
-    _copy_directory_contents(src_dir, dest_dir)
+    with profiling.stage("static_copy"):
+        report = syncer.sync(src_dir, dest_dir)
+    print(report.summary())
+    return syncer
 
 
-def _copy_directory_contents(src_dir, dest_dir):
+def generate_page(from_path, template_path, dest_path, basepath="/", renderer=None):
     """
-    Helper function to recursively copy directory contents.
+    Generate an HTML page from a markdown file using a template.
 
     Args:
-        src_dir: Source directory path
-        dest_dir: Destination directory path
+        from_path: Path to markdown file
+        template_path: Path to HTML template file
+        dest_path: Path to write the generated HTML file
+        basepath: Base path for URLs (default: "/")
+        renderer: PageRenderer holding the template already compiled from
+            template_path and the build's caches (default: load the
+            template without caches)
     """
-    # List all items in source directory
-    items = os.listdir(src_dir)
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
 
-    for item in items:
-        src_path = os.path.join(src_dir, item)
-        dest_path = os.path.join(dest_dir, item)
+    if renderer is None:
+        renderer = PageRenderer(Template.from_file(template_path, basepath))
 
-        if os.path.isfile(src_path):
-            # Copy file
-            print(f"Copying file: {src_path} -> {dest_path}")
-            shutil.copy(src_path, dest_path)
-        else:
-            # Create directory and recursively copy its contents
-            print(f"Creating directory: {dest_path}")
-            os.mkdir(dest_path)
-            _copy_directory_contents(src_path, dest_path)
+    renderer.generate(from_path, dest_path)
 
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
+def iter_page_tasks(dir_path_content, dest_dir_path):
     """
-    Generate an HTML page from a markdown file using a template.
+    Walk a content tree and yield the pages to generate as they are found.
+
+    Directories are listed with os.scandir, which reports entry types
+    without a stat per entry, and visited depth-first from an explicit
+    stack, so neither deep nesting nor huge trees are a problem. Only the
+    directories still to visit are kept in memory.
 
     Args:
-        from_path: Path to markdown file
-        template_path: Path to HTML template file
-        dest_path: Path to write the generated HTML file
-        basepath: Base path for URLs (default: "/")
+        dir_path_content: Source directory containing markdown files
+        dest_dir_path: Destination directory for generated HTML files
+
+    Yields:
+        (markdown path, HTML path) tuples
     """
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    stack = [(dir_path_content, dest_dir_path)]
+    while stack:
+        src_dir, dest_dir = stack.pop()
+        subdirs = []
+        with os.scandir(src_dir) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    subdirs.append((entry.path, os.path.join(dest_dir, entry.name)))
+                elif entry.name.endswith('.md') and entry.is_file():
+                    # Only the extension changes, never a directory name
+                    html_name = os.path.splitext(entry.name)[0] + '.html'
+                    yield entry.path, os.path.join(dest_dir, html_name)
+        # Reversed, so subdirectories are visited in listing order
+        stack.extend(reversed(subdirs))
+
+
+def collect_page_tasks(dir_path_content, dest_dir_path):
+    """
+    Walk a content tree and list the pages to generate.
+
+    Args:
+        dir_path_content: Source directory containing markdown files
+        dest_dir_path: Destination directory for generated HTML files
+
+    Returns:
+        List of (markdown path, HTML path) tuples, in walk order
+    """
+    return list(iter_page_tasks(dir_path_content, dest_dir_path))
+
+
+def _walk_pages(dir_path_content, dest_dir_path):
+    """Yield page tasks lazily, timing the walk."""
+    tasks = iter_page_tasks(dir_path_content, dest_dir_path)
+    while True:
+        with profiling.stage("walk"):
+            task = next(tasks, None)
+        if task is None:
+            return
+        yield task
+
+
+def _record_outputs(tasks, outputs):
+    """Pass tasks through, appending each HTML path to outputs."""
+    for task in tasks:
+        outputs.append(task[1])
+        yield task
+
+
+# Per-process state of parallel page workers, set once by _init_worker
+_worker_renderer = None
+
+
+def _init_worker(renderer, profile=False):
+    """Receive the template and cache settings once per worker process."""
+    global _worker_renderer
+    _worker_renderer = renderer
+    if profile:
+        profiling.start_worker()
 
-    # Read markdown file
-    with open(from_path, 'r') as f:
-        markdown_content = f.read()
 
-    # Read template file
-    with open(template_path, 'r') as f:
-        template_content = f.read()
+def _generate_page_batch(tasks):
+    """
+    Render and write a batch of (markdown path, HTML path) tasks in a worker.
+
+    Returns the tasks, the change in the worker's cache counters and, when
+    profiling, the pages' timings.
+    """
+    before = _worker_renderer.stats()
+    for from_path, dest_path in tasks:
+        _worker_renderer.generate(from_path, dest_path)
+    profiler = profiling.current()
+    timings = profiler.drain() if profiler is not None else None
+    return tasks, _worker_renderer.stats() - before, timings
+
+
+# Tasks sent to a worker at once, at most; batches start at one task and
+# grow with the number of tasks submitted, so small sites still spread
+MAX_BATCH_SIZE = 64
 
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
+# Batches in flight per worker; the walk waits while this many are queued
+BATCHES_PER_WORKER = 4
 
-    # Extract title from markdown
-    title = extract_title(markdown_content)
 
-    # Replace placeholders in template
-    final_html = template_content.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", html_content)
+def generate_pages_parallel(tasks, template_path, renderer, jobs=None):
+    """
+    Generate pages across a pool of worker processes.
 
-    # Replace basepath for URLs
-    final_html = final_html.replace('href="/', f'href="{basepath}')
-    final_html = final_html.replace('src="/', f'src="{basepath}')
+    Tasks are consumed lazily, so workers start rendering while the content
+    tree is still being walked. At most BATCHES_PER_WORKER batches per
+    worker are queued at any time; the walk waits for results beyond that,
+    which keeps memory flat however many pages there are.
 
-    # Ensure destination directory exists
-    dest_dir = os.path.dirname(dest_path)
-    if dest_dir and not os.path.exists(dest_dir):
-        os.makedirs(dest_dir)
+    The output is identical to generating the same tasks one by one with
+    generate_page.
 
-    # Write the generated HTML
-    with open(dest_path, 'w') as f:
-        f.write(final_html)
+    Args:
+        tasks: Iterable of (markdown path, HTML path) tuples
+        template_path: Path to HTML template file
+        renderer: PageRenderer shipped to every worker
+        jobs: Number of worker processes (default: one per CPU)
 
+    Timings recorded by profiling workers are merged into the installed
+    Profiler.
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/"):
+    Returns:
+        Counter of cache hits and misses summed over all workers
+    """
+    stats = Counter()
+    jobs = jobs or os.cpu_count() or 1
+    max_in_flight = jobs * BATCHES_PER_WORKER
+    profiler = profiling.current()
+
+    def collect(done):
+        for future in done:
+            batch, batch_stats, timings = future.result()
+            for from_path, dest_path in batch:
+                print(f"Generated page from {from_path} to {dest_path} using {template_path}")
+            stats.update(batch_stats)
+            if timings is not None:
+                profiler.merge(timings)
+
+    tasks = iter(tasks)
+    executor = None
+    pending = set()
+    submitted = 0
+    try:
+        while True:
+            batch_size = min(MAX_BATCH_SIZE, max(1, submitted // max_in_flight))
+            batch = list(itertools.islice(tasks, batch_size))
+            if not batch:
+                break
+            if executor is None:
+                # Started on the first task, so an empty site forks nothing
+                executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                               initargs=(renderer, profiler is not None))
+            renderer.prepare_outputs([dest_path for _, dest_path in batch])
+            pending.add(executor.submit(_generate_page_batch, batch))
+            submitted += len(batch)
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(pending)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return stats
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/", manifest=None, jobs=1,
+                             block_cache_bytes=0, parse_cache=None, streaming=False, mmap_min_bytes=0,
+                             site_index=None, shard=None, pipeline=None):
     """
     Recursively generate HTML pages from all markdown files in a directory tree.
 
@@ -107,39 +247,327 @@ def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, bas
         template_path: Path to HTML template file
         dest_dir_path: Destination directory for generated HTML files
         basepath: Base path for URLs (default: "/")
+        manifest: Optional BuildManifest; unchanged pages are skipped
+        jobs: Number of worker processes; 1 renders in this process and
+            0 uses one per CPU (default: 1)
+        block_cache_bytes: Memory cap of the per-process cache of rendered
+            blocks; 0 disables it (default: 0)
+        parse_cache: Optional ParseCache of rendered page content
+        streaming: Convert and write pages one block at a time instead of
+            building each page's tree first (default: False)
+        mmap_min_bytes: Memory-map and stream markdown files at least this
+            large; 0 disables it (default: 0)
+        site_index: Optional SiteIndex, updated with every page before
+            any is rendered; page titles and, with a manifest, content
+            hashes are taken from it instead of from the files
+        shard: Optional Shard; only the pages it owns are generated
+        pipeline: Optional AsyncPipeline that overlaps reading, rendering
+            and writing pages; streaming and mmap_min_bytes do not apply
+            to it
+
+    Returns:
+        List of the HTML paths of all pages, including skipped ones, or
+        of the shard's pages when sharded
     """
-    # List all items in the content directory
-    items = os.listdir(dir_path_content)
+    pages = []
+    tasks = _walk_pages(dir_path_content, dest_dir_path)
+
+    if site_index is not None:
+        # The index covers every page before any is rendered
+        tasks = list(tasks)
+        with profiling.stage("index"):
+            site_index.update(tasks, dest_dir_path)
+        print(site_index.summary())
+
+    if shard is not None:
+        tasks = (task for task in tasks if shard.owns(task[0], dir_path_content))
+    tasks = _record_outputs(tasks, pages)
+
+    if manifest is not None:
+        if site_index is not None:
+            # The index already hashed every file it read
+            tasks = (task for task in tasks
+                     if manifest.needs_build("pages", *task, site_index.digest(task[0])))
+        else:
+            tasks = (task for task in tasks if manifest.needs_build("pages", *task))
 
-    for item in items:
-        src_path = os.path.join(dir_path_content, item)
-        dest_path = os.path.join(dest_dir_path, item)
+    renderer = PageRenderer(Template.from_file(template_path, basepath), block_cache_bytes, parse_cache,
+                            streaming, mmap_min_bytes,
+                            site_index.source_titles() if site_index is not None else None)
 
-        if os.path.isfile(src_path):
-            # If it's a markdown file, generate an HTML page
-            if item.endswith('.md'):
-                # Change .md extension to .html
-                dest_path = dest_path.replace('.md', '.html')
-                generate_page(src_path, template_path, dest_path, basepath)
-        else:
-            # If it's a directory, recursively process it
-            generate_pages_recursive(src_path, template_path, dest_path, basepath)
+    if pipeline is not None:
+        def report(src_path, dest_path):
+            print(f"Generated page from {src_path} to {dest_path} using {template_path}")
+        stats = pipeline.run(tasks, renderer, jobs, report)
+    elif jobs == 1:
+        for src_path, dest_path in tasks:
+            generate_page(src_path, template_path, dest_path, basepath, renderer)
+        stats = renderer.stats()
+    else:
+        stats = generate_pages_parallel(tasks, template_path, renderer, jobs)
 
+    for line in format_stats(stats):
+        print(line)
 
-def main():
-    # Get basepath from command line arguments, default to "/"
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+    return pages
+
+
+def parse_args(argv):
+    """
+    Parse command line arguments.
+
+    Args:
+        argv: Argument list, without the program name
+    """
+    parser = argparse.ArgumentParser(description="Build the static site into docs/.")
+    parser.add_argument("basepath", nargs="?", default="/",
+                        help='Base path for URLs (default: "/")')
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rebuild pages and static files whose sources changed")
+    parser.add_argument("--clean", action="store_true",
+                        help="Delete docs/ and copy every static file instead of syncing")
+    parser.add_argument("--checksum", action="store_true",
+                        help="Compare static files by content hash instead of size and mtime")
+    parser.add_argument("--static-link", choices=LINK_MODES, default="reflink",
+                        help="How changed static files are placed in docs/; reflink and hardlink "
+                             "fall back to copying when unsupported (default: reflink)")
+    parser.add_argument("--static-workers", type=int, default=8, metavar="N",
+                        help="Copy static files on N threads (default: 8)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                        help="Render pages in N worker processes; 0 means one per CPU (default: 1)")
+    parser.add_argument("--block-cache", type=float, default=0, metavar="MB",
+                        help="Cache rendered blocks repeated across pages, using up to MB "
+                             "megabytes per process (default: off)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read each markdown file line by line and write every block as soon as it "
+                             "is converted, so memory stays bounded by the largest block")
+    parser.add_argument("--mmap-min-mb", type=float, default=16, metavar="MB",
+                        help="Memory-map markdown files of at least MB megabytes and stream them, "
+                             "decoding one chunk of blocks at a time; 0 disables it (default: 16)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap reading, rendering and writing pages in an asyncio pipeline; "
+                             "renders on --jobs processes, or one thread with --jobs 1")
+    parser.add_argument("--io-threads", type=int, default=8, metavar="N",
+                        help="Threads reading and writing files with --pipeline (default: 8)")
+    parser.add_argument("--read-queue", type=int, default=16, metavar="N",
+                        help="Pages read ahead of rendering with --pipeline, at most (default: 16)")
+    parser.add_argument("--write-queue", type=int, default=16, metavar="N",
+                        help="Rendered pages waiting to be written with --pipeline, at most (default: 16)")
+    parser.add_argument("--parse-cache", action="store_true",
+                        help=f"Reuse the rendered content of unchanged markdown files from {PARSE_CACHE_DIR}")
+    parser.add_argument("--parse-cache-max-mb", type=float, default=512, metavar="MB",
+                        help="Evict the least recently used parse cache entries beyond MB megabytes (default: 512)")
+    parser.add_argument("--parse-cache-max-age", type=float, default=30, metavar="DAYS",
+                        help="Evict parse cache entries unused for DAYS days (default: 30)")
+    parser.add_argument("--site-index", action="store_true",
+                        help=f"Index the titles, headings, links and images of all pages into {SITE_INDEX_PATH}, "
+                             "re-reading only changed files")
+    parser.add_argument("--shard", type=Shard.parse, metavar="I/N",
+                        help="Build only shard I of N (numbered from 1) into docs/; pages are split by a "
+                             "stable hash of their path and shard 1 also copies the static files")
+    parser.add_argument("--shard-dir", default=SHARD_DIR, metavar="DIR",
+                        help=f"Where --shard writes its report and --verify-shards reads them "
+                             f"(default: {SHARD_DIR})")
+    parser.add_argument("--verify-shards", type=int, metavar="N",
+                        help="Check that the reports of shards 1 to N cover the whole site and that "
+                             "their outputs are all in docs/, then exit without building")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each build stage per page and for the whole site")
+    parser.add_argument("--profile-dir", default=profiling.PROFILE_DIR, metavar="DIR",
+                        help=f"Where --profile writes profile.json and trace.json (default: {profiling.PROFILE_DIR})")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N",
+                        help="Number of slowest pages listed by --profile (default: 10)")
+    args = parser.parse_args(argv)
+    if args.shard is not None and args.clean:
+        # Deleting docs/ would delete the pages of the other shards
+        parser.error("--clean cannot be combined with --shard")
+    if args.incremental and args.clean:
+        # The incremental build would keep docs/ and its manifest anyway
+        parser.error("--clean cannot be combined with --incremental")
+    return args
+
+
+def incremental_build(basepath, jobs=1, block_cache_bytes=0, parse_cache=None, link_mode="copy",
+                      static_workers=8, streaming=False, mmap_min_bytes=0, site_index=None, shard=None,
+                      shard_dir=SHARD_DIR, pipeline=None):
+    """
+    Rebuild only what changed since the previous incremental build.
 
-    # Delete the docs directory if it exists
-    if os.path.exists("docs"):
-        print("Deleting docs directory...")
-        shutil.rmtree("docs")
+    Outputs whose sources were deleted are removed, and everything is rebuilt
+    when the template, basepath or generator code changed.
+
+    Args:
+        basepath: Base path for URLs
+        jobs: Number of page worker processes (default: 1)
+        block_cache_bytes: Memory cap of the rendered block cache (default: off)
+        parse_cache: Optional ParseCache of rendered page content
+        link_mode: How changed static files are placed in docs/ (default: "copy")
+        static_workers: Number of static copy threads (default: 8)
+        streaming: Convert and write pages one block at a time (default: False)
+        mmap_min_bytes: Memory-map and stream markdown files at least this
+            large; 0 disables it (default: 0)
+        site_index: Optional SiteIndex to update with every page
+        shard: Optional Shard to build; each shard keeps its own manifest,
+            so it only ever removes its own stale outputs
+        shard_dir: Directory of the shard reports (default: SHARD_DIR)
+        pipeline: Optional AsyncPipeline to generate pages through
+    """
+    manifest_path = MANIFEST_PATH if shard is None else shard.manifest_path(MANIFEST_PATH)
+    manifest = BuildManifest.load(manifest_path)
+    settings = dict(template=hash_file("template.html"), basepath=basepath, version=generator_version())
+    if not manifest.start(**settings):
+        print("Template, basepath or generator changed, rebuilding everything...")
+
+    syncer = None
+    if shard is None or shard.copies_static:
+        syncer = copy_static_to_public("static", "docs", StaticSync(link_mode=link_mode, manifest=manifest,
+                                                                    workers=static_workers))
+    pages = generate_pages_recursive("content", "template.html", "docs", basepath, manifest=manifest,
+                                     jobs=jobs, block_cache_bytes=block_cache_bytes, parse_cache=parse_cache,
+                                     streaming=streaming, mmap_min_bytes=mmap_min_bytes,
+                                     site_index=site_index, shard=shard, pipeline=pipeline)
+    manifest.remove_stale_outputs("docs")
+    manifest.save()
+    if shard is not None:
+        write_shard_report(shard, pages, syncer, settings, shard_dir)
+
+    print(f"Pages: {manifest.built['pages']} rebuilt, {manifest.skipped['pages']} unchanged")
+
+
+def write_shard_report(shard, pages, syncer, settings, shard_dir=SHARD_DIR):
+    """Record a shard's outputs for --verify-shards."""
+    static = syncer.outputs if syncer is not None else None
+    path = shard.write_report("docs", pages, static, settings, shard_dir)
+    print(f"Shard {shard}: {len(pages)} pages, report written to {path}")
+
+
+def sharded_build(args, basepath, block_cache_bytes, parse_cache, mmap_min_bytes=0, site_index=None,
+                  pipeline=None):
+    """
+    Build one shard of the site into docs/.
+
+    Other shards may be writing to the same docs/ at the same time, so
+    nothing is deleted: there is no --clean and no stale output removal.
+
+    Args:
+        args: Parsed command line arguments, with args.shard set
+        basepath: Base path for URLs
+        block_cache_bytes: Memory cap of the rendered block cache
+        parse_cache: Optional ParseCache of rendered page content
+        mmap_min_bytes: Memory-map and stream markdown files at least this
+            large; 0 disables it (default: 0)
+        site_index: Optional SiteIndex to update with every page
+        pipeline: Optional AsyncPipeline to generate pages through
+    """
+    shard = args.shard
+    syncer = None
+    if shard.copies_static:
+        syncer = copy_static_to_public("static", "docs",
+                                       StaticSync(args.checksum, args.static_link,
+                                                  workers=args.static_workers))
+
+    pages = generate_pages_recursive("content", "template.html", "docs", basepath, jobs=args.jobs,
+                                     block_cache_bytes=block_cache_bytes, parse_cache=parse_cache,
+                                     streaming=args.stream, mmap_min_bytes=mmap_min_bytes,
+                                     site_index=site_index, shard=shard, pipeline=pipeline)
+
+    settings = dict(template=hash_file("template.html"), basepath=basepath, version=generator_version())
+    write_shard_report(shard, pages, syncer, settings, args.shard_dir)
 
-    # Copy static files to docs directory
-    copy_static_to_public("static", "docs")
+
+def build(args, basepath, block_cache_bytes, parse_cache, mmap_min_bytes=0, site_index=None, pipeline=None):
+    """
+    Run a full or incremental build as selected on the command line.
+
+    Args:
+        args: Parsed command line arguments
+        basepath: Base path for URLs
+        block_cache_bytes: Memory cap of the rendered block cache
+        parse_cache: Optional ParseCache of rendered page content
+        mmap_min_bytes: Memory-map and stream markdown files at least this
+            large; 0 disables it (default: 0)
+        site_index: Optional SiteIndex to update with every page
+        pipeline: Optional AsyncPipeline to generate pages through
+    """
+    if args.incremental:
+        incremental_build(basepath, jobs=args.jobs, block_cache_bytes=block_cache_bytes,
+                          parse_cache=parse_cache, link_mode=args.static_link,
+                          static_workers=args.static_workers, streaming=args.stream,
+                          mmap_min_bytes=mmap_min_bytes, site_index=site_index, shard=args.shard,
+                          shard_dir=args.shard_dir, pipeline=pipeline)
+        return
+
+    if args.shard is not None:
+        sharded_build(args, basepath, block_cache_bytes=block_cache_bytes, parse_cache=parse_cache,
+                      mmap_min_bytes=mmap_min_bytes, site_index=site_index, pipeline=pipeline)
+        return
+
+    if args.clean:
+        # Delete the docs directory if it exists
+        if os.path.exists("docs"):
+            print("Deleting docs directory...")
+            shutil.rmtree("docs")
+
+        # Copy static files to docs directory
+        syncer = copy_static_to_public("static", "docs",
+                                       StaticSync(link_mode="copy", workers=args.static_workers))
+    else:
+        # Only copy static files that changed since the last build
+        syncer = copy_static_to_public("static", "docs",
+                                       StaticSync(args.checksum, args.static_link,
+                                                  workers=args.static_workers))
 
     # Generate all pages recursively from content directory
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    pages = generate_pages_recursive("content", "template.html", "docs", basepath, jobs=args.jobs,
+                                     block_cache_bytes=block_cache_bytes, parse_cache=parse_cache,
+                                     streaming=args.stream, mmap_min_bytes=mmap_min_bytes,
+                                     site_index=site_index, pipeline=pipeline)
+
+    # Drop outputs whose static file or markdown source no longer exists
+    remove_stale_files("docs", syncer.outputs | {os.path.normpath(page) for page in pages})
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    basepath = args.basepath
+
+    if args.verify_shards is not None:
+        expected = [dest_path for _, dest_path in iter_page_tasks("content", "docs")]
+        problems = verify_shards(args.verify_shards, expected, "docs", args.shard_dir)
+        for problem in problems:
+            print(problem)
+        if problems:
+            sys.exit(f"Sharded build is incomplete: {len(problems)} problems")
+        print(f"All {args.verify_shards} shards reported and all {len(expected)} pages are in docs")
+        return
+    block_cache_bytes = int(args.block_cache * 1024 * 1024)
+    mmap_min_bytes = int(args.mmap_min_mb * 1024 * 1024)
+    parse_cache = ParseCache(PARSE_CACHE_DIR) if args.parse_cache else None
+    site_index = SiteIndex.load(SITE_INDEX_PATH) if args.site_index else None
+    pipeline = AsyncPipeline(args.io_threads, args.read_queue, args.write_queue) if args.pipeline else None
+    profiler = profiling.Profiler().install() if args.profile else None
+
+    try:
+        build(args, basepath, block_cache_bytes, parse_cache, mmap_min_bytes, site_index, pipeline)
+    finally:
+        if profiler is not None:
+            profiler.uninstall()
+
+    if site_index is not None:
+        site_index.save()
+
+    if parse_cache is not None:
+        removed, freed = parse_cache.prune(max_bytes=int(args.parse_cache_max_mb * 1024 * 1024),
+                                           max_age=args.parse_cache_max_age * 24 * 60 * 60)
+        if removed:
+            print(f"Parse cache: evicted {removed} entries ({freed} bytes)")
+
+    if profiler is not None:
+        print()
+        for line in profiler.report(args.profile_top):
+            print(line)
+        for path in profiler.export(args.profile_dir):
+            print(f"Profile written to {path}")
 
     print(f"\nSite generated successfully with basepath: {basepath}")
 
@@ -0,0 +1,218 @@
+import glob
+import hashlib
+import json
+import os
+
+
+MANIFEST_PATH = os.path.join(".ssg-cache", "manifest.json")
+
+SECTIONS = ("pages", "static")
+
+
+def hash_file(path):
+    """
+    Return the SHA-256 hex digest of a file's contents.
+
+    Args:
+        path: Path of the file to hash
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def generator_version():
+    """
+    Return a fingerprint of the generator's own source code.
+
+    Any edit to a module in src/ changes the fingerprint, which makes the
+    next incremental build regenerate everything.
+    """
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(src_dir, "*.py"))):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _output_unchanged(entry, dest_path):
+    """Whether dest_path still has the size and mtime recorded in entry."""
+    try:
+        stat = os.stat(dest_path)
+    except OSError:
+        return False
+    return entry.get("dest_size") == stat.st_size and entry.get("dest_mtime_ns") == stat.st_mtime_ns
+
+
+def _remove_empty_parents(path, root):
+    """Remove the directories above path that are empty, stopping at root."""
+    stop = os.path.abspath(root)
+    directory = os.path.dirname(os.path.abspath(path))
+    while directory != stop and directory.startswith(stop + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            # Not empty, or already gone
+            return
+        directory = os.path.dirname(directory)
+
+
+class BuildManifest:
+    """
+    Record of the inputs and outputs of the previous build.
+
+    Each section ("pages", "static") maps a source path to its content hash,
+    size, mtime and output path, and the size and mtime the output had when
+    the manifest was saved. A build asks needs_build() for every source it
+    walks; sources that were not walked are stale and their outputs are
+    removed by remove_stale_outputs().
+    """
+
+    def __init__(self, path=MANIFEST_PATH, data=None):
+        self.path = path
+        data = data or {}
+        self.settings = data.get("settings", {})
+        self._previous = {section: data.get(section, {}) for section in SECTIONS}
+        self._current = {section: {} for section in SECTIONS}
+        self.built = {section: 0 for section in SECTIONS}
+        self.skipped = {section: 0 for section in SECTIONS}
+
+    @classmethod
+    def load(cls, path=MANIFEST_PATH):
+        """
+        Load a manifest from disk, or return an empty one.
+
+        A missing or unreadable manifest is treated as "nothing was built".
+
+        Args:
+            path: Path of the manifest file
+        """
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        return cls(path, data)
+
+    def start(self, **settings):
+        """
+        Begin a build with the given settings.
+
+        If any setting (template hash, basepath, generator version...)
+        differs from the previous build, every recorded entry is forgotten so
+        that all outputs are regenerated.
+
+        Returns:
+            True if the previous entries are still valid, False otherwise
+        """
+        if settings != self.settings:
+            self.settings = settings
+            self._previous = {
+                section: {src: dict(entry, hash=None) for src, entry in entries.items()}
+                for section, entries in self._previous.items()
+            }
+            return False
+        return True
+
+    def needs_build(self, section, src_path, dest_path, digest=None):
+        """
+        Record src_path as an input of this build and report whether
+        dest_path has to be regenerated.
+
+        The size and mtime are compared first so unchanged files are not
+        read; the content hash is only computed when they differ. An output
+        that is missing, or was rewritten since this manifest recorded it
+        (by a full build with other settings, say), is regenerated.
+
+        Args:
+            section: Manifest section, "pages" or "static"
+            src_path: Source file path
+            dest_path: Output file path
+            digest: Optional hash_file() digest of src_path already known
+                to the caller, used instead of reading the file
+        """
+        stat = os.stat(src_path)
+        entry = self._previous[section].get(src_path)
+
+        if (entry is not None and entry["hash"] is not None
+                and entry["dest"] == dest_path and _output_unchanged(entry, dest_path)):
+            if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                digest = entry["hash"]
+            elif digest is None:
+                digest = hash_file(src_path)
+            unchanged = digest == entry["hash"]
+        else:
+            if digest is None:
+                digest = hash_file(src_path)
+            unchanged = False
+
+        self._current[section][src_path] = {
+            "hash": digest,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "dest": dest_path,
+        }
+
+        if unchanged:
+            self.skipped[section] += 1
+        else:
+            self.built[section] += 1
+        return not unchanged
+
+    def remove_stale_outputs(self, root=None):
+        """
+        Delete outputs whose sources were not seen during this build, then
+        the directories they leave empty.
+
+        Args:
+            root: Optional output directory; directories left empty are
+                removed up to, but not including, it
+
+        Returns:
+            List of removed output paths
+        """
+        live = {
+            entry["dest"]
+            for entries in self._current.values()
+            for entry in entries.values()
+        }
+        removed = []
+        for section in SECTIONS:
+            for src_path, entry in self._previous[section].items():
+                if src_path in self._current[section] or entry["dest"] in live:
+                    continue
+                if os.path.isfile(entry["dest"]):
+                    print(f"Removing stale output: {entry['dest']}")
+                    os.remove(entry["dest"])
+                    removed.append(entry["dest"])
+                    if root is not None:
+                        _remove_empty_parents(entry["dest"], root)
+        return removed
+
+    def save(self):
+        """Write the entries recorded during this build, and the state of their outputs, to disk."""
+        for entries in self._current.values():
+            for entry in entries.values():
+                try:
+                    stat = os.stat(entry["dest"])
+                except OSError:
+                    entry["dest_size"] = entry["dest_mtime_ns"] = None
+                else:
+                    entry["dest_size"] = stat.st_size
+                    entry["dest_mtime_ns"] = stat.st_mtime_ns
+
+        data = {"settings": self.settings}
+        data.update(self._current)
+
+        manifest_dir = os.path.dirname(self.path)
+        if manifest_dir:
+            os.makedirs(manifest_dir, exist_ok=True)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,186 @@
+import contextlib
+import mmap
+from markdown_blocks import CODE_FENCE, iter_blocks, title_from_line
+
+
+FENCE = CODE_FENCE.encode()
+
+# Blocks are decoded and parsed in chunks of at least this many bytes
+CHUNK_SIZE = 64 * 1024
+
+
+@contextlib.contextmanager
+def map_file(path):
+    """
+    Memory-map a file read-only.
+
+    Yields the mmap, or b"" for an empty file, which cannot be mapped.
+
+    Args:
+        path: File path
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b""
+            return
+        if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def decode_markdown(data):
+    """
+    Decode UTF-8 markdown bytes the way a text-mode read would, turning
+    "\r\n" and "\r" line endings into "\n".
+
+    Every reader of raw markdown bytes decodes through this, so they all
+    see the same text.
+    """
+    text = data.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _opens_fence(line):
+    stripped = line.strip()
+    return stripped.startswith(FENCE) and not (len(stripped) >= 2 * len(FENCE) and stripped.endswith(FENCE))
+
+
+def _next_blank_line(buffer, pos):
+    """Return the offset just past the first blank line at or after pos, or -1."""
+    end = buffer.find(b"\n\n", pos)
+    # A CRLF blank line only matters if it comes first; never search past the LF one
+    crlf_end = buffer.find(b"\n\r\n", pos, len(buffer) if end == -1 else end)
+    if crlf_end != -1:
+        return crlf_end + 3
+    return end if end == -1 else end + 2
+
+
+def _starts_block(buffer, line_start):
+    """Whether the line at line_start follows a blank line or starts the buffer."""
+    if line_start >= 2 and buffer[line_start - 2:line_start] == b"\n\n":
+        return True
+    if line_start >= 3 and buffer[line_start - 3:line_start] == b"\n\r\n":
+        return True
+    # Nothing or a single blank line before it
+    return line_start <= 2 and buffer[:line_start] in (b"", b"\n", b"\r\n")
+
+
+def _scan_fences(buffer, pos, end, in_fence):
+    """
+    Follow fenced code from pos to end, as iter_blocks does, looking only
+    at the lines that contain a fence marker.
+
+    Args:
+        buffer: bytes or mmap of UTF-8 markdown
+        pos: Start of a line that starts a block
+        end: End of the stretch to follow
+        in_fence: Whether pos is inside fenced code
+
+    Returns:
+        Whether end is inside fenced code
+    """
+    while True:
+        marker = buffer.find(FENCE, pos, end)
+        if marker == -1:
+            return in_fence
+        line_start = buffer.rfind(b"\n", pos, marker) + 1 or pos
+        line_end = buffer.find(b"\n", marker, end)
+        if line_end == -1:
+            line_end = end
+        line = buffer[line_start:line_end]
+
+        if in_fence:
+            if line.rstrip().endswith(FENCE):
+                in_fence = False
+        elif _starts_block(buffer, line_start) and _opens_fence(line):
+            in_fence = True
+
+        pos = line_end + 1
+
+
+def iter_block_chunks(buffer, chunk_size=CHUNK_SIZE):
+    """
+    Split a byte buffer into decoded chunks that end on block boundaries.
+
+    Boundaries are blank lines outside fenced code. Both are found by
+    searching the bytes, without walking the lines in between, and only
+    the chunks handed out are ever decoded. A chunk
+    holds whole blocks and is at least chunk_size bytes, unless it is the
+    last one.
+
+    Args:
+        buffer: bytes or mmap of UTF-8 markdown
+        chunk_size: Minimum chunk size in bytes (default: 64 KB)
+
+    Yields:
+        Chunks of markdown text
+    """
+    size = len(buffer)
+    start = scanned = 0
+    in_fence = False
+    search = chunk_size
+
+    while search < size:
+        cut = _next_blank_line(buffer, max(search - 1, scanned))
+        if cut == -1:
+            break
+
+        in_fence = _scan_fences(buffer, scanned, cut, in_fence)
+        scanned = cut
+
+        if in_fence:
+            search = cut
+            continue
+        yield decode_markdown(buffer[start:cut])
+        start = cut
+        search = cut + chunk_size
+
+    if start < size:
+        yield decode_markdown(buffer[start:size])
+
+
+def iter_mapped_blocks(buffer, chunk_size=CHUNK_SIZE):
+    """
+    Classify the blocks of a byte buffer, decoding one chunk at a time.
+
+    Yields the same (block type, block text) tuples as iter_blocks on the
+    decoded buffer.
+
+    Args:
+        buffer: bytes or mmap of UTF-8 markdown
+        chunk_size: Minimum chunk size in bytes (default: 64 KB)
+    """
+    for chunk in iter_block_chunks(buffer, chunk_size):
+        yield from iter_blocks(chunk)
+
+
+def extract_mapped_title(buffer):
+    """
+    Find the h1 title of a byte buffer without decoding it.
+
+    Only lines starting with "# " are looked at, and the scan stops at the
+    first title.
+
+    Args:
+        buffer: bytes or mmap of UTF-8 markdown
+
+    Raises:
+        Exception: If no h1 header is found
+    """
+    pos = buffer.find(b"# ")
+    while pos != -1:
+        if pos == 0 or buffer[pos - 1:pos] in (b"\n", b"\r"):
+            end = buffer.find(b"\n", pos)
+            title = title_from_line(decode_markdown(buffer[pos:end if end != -1 else len(buffer)]).split("\n", 1)[0])
+            if title is not None:
+                return title
+        pos = buffer.find(b"# ", pos + 1)
+
+    raise Exception("No h1 header found in markdown")
@@ -1,117 +1,221 @@
 import re
+from enum import Enum
 from htmlnode import ParentNode, LeafNode, text_node_to_html_node
-from textnode import TextNode, TextType
-from inline_markdown import split_nodes_delimiter, extract_markdown_images, extract_markdown_links
+from inline_markdown import text_to_textnodes
 
 
-def markdown_to_blocks(markdown):
-    """Split markdown text into blocks separated by blank lines."""
-    blocks = []
-    raw_blocks = markdown.split('\n\n')
+class BlockType(str, Enum):
+    # A str subclass, so block types still compare equal to their names
+    PARAGRAPH = "paragraph"
+    HEADING = "heading"
+    CODE = "code"
+    QUOTE = "quote"
+    UNORDERED_LIST = "unordered_list"
+    ORDERED_LIST = "ordered_list"
 
-    for block in raw_blocks:
-        # Strip whitespace from each block
-        block = block.strip()
-        # Only add non-empty blocks
-        if block:
-            blocks.append(block)
 
-    return blocks
+CODE_FENCE = "```"
 
+# Block syntax, compiled once at import
+_HEADING_PATTERN = re.compile(r"#{1,6} ")
+_ORDERED_ITEM_PATTERN = re.compile(r"\d+\. ")
+# An h1 line: exactly one # and a space, followed by something
+_TITLE_PATTERN = re.compile(r"# [^#]")
+_TITLE_LINE_PATTERN = re.compile(r"^# [^#\n].*", re.MULTILINE)
+# A line break followed by a line that does not continue the block type
+_NON_QUOTE_LINE = re.compile(r"\n(?!>)")
+_NON_UNORDERED_ITEM = re.compile(r"\n(?![*-] )")
 
-def block_to_block_type(block):
-    """Determine the type of a markdown block."""
-    # Check for heading (# to ######)
-    if re.match(r'^#{1,6} ', block):
-        return "heading"
 
-    # Check for code block
-    if block.startswith("```") and block.endswith("```"):
-        return "code"
+def _iter_lines(text):
+    """Yield the lines of a string without building a list of them."""
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
 
-    # Check for quote block (every line starts with >)
-    lines = block.split('\n')
-    if all(line.startswith('>') for line in lines):
-        return "quote"
 
-    # Check for unordered list (every line starts with * or -)
-    if all(line.startswith('* ') or line.startswith('- ') for line in lines):
-        return "unordered_list"
+def _opens_code_fence(line):
+    """Whether a line starting a block opens a fence that later lines close."""
+    stripped = line.strip()
+    return (stripped.startswith(CODE_FENCE)
+            and not (len(stripped) >= 2 * len(CODE_FENCE) and stripped.endswith(CODE_FENCE)))
 
-    # Check for ordered list (every line starts with number. )
-    if all(re.match(r'^\d+\. ', line) for line in lines):
-        return "ordered_list"
 
-    # Default to paragraph
-    return "paragraph"
+def _finish_block(lines):
+    """Join a block's lines and classify it; None for whitespace-only blocks."""
+    block = "\n".join(lines).strip()
+    if not block:
+        return None
+    return block_to_block_type(block), block
+
+
+def _split_block_lines(lines):
+    """
+    Group lines into blocks; the one block scanner behind iter_blocks and
+    iter_block_spans.
 
+    Args:
+        lines: Iterable of lines, each with or without its trailing newline
 
-def split_nodes_image(old_nodes):
-    """Split TextNodes on image markdown syntax."""
-    new_nodes = []
+    Yields:
+        (start, end, lines) of each block, where start and end locate it in
+        the lines joined with newlines; the lines may be whitespace only
+    """
+    block_lines = []
+    block_start = block_end = 0
+    in_fence = False
+    pos = 0
 
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        line_start = pos
+        pos += len(line) + 1
+
+        if in_fence:
+            block_lines.append(line)
+            block_end = pos - 1
+            if line.rstrip().endswith(CODE_FENCE):
+                in_fence = False
             continue
 
-        images = extract_markdown_images(node.text)
-        if not images:
-            new_nodes.append(node)
+        if not line:
+            if block_lines:
+                yield block_start, block_end, block_lines
+                block_lines = []
             continue
 
-        text = node.text
-        for alt, url in images:
-            parts = text.split(f"![{alt}]({url})", 1)
-            if parts[0]:
-                new_nodes.append(TextNode(parts[0], TextType.TEXT))
-            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-            text = parts[1]
+        if not block_lines:
+            block_start = line_start
+            in_fence = _opens_code_fence(line)
+        block_lines.append(line)
+        block_end = pos - 1
+
+    if in_fence:
+        # Unclosed fence: fall back to plain blank-line splitting
+        chunk = []
+        pos = block_start
+        for line in block_lines + [""]:
+            if line:
+                if not chunk:
+                    chunk_start = pos
+                chunk.append(line)
+            elif chunk:
+                yield chunk_start, pos - 1, chunk
+                chunk = []
+            pos += len(line) + 1
+    elif block_lines:
+        yield block_start, block_end, block_lines
+
+
+def iter_blocks(markdown):
+    """
+    Split markdown into blocks and classify them in a single pass.
 
-        if text:
-            new_nodes.append(TextNode(text, TextType.TEXT))
+    Blocks are separated by empty lines, except inside a fenced code block,
+    which runs until a line ending with the closing fence even if it
+    contains blank lines. A fence that is never closed does not swallow the
+    rest of the document; its lines are split on blank lines as usual.
 
-    return new_nodes
+    A string is split by iter_block_spans; an iterable of lines, such as
+    an open file, is never held in memory whole.
 
+    Args:
+        markdown: Markdown text, or an iterable of lines such as an open file
 
-def split_nodes_link(old_nodes):
-    """Split TextNodes on link markdown syntax."""
-    new_nodes = []
+    Yields:
+        (block type, block text) tuples, with the block text stripped
+    """
+    if isinstance(markdown, str):
+        for block_type, start, end in iter_block_spans(markdown):
+            yield block_type, markdown[start:end]
+        return
+    for _, _, lines in _split_block_lines(markdown):
+        block = _finish_block(lines)
+        if block is not None:
+            yield block
 
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-            continue
 
-        links = extract_markdown_links(node.text)
-        if not links:
-            new_nodes.append(node)
-            continue
+def iter_block_spans(markdown):
+    """
+    Split a markdown string into blocks like iter_blocks, reporting where
+    each block is instead of copying it.
+
+    Args:
+        markdown: Markdown text
+
+    Yields:
+        (block type, start, end) tuples, where markdown[start:end] is the
+        stripped block text iter_blocks yields
+    """
+    for start, end, _ in _split_block_lines(_iter_lines(markdown)):
+        block = markdown[start:end]
+        stripped = block.strip()
+        if stripped:
+            # The first character of stripped is the block's first non-space
+            start += block.find(stripped[0])
+            yield block_to_block_type(stripped), start, start + len(stripped)
+
+
+def markdown_to_blocks(markdown):
+    """Split markdown text into blocks separated by blank lines."""
+    return [block for _, block in iter_blocks(markdown)]
 
-        text = node.text
-        for anchor, url in links:
-            parts = text.split(f"[{anchor}]({url})", 1)
-            if parts[0]:
-                new_nodes.append(TextNode(parts[0], TextType.TEXT))
-            new_nodes.append(TextNode(anchor, TextType.LINK, url))
-            text = parts[1]
 
-        if text:
-            new_nodes.append(TextNode(text, TextType.TEXT))
+def _numbered_in_order(block):
+    """Whether every line of block starts with its 1-based number and ". "."""
+    if "\n" not in block:
+        return block.startswith("1. ")
+    for number, line in enumerate(block.split("\n"), 1):
+        if not line.startswith(f"{number}. "):
+            return False
+    return True
 
-    return new_nodes
 
+def block_to_block_type(block):
+    """Determine the type of a markdown block."""
+    if _BLOCK_MATCHERS:
+        for block_type, matcher in _BLOCK_MATCHERS:
+            if matcher(block):
+                return block_type
 
-def text_to_textnodes(text):
-    """Convert text with inline markdown to a list of TextNodes."""
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
+    if not block:
+        return BlockType.PARAGRAPH
+
+    # The first character rules out all but one block type
+    first = block[0]
+
+    # Check for heading (# to ######)
+    if first == "#":
+        return BlockType.HEADING if _HEADING_PATTERN.match(block) else BlockType.PARAGRAPH
+
+    # Check for code block
+    if first == "`":
+        if block.startswith(CODE_FENCE) and block.endswith(CODE_FENCE):
+            return BlockType.CODE
+        return BlockType.PARAGRAPH
+
+    # Check for quote block (every line starts with >)
+    if first == ">":
+        return BlockType.PARAGRAPH if _NON_QUOTE_LINE.search(block) else BlockType.QUOTE
+
+    # Check for unordered list (every line starts with * or -)
+    if first == "*" or first == "-":
+        if block[1:2] == " " and not _NON_UNORDERED_ITEM.search(block):
+            return BlockType.UNORDERED_LIST
+        return BlockType.PARAGRAPH
+
+    # Check for ordered list (lines numbered 1. 2. 3. ... in order)
+    if first == "1":
+        return BlockType.ORDERED_LIST if _numbered_in_order(block) else BlockType.PARAGRAPH
+
+    # Default to paragraph
+    return BlockType.PARAGRAPH
 
 
 def text_to_children(text):
@@ -179,7 +283,8 @@ def ordered_list_to_html_node(block):
 
     for line in lines:
         # Remove the number and ". "
-        text = re.sub(r'^\d+\. ', '', line)
+        match = _ORDERED_ITEM_PATTERN.match(line)
+        text = line[match.end():] if match else line
         children = text_to_children(text)
         list_items.append(ParentNode("li", children))
 
@@ -194,35 +299,76 @@ def paragraph_to_html_node(block):
     return ParentNode("p", children)
 
 
+# BlockType -> function converting a block of that type to an HTMLNode
+BLOCK_CONVERTERS = {
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+    BlockType.UNORDERED_LIST: unordered_list_to_html_node,
+    BlockType.ORDERED_LIST: ordered_list_to_html_node,
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+}
+
+# The built-in converters, to tell plugin converters from them
+_BUILTIN_CONVERTERS = dict(BLOCK_CONVERTERS)
+
+# (block type, matcher) pairs of plugin block types, tried before the built-in ones
+_BLOCK_MATCHERS = []
+
+
+def has_block_plugins():
+    """Whether register_block_type added a block type or replaced a converter."""
+    return bool(_BLOCK_MATCHERS) or BLOCK_CONVERTERS != _BUILTIN_CONVERTERS
+
+
+def register_block_type(block_type, converter, matcher=None):
+    """
+    Register how a type of block is converted to HTML.
+
+    Registering a built-in BlockType replaces its converter. A new block
+    type needs a matcher, and blocks it accepts are given that type before
+    the built-in types are considered; the most recently registered
+    matcher wins.
+
+    Args:
+        block_type: A BlockType, or the string name of a new block type
+        converter: Function taking the block text and returning an HTMLNode
+        matcher: Function taking the block text and returning whether the
+            block is of this type
+    """
+    if matcher is None and block_type not in BLOCK_CONVERTERS:
+        raise ValueError(f"New block type {block_type!r} needs a matcher")
+    BLOCK_CONVERTERS[block_type] = converter
+    if matcher is not None:
+        _BLOCK_MATCHERS[:] = [entry for entry in _BLOCK_MATCHERS if entry[0] != block_type]
+        _BLOCK_MATCHERS.insert(0, (block_type, matcher))
+
+
+def block_to_html_node(block_type, block):
+    """Convert a single classified block to an HTMLNode."""
+    converter = BLOCK_CONVERTERS.get(block_type)
+    if converter is None:
+        raise ValueError(f"Unknown block type: {block_type!r}")
+    return converter(block)
+
+
 def markdown_to_html_node(markdown):
     """Convert a full markdown document to an HTMLNode."""
-    blocks = markdown_to_blocks(markdown)
-    block_nodes = []
-
-    for block in blocks:
-        block_type = block_to_block_type(block)
-
-        if block_type == "heading":
-            block_nodes.append(heading_to_html_node(block))
-        elif block_type == "code":
-            block_nodes.append(code_to_html_node(block))
-        elif block_type == "quote":
-            block_nodes.append(quote_to_html_node(block))
-        elif block_type == "unordered_list":
-            block_nodes.append(unordered_list_to_html_node(block))
-        elif block_type == "ordered_list":
-            block_nodes.append(ordered_list_to_html_node(block))
-        else:  # paragraph
-            block_nodes.append(paragraph_to_html_node(block))
-
+    block_nodes = [
+        block_to_html_node(block_type, block)
+        for block_type, block in iter_blocks(markdown)
+    ]
     return ParentNode("div", block_nodes)
 
 
 def extract_title(markdown):
     """Extract the h1 header from a markdown document.
 
+    Scanning stops at the first h1, so an open file is only read up to it.
+
     Args:
-        markdown: Markdown text containing an h1 header
+        markdown: Markdown text containing an h1 header, or an iterable of
+            lines such as an open file
 
     Returns:
         The title text (without the # and whitespace)
@@ -230,12 +376,26 @@ def extract_title(markdown):
     Raises:
         Exception: If no h1 header is found
     """
-    lines = markdown.split('\n')
-
-    for line in lines:
-        # Check if line starts with exactly one #
-        if re.match(r'^# [^#]', line):
-            # Remove the # and strip whitespace
-            return line[1:].strip()
+    if isinstance(markdown, str):
+        # One search over the whole text instead of a match per line
+        match = _TITLE_LINE_PATTERN.search(markdown)
+        if match:
+            return match.group()[1:].strip()
+    else:
+        for line in markdown:
+            if line.endswith("\n"):
+                line = line[:-1]
+            title = title_from_line(line)
+            if title is not None:
+                return title
 
     raise Exception("No h1 header found in markdown")
+
+
+def title_from_line(line):
+    """Return the title of an h1 line, or None for any other line."""
+    # Check if line starts with exactly one #
+    if _TITLE_PATTERN.match(line):
+        # Remove the # and strip whitespace
+        return line[1:].strip()
+    return None
@@ -0,0 +1,138 @@
+import os
+import threading
+
+
+# Output is compared and written in chunks of about this many bytes
+BUFFER_SIZE = 64 * 1024
+
+# Encoding of output files
+ENCODING = "utf-8"
+
+
+def make_dirs(paths, known):
+    """
+    Create the parent directories of output paths, once each.
+
+    Args:
+        paths: Output file paths
+        known: Set of directories already created, updated in place
+    """
+    dirs = {os.path.dirname(path) for path in paths} - known
+    # Parents sort before their children, so makedirs finds them created
+    for directory in sorted(dirs):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        known.add(directory)
+
+
+class AtomicOutput:
+    """
+    Output file that replaces its destination atomically, and only if the
+    contents changed.
+
+    Writes are buffered and compared with the existing file as they come,
+    without hashing: a page whose size differs from the destination's is
+    known to have changed without reading it. Identical output leaves the
+    destination and its mtime alone and never touches the disk otherwise.
+    From the first difference on, the output goes to a temporary file next
+    to the destination, starting with the prefix that matched, and on a
+    clean close it is moved over the destination with os.replace, so
+    readers never see a half-written page. On an error the destination is
+    left as it was. About BUFFER_SIZE bytes are held at once, so
+    streamed pages stay streamed.
+    """
+
+    def __init__(self, dest_path, counters=None):
+        """
+        Args:
+            dest_path: Destination file path
+            counters: Optional Counter incremented with "output_written" or
+                "output_unchanged" for every file closed
+        """
+        self.dest_path = dest_path
+        self.counters = counters
+        directory, name = os.path.split(dest_path)
+        # Unique per process and thread, so concurrent builds never share one
+        self.tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self._dest_size = os.stat(dest_path).st_size
+        except OSError:
+            self._dest_size = -1
+        self._buffer = bytearray()
+        # Bytes written so far that equal the start of the destination
+        self._matched = 0
+        self._dest = None
+        self._file = None
+
+    def write(self, text):
+        self._buffer += text.encode(ENCODING)
+        if len(self._buffer) >= BUFFER_SIZE:
+            self._flush()
+        return len(text)
+
+    def _flush(self, final=False):
+        data = self._buffer
+        self._buffer = bytearray()
+        if self._file is None:
+            size = self._matched + len(data)
+            if (size == self._dest_size if final else size <= self._dest_size) and self._dest_continues(data):
+                self._matched = size
+                return
+            self._start_temp()
+        self._file.write(data)
+
+    def _dest_continues(self, data):
+        """Whether the destination's next bytes are data."""
+        if self._dest is None:
+            try:
+                self._dest = open(self.dest_path, 'rb')
+            except OSError:
+                return False
+        return self._dest.read(len(data)) == data
+
+    def _start_temp(self):
+        """Open the temporary file, copying the prefix that matched into it."""
+        try:
+            self._file = open(self.tmp_path, 'wb')
+        except FileNotFoundError:
+            # The directory was deleted since it was created
+            os.makedirs(os.path.dirname(self.tmp_path), exist_ok=True)
+            self._file = open(self.tmp_path, 'wb')
+        if self._matched:
+            self._dest.seek(0)
+            remaining = self._matched
+            while remaining:
+                chunk = self._dest.read(min(remaining, BUFFER_SIZE))
+                self._file.write(chunk)
+                remaining -= len(chunk)
+        self._close_dest()
+
+    def _close_dest(self):
+        if self._dest is not None:
+            self._dest.close()
+            self._dest = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._flush(final=True)
+        finally:
+            self._close_dest()
+            if self._file is not None:
+                self._file.close()
+        if exc_type is not None:
+            if self._file is not None:
+                os.remove(self.tmp_path)
+            return False
+
+        if self._file is None:
+            outcome = "output_unchanged"
+        else:
+            os.replace(self.tmp_path, self.dest_path)
+            outcome = "output_written"
+        if self.counters is not None:
+            self.counters[outcome] += 1
+        return False
@@ -0,0 +1,307 @@
+import io
+import os
+from collections import Counter
+from htmlnode import LeafNode
+from mapped_source import decode_markdown, extract_mapped_title, iter_mapped_blocks, map_file
+from markdown_blocks import (
+    block_to_html_node, extract_title, has_block_plugins, iter_blocks, markdown_to_html_node,
+)
+from output_writer import AtomicOutput, make_dirs
+from parse_cache import BASEPATH_PLACEHOLDER
+from render_cache import BlockCache, cached_markdown_to_html_node
+from template import rebase_urls
+
+
+class StreamedContent:
+    """
+    Page content that is converted one block at a time while it is written.
+
+    Only the block being converted is in memory, never the tree of the
+    whole document.
+    """
+
+    def __init__(self, blocks, convert_block):
+        """
+        Args:
+            blocks: Iterable of (block type, block text) tuples
+            convert_block: Function turning a block into an HTMLNode
+        """
+        self.blocks = blocks
+        self.convert_block = convert_block
+
+    def write_html(self, out):
+        """Convert the blocks and stream their HTML to out, wrapped in a div."""
+        out.write("<div>")
+        for block_type, block in self.blocks:
+            self.convert_block(block_type, block).write_html(out)
+        out.write("</div>")
+
+
+class PageRenderer:
+    """
+    Turns markdown files into pages with a compiled template and the
+    optional caches of the build.
+
+    A renderer is pickled once into each worker process. The in-memory
+    block cache is not pickled; every process starts its own.
+    """
+
+    def __init__(self, template, block_cache_bytes=0, parse_cache=None, streaming=False, mmap_min_bytes=0,
+                 titles=None):
+        """
+        Args:
+            template: Compiled Template, carrying the basepath
+            block_cache_bytes: Memory cap of the BlockCache of rendered
+                blocks; 0 disables it (default: 0)
+            parse_cache: Optional ParseCache of rendered page content
+            streaming: Read markdown files line by line and write each
+                block as soon as it is converted, keeping memory bounded
+                by the largest block; ignored with a parse cache, which
+                needs the whole file to look it up (default: False)
+            mmap_min_bytes: Files at least this large are memory-mapped and
+                streamed, decoding one chunk of blocks at a time; 0 disables
+                it. Also ignored with a parse cache (default: 0)
+            titles: Optional {markdown path: title} of pages whose titles
+                are already known, such as from a SiteIndex; other pages
+                are scanned for their h1
+        """
+        self.template = template
+        self.block_cache_bytes = block_cache_bytes
+        self.parse_cache = parse_cache
+        self.streaming = streaming
+        self.mmap_min_bytes = mmap_min_bytes
+        self.titles = titles or {}
+        self.counters = Counter()
+        self.output_dirs = set()
+        self._start_block_cache()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["block_cache"] = None
+        state["counters"] = Counter()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._start_block_cache()
+
+    def _start_block_cache(self):
+        # Cached page content is basepath-independent, so blocks inside it
+        # must be too
+        basepath = BASEPATH_PLACEHOLDER if self.parse_cache is not None else self.template.basepath
+        self.block_cache = BlockCache(self.block_cache_bytes, basepath) if self.block_cache_bytes else None
+
+    def stats(self):
+        """Return a Counter of cache hits and misses so far."""
+        stats = Counter(self.counters)
+        if self.block_cache is not None:
+            stats["block_hits"], stats["block_misses"] = self.block_cache.stats()
+        return stats
+
+    def _content_node(self, markdown_content, basepath):
+        if self.block_cache is not None:
+            return cached_markdown_to_html_node(markdown_content, self.block_cache)
+        return rebase_urls(markdown_to_html_node(markdown_content), basepath)
+
+    def _convert_block(self, block_type, block):
+        """Convert one block to an HTMLNode pointing at the basepath."""
+        if self.block_cache is not None:
+            return LeafNode(None, self.block_cache.render_block(block_type, block))
+        return rebase_urls(block_to_html_node(block_type, block), self.template.basepath)
+
+    def _stream_page(self, from_path, dest_path, title=None):
+        """Convert a markdown file block by block into its output file."""
+        with open(from_path, 'r') as f:
+            if title is None:
+                # Find the title first, then start over for the content
+                title = extract_title(f)
+                f.seek(0)
+            content = StreamedContent(iter_blocks(f), self._convert_block)
+            with self._open_output(dest_path) as out:
+                self.template.write(out, title, content)
+
+    def _stream_mapped_page(self, from_path, dest_path, title=None):
+        """Convert a memory-mapped markdown file chunk by chunk into its output file."""
+        with map_file(from_path) as buffer:
+            if title is None:
+                title = extract_mapped_title(buffer)
+            content = StreamedContent(iter_mapped_blocks(buffer), self._convert_block)
+            with self._open_output(dest_path) as out:
+                self.template.write(out, title, content)
+
+    def write_page(self, out, markdown_content, title=None):
+        """
+        Render markdown into a complete HTML page, streaming it to out.
+
+        Args:
+            out: Object with a write() method, such as an open file
+            markdown_content: Markdown source of the page
+            title: The page's title, if known; otherwise its h1
+        """
+        # Convert markdown to HTML, pointing root-relative URLs at the basepath
+        html_node = self._content_node(markdown_content, self.template.basepath)
+
+        # Extract title from markdown
+        if title is None:
+            title = extract_title(markdown_content)
+
+        self.template.write(out, title, html_node)
+
+    def render_page(self, markdown_content):
+        """
+        Render markdown into a complete HTML page.
+
+        Args:
+            markdown_content: Markdown source of the page
+
+        Returns:
+            The final HTML document
+        """
+        out = io.StringIO()
+        self.write_page(out, markdown_content)
+        return out.getvalue()
+
+    def _write_cached_page(self, out, data, title=None):
+        """
+        Write a page through the parse cache, parsing only on a miss.
+
+        While block plugins are registered the cache is bypassed, since
+        their converters are not part of the cache key.
+        """
+        if has_block_plugins():
+            self._write_uncached_page(out, decode_markdown(data), title)
+            return
+
+        key = self.parse_cache.key(data)
+        entry = self.parse_cache.get(key)
+
+        if entry is None:
+            self.counters["parse_misses"] += 1
+            markdown_content = decode_markdown(data)
+            if BASEPATH_PLACEHOLDER in markdown_content:
+                # Its own NULs would be taken for the basepath
+                self._write_uncached_page(out, markdown_content, title)
+                return
+            if title is None:
+                title = extract_title(markdown_content)
+            html_content = self._content_node(markdown_content, BASEPATH_PLACEHOLDER).to_html()
+            self.parse_cache.put(key, title, html_content)
+        else:
+            self.counters["parse_hits"] += 1
+            title, html_content = entry
+
+        html_content = html_content.replace(BASEPATH_PLACEHOLDER, self.template.basepath)
+        self.template.write(out, title, html_content)
+
+    def _write_uncached_page(self, out, markdown_content, title=None):
+        """
+        Write a page with the real basepath, outside the parse cache and
+        the block cache, which both hold HTML with the placeholder.
+        """
+        if title is None:
+            title = extract_title(markdown_content)
+        html_content = rebase_urls(markdown_to_html_node(markdown_content), self.template.basepath).to_html()
+        self.template.write(out, title, html_content)
+
+    def _read_source(self, from_path):
+        """Read a markdown file, as bytes when the parse cache hashes them."""
+        if self.parse_cache is not None:
+            with open(from_path, 'rb') as f:
+                return f.read()
+        with open(from_path, 'r') as f:
+            return f.read()
+
+    def prepare_outputs(self, dest_paths):
+        """Create the directories of all output files up front, each once."""
+        make_dirs(dest_paths, self.output_dirs)
+
+    def _open_output(self, dest_path, counters=None):
+        """
+        Open an output file for writing, creating its directory.
+
+        Written and unchanged outputs are counted in counters, or in the
+        renderer's own counters by default.
+        """
+        if counters is None:
+            counters = self.counters
+        make_dirs((dest_path,), self.output_dirs)
+        return AtomicOutput(dest_path, counters)
+
+    def render_source(self, source, title=None):
+        """
+        Render a source read with _read_source into a complete HTML page.
+
+        Args:
+            source: Markdown read with _read_source
+            title: The page's title, if known; see title_of()
+
+        Returns:
+            The final HTML document
+        """
+        out = io.StringIO()
+        if self.parse_cache is not None:
+            self._write_cached_page(out, source, title)
+        else:
+            self.write_page(out, source, title)
+        return out.getvalue()
+
+    def write_output(self, dest_path, html):
+        """
+        Write a rendered page to its output file.
+
+        Safe to call from several threads at once: the counts of written
+        and unchanged outputs are returned instead of added to the
+        renderer's counters.
+
+        Returns:
+            Counter of output_written / output_unchanged
+        """
+        counters = Counter()
+        with self._open_output(dest_path, counters) as out:
+            out.write(html)
+        return counters
+
+    def title_of(self, from_path):
+        """Return the known title of a markdown file, or None."""
+        return self.titles.get(from_path)
+
+    def generate(self, from_path, dest_path):
+        """
+        Render a markdown file straight into its output file.
+
+        Args:
+            from_path: Path to markdown file
+            dest_path: Path to write the generated HTML file
+        """
+        title = self.title_of(from_path)
+        if self.parse_cache is None:
+            if self.mmap_min_bytes and os.path.getsize(from_path) >= self.mmap_min_bytes:
+                self._stream_mapped_page(from_path, dest_path, title)
+                return
+            if self.streaming:
+                self._stream_page(from_path, dest_path, title)
+                return
+
+        # Read markdown file
+        source = self._read_source(from_path)
+
+        # Write the generated HTML
+        with self._open_output(dest_path) as f:
+            if self.parse_cache is not None:
+                self._write_cached_page(f, source, title)
+            else:
+                self.write_page(f, source, title)
+
+
+def format_stats(stats):
+    """Describe the cache and output counters of a build, one line each."""
+    lines = []
+    for name, label in (("block", "Block cache"), ("parse", "Parse cache")):
+        hits, misses = stats[f"{name}_hits"], stats[f"{name}_misses"]
+        lookups = hits + misses
+        if lookups:
+            lines.append(f"{label}: {hits} hits, {misses} misses ({hits / lookups:.0%} hit rate)")
+    if stats["output_unchanged"]:
+        lines.append(f"Output: {stats['output_written']} pages written, "
+                     f"{stats['output_unchanged']} unchanged and left in place")
+    return lines
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import time
+
+
+PARSE_CACHE_DIR = os.path.join(".ssg-cache", "pages")
+
+# Modules whose code determines the HTML produced for a markdown file:
+# the parser, the block cache that may render it, the URL rebasing and
+# the renderer that decodes pages and fills the cache. Block types
+# registered at runtime are not covered; PageRenderer bypasses the cache
+# while any are
+PARSER_MODULES = ("markdown_blocks.py", "inline_markdown.py", "htmlnode.py", "textnode.py",
+                  "render_cache.py", "template.py", "page_renderer.py")
+
+# Bump when the layout of cache entries changes
+CACHE_FORMAT = "1"
+
+# Stands in for the basepath in cached HTML. A NUL is valid UTF-8 and so
+# can occur in markdown, where it passes through to the HTML unescaped;
+# pages containing one are rendered without the cache, see
+# PageRenderer._write_cached_page
+BASEPATH_PLACEHOLDER = "\x00"
+
+
+def parser_version():
+    """
+    Return a fingerprint of the markdown parser's source code.
+
+    Editing any of PARSER_MODULES changes the fingerprint and therefore
+    every cache key, so stale entries are never served.
+    """
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256(CACHE_FORMAT.encode())
+    for name in PARSER_MODULES:
+        with open(os.path.join(src_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Content-addressed cache of rendered page content.
+
+    Entries hold the title and body HTML of a markdown file, keyed by a hash
+    of the parser version and the file's bytes. The HTML is stored with
+    BASEPATH_PLACEHOLDER in place of the basepath, so template and basepath
+    changes only re-run templating. Entries are plain files under
+    directory, so worker processes can share the cache.
+    """
+
+    def __init__(self, directory=PARSE_CACHE_DIR, version=None):
+        self.directory = directory
+        self.version = version or parser_version()
+
+    def key(self, data):
+        """
+        Return the cache key of a markdown file.
+
+        Args:
+            data: Raw bytes of the markdown file
+        """
+        digest = hashlib.sha256(self.version.encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + ".html")
+
+    def get(self, key):
+        """
+        Look up a cache entry.
+
+        Returns:
+            (title, html) tuple, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding="utf-8", newline="") as f:
+                entry = f.read()
+        except OSError:
+            return None
+
+        # Refresh the mtime so age-based eviction keeps entries in use
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        title, _, html = entry.partition("\n")
+        return title, html
+
+    def put(self, key, title, html):
+        """
+        Store the title and body HTML for a key.
+
+        The entry is written to a temporary file first, so concurrent
+        readers never see a partial entry.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding="utf-8", newline="") as f:
+            f.write(title)
+            f.write("\n")
+            f.write(html)
+        os.replace(tmp_path, path)
+
+    def prune(self, max_bytes=None, max_age=None):
+        """
+        Evict entries by age, then by total size.
+
+        Args:
+            max_bytes: Keep at most this many bytes, dropping the least
+                recently used entries first (default: no limit)
+            max_age: Drop entries unused for this many seconds
+                (default: no limit)
+
+        Returns:
+            (number of entries removed, bytes freed) tuple
+        """
+        entries = []
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        removed = freed = 0
+
+        for mtime, size, path in entries:
+            too_old = max_age is not None and now - mtime > max_age
+            too_big = max_bytes is not None and total > max_bytes
+            if not (too_old or too_big):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            freed += size
+
+        return removed, freed
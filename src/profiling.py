@@ -0,0 +1,401 @@
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+
+# Stages in pipeline order; time inside a page not covered by any of them
+# (building HTMLNodes from text nodes, mostly) is reported as "other"
+STAGES = (
+    "walk",
+    "index",
+    "read",
+    "block_split",
+    "block_classify",
+    "inline_parse",
+    "to_html",
+    "template",
+    "write",
+    "static_copy",
+    "other",
+)
+
+# Where main.py --profile writes its reports
+PROFILE_DIR = os.path.join(".ssg-cache", "profile")
+
+# Chrome trace events kept per process; aggregates are always complete
+MAX_TRACE_EVENTS = 200000
+
+# The installed Profiler, if any
+_current = None
+
+
+def current():
+    """Return the installed Profiler, or None when profiling is off."""
+    return _current
+
+
+def stage(name):
+    """
+    Time a block of code as a stage of the installed Profiler.
+
+    Costs one global lookup when profiling is off, so it is meant for
+    build-level steps; per-page hot paths are wrapped by Profiler.install().
+
+    Args:
+        name: Stage name, one of STAGES
+    """
+    if _current is None:
+        return contextlib.nullcontext()
+    return _current.stage(name)
+
+
+def page(from_path):
+    """
+    Time a block of code as work on one page of the installed Profiler.
+
+    For callers that generate a page in several steps, such as
+    AsyncPipeline; the steps of a page add up to one entry.
+
+    Args:
+        from_path: Markdown path of the page
+    """
+    if _current is None:
+        return contextlib.nullcontext()
+    return _current.page(from_path)
+
+
+def start_worker():
+    """
+    Profile a page worker process.
+
+    A forked worker inherits the parent's installed Profiler, which only
+    needs its copied data cleared; a spawned one installs a new one.
+    """
+    if _current is not None:
+        _current.reset()
+    else:
+        Profiler().install()
+
+
+def _empty_stages():
+    return {name: [0, 0] for name in STAGES}
+
+
+def _ms(ns):
+    return round(ns / 1e6, 3)
+
+
+class Profiler:
+    """
+    Wall and CPU time per pipeline stage, per page and for the whole site.
+
+    Nested stages are accounted exclusively: time spent in inline parsing
+    during a block split is not also counted as block splitting. Every
+    timed call is also kept as a Chrome trace event.
+    """
+
+    def __init__(self):
+        self._patches = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop all recorded timings."""
+        self.stages = _empty_stages()
+        self.pages = []
+        self.events = []
+        # Page entries by markdown path, for adding up steps of one page
+        self._pages_by_path = {}
+
+    def _page_entry(self, from_path):
+        # Called with the lock held
+        page = self._pages_by_path.get(from_path)
+        if page is None:
+            page = {"page": from_path, "wall": 0, "cpu": 0, "stages": _empty_stages()}
+            self._pages_by_path[from_path] = page
+            self.pages.append(page)
+        return page
+
+    def _frames(self):
+        frames = getattr(self._local, "frames", None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def _push(self, name):
+        # [stage, wall start, cpu start, child wall, child cpu]
+        self._frames().append([name, time.perf_counter_ns(), time.process_time_ns(), 0, 0])
+
+    def _pop(self, label=None, args=None):
+        wall_end = time.perf_counter_ns()
+        cpu_end = time.process_time_ns()
+        frames = self._frames()
+        name, wall_start, cpu_start, child_wall, child_cpu = frames.pop()
+        wall = wall_end - wall_start
+        cpu = cpu_end - cpu_start
+
+        if frames:
+            frames[-1][3] += wall
+            frames[-1][4] += cpu
+        page = getattr(self._local, "page", None)
+        with self._lock:
+            totals = self.stages[name]
+            totals[0] += wall - child_wall
+            totals[1] += cpu - child_cpu
+            if page is not None:
+                page_totals = page["stages"][name]
+                page_totals[0] += wall - child_wall
+                page_totals[1] += cpu - child_cpu
+            if len(self.events) < MAX_TRACE_EVENTS:
+                self.events.append({
+                    "name": label or name, "ph": "X", "ts": wall_start / 1000, "dur": wall / 1000,
+                    "pid": os.getpid(), "tid": threading.get_ident(), "args": args or {},
+                })
+        return wall, cpu
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage name."""
+        self._push(name)
+        try:
+            yield
+        finally:
+            self._pop()
+
+    @contextlib.contextmanager
+    def page(self, from_path):
+        """Time the enclosed block as work on page from_path."""
+        with self._lock:
+            page = self._page_entry(from_path)
+        self._local.page = page
+        self._push("other")
+        try:
+            yield
+        finally:
+            wall, cpu = self._pop(from_path, {"stage": "page"})
+            self._local.page = None
+            with self._lock:
+                page["wall"] += wall
+                page["cpu"] += cpu
+
+    def _timed(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self._push(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._pop()
+        return wrapper
+
+    def _timed_generator(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            iterator = func(*args, **kwargs)
+            while True:
+                self._push(name)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self._pop()
+                yield item
+        return wrapper
+
+    def _timed_page(self, func):
+        @functools.wraps(func)
+        def wrapper(renderer, from_path, dest_path):
+            with self.page(from_path):
+                return func(renderer, from_path, dest_path)
+        return wrapper
+
+    def _timed_output(self, func):
+        profiler = self
+
+        class TimedFile:
+            """
+            Output file that collects the page and writes it on close, so
+            the write stage is timed once per page instead of per fragment.
+            """
+
+            def __init__(self, f):
+                self._file = f
+                self._chunks = []
+
+            def write(self, text):
+                self._chunks.append(text)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                profiler._push("write")
+                try:
+                    self._file.write("".join(self._chunks))
+                    return self._file.__exit__(*exc_info)
+                finally:
+                    profiler._pop()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self._push("write")
+            try:
+                return TimedFile(func(*args, **kwargs))
+            finally:
+                self._pop()
+        return wrapper
+
+    def _patch(self, owner, name, wrapper):
+        """Replace owner.name, and every module global bound to the same object."""
+        original = getattr(owner, name)
+        targets = [owner]
+        if not isinstance(owner, type):
+            # Modules that imported the function by name hold their own reference
+            targets = [module for module in list(sys.modules.values())
+                       if getattr(module, name, None) is original]
+        wrapped = wrapper(original)
+        for target in targets:
+            self._patches.append((target, name, original))
+            setattr(target, name, wrapped)
+
+    def install(self):
+        """
+        Start profiling by wrapping the pipeline's functions.
+
+        Nothing is wrapped until this is called, so builds without a
+        profiler run the original functions.
+
+        Returns:
+            self
+        """
+        global _current
+        import htmlnode
+        import inline_markdown
+        import markdown_blocks
+        import page_renderer
+        import template
+
+        self._patch(page_renderer.PageRenderer, "generate", self._timed_page)
+        self._patch(page_renderer.PageRenderer, "_read_source", functools.partial(self._timed, "read"))
+        self._patch(page_renderer.PageRenderer, "_open_output", self._timed_output)
+        self._patch(markdown_blocks, "iter_blocks", functools.partial(self._timed_generator, "block_split"))
+        self._patch(markdown_blocks, "block_to_block_type", functools.partial(self._timed, "block_classify"))
+        self._patch(inline_markdown, "text_to_textnodes", functools.partial(self._timed, "inline_parse"))
+        self._patch(htmlnode.HTMLNode, "write_html", functools.partial(self._timed, "to_html"))
+        self._patch(htmlnode.ParentNode, "to_html", functools.partial(self._timed, "to_html"))
+        self._patch(template.Template, "write", functools.partial(self._timed, "template"))
+        _current = self
+        return self
+
+    def uninstall(self):
+        """Restore the original functions."""
+        global _current
+        for target, name, original in reversed(self._patches):
+            setattr(target, name, original)
+        self._patches = []
+        if _current is self:
+            _current = None
+
+    def drain(self):
+        """
+        Return the timings recorded so far and reset them, for shipping
+        from a worker process to the parent with merge().
+        """
+        data = {"stages": self.stages, "pages": self.pages, "events": self.events}
+        self.reset()
+        return data
+
+    def merge(self, data):
+        """Add timings drained from another process."""
+        with self._lock:
+            for name, (wall, cpu) in data["stages"].items():
+                self.stages[name][0] += wall
+                self.stages[name][1] += cpu
+            for part in data["pages"]:
+                page = self._page_entry(part["page"])
+                page["wall"] += part["wall"]
+                page["cpu"] += part["cpu"]
+                for name, (wall, cpu) in part["stages"].items():
+                    page["stages"][name][0] += wall
+                    page["stages"][name][1] += cpu
+            room = MAX_TRACE_EVENTS - len(self.events)
+            self.events.extend(data["events"][:max(0, room)])
+
+    def slowest_pages(self, count=10):
+        """Return the count pages with the most wall time, slowest first."""
+        return sorted(self.pages, key=lambda page: page["wall"], reverse=True)[:count]
+
+    def report(self, top=10):
+        """
+        Summarize the profile for the terminal.
+
+        Args:
+            top: Number of slowest pages to list (default: 10)
+
+        Returns:
+            List of report lines
+        """
+        total_wall = sum(wall for wall, _ in self.stages.values())
+        total_cpu = sum(cpu for _, cpu in self.stages.values())
+        lines = [
+            f"Profile: {len(self.pages)} pages, {_ms(total_wall)} ms wall, {_ms(total_cpu)} ms CPU",
+            f"  {'stage':<16}{'wall ms':>12}{'cpu ms':>12}{'share':>8}",
+        ]
+        for name in STAGES:
+            wall, cpu = self.stages[name]
+            share = wall / total_wall * 100 if total_wall else 0
+            lines.append(f"  {name:<16}{_ms(wall):>12.3f}{_ms(cpu):>12.3f}{share:>7.1f}%")
+
+        slowest = self.slowest_pages(top)
+        if slowest:
+            lines.append(f"Slowest {len(slowest)} pages:")
+            for page in slowest:
+                lines.append(f"  {_ms(page['wall']):>10.3f} ms  {page['page']}")
+        return lines
+
+    def to_dict(self):
+        """Return the profile as JSON-serializable data, times in milliseconds."""
+        def stage_times(stages):
+            return {name: {"wall_ms": _ms(wall), "cpu_ms": _ms(cpu)} for name, (wall, cpu) in stages.items()}
+
+        return {
+            "site": stage_times(self.stages),
+            "pages": [
+                {
+                    "page": page["page"],
+                    "wall_ms": _ms(page["wall"]),
+                    "cpu_ms": _ms(page["cpu"]),
+                    "stages": stage_times(page["stages"]),
+                }
+                for page in self.pages
+            ],
+        }
+
+    def export(self, directory):
+        """
+        Write profile.json and a Chrome trace (trace.json, for
+        chrome://tracing or Perfetto) into directory.
+
+        Args:
+            directory: Output directory, created if needed
+
+        Returns:
+            Paths of the two files written
+        """
+        os.makedirs(directory, exist_ok=True)
+        profile_path = os.path.join(directory, "profile.json")
+        trace_path = os.path.join(directory, "trace.json")
+        for path, data, indent in ((profile_path, self.to_dict(), 2),
+                                   (trace_path, {"traceEvents": self.events, "displayTimeUnit": "ms"}, None)):
+            # Per process, so concurrent shards never write the same file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=indent)
+            os.replace(tmp_path, path)
+        return profile_path, trace_path
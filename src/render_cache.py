@@ -0,0 +1,105 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from htmlnode import LeafNode, Markup, ParentNode
+from markdown_blocks import iter_blocks, block_to_html_node
+from template import rebase_urls
+
+
+# Rough bookkeeping cost of one entry on top of its HTML string
+ENTRY_OVERHEAD = 200
+
+
+class BlockCache:
+    """
+    Bounded LRU cache of rendered block HTML.
+
+    Blocks that repeat across pages (footers, disclaimers, shared callouts)
+    are converted once per process. Entries are keyed by a hash of the block
+    type and text, and the least recently used entries are evicted once the
+    estimated size exceeds max_bytes. Each worker process builds its own
+    cache, and a lock makes a single cache safe to share between threads.
+    """
+
+    def __init__(self, max_bytes, basepath="/"):
+        self.max_bytes = max_bytes
+        self.basepath = basepath
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(block_type, block):
+        """Return the cache key of a block."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(block_type.encode())
+        digest.update(b"\0")
+        digest.update(block.encode())
+        return digest.digest()
+
+    def get(self, key):
+        """Return the cached HTML for key, or None."""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self, key, html):
+        """Store the HTML for key, evicting the oldest entries if needed."""
+        cost = sys.getsizeof(html) + ENTRY_OVERHEAD
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = html
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= sys.getsizeof(evicted) + ENTRY_OVERHEAD
+
+    def render_block(self, block_type, block):
+        """
+        Return the HTML of a block, converting it only on a cache miss.
+
+        Root-relative URLs are rebased before the fragment is stored, so the
+        cached HTML is final for this cache's basepath. It is returned as
+        Markup, so leaves holding it do not escape it again.
+        """
+        key = self.key(block_type, block)
+        html = self.get(key)
+        if html is None:
+            node = rebase_urls(block_to_html_node(block_type, block), self.basepath)
+            html = Markup(node.to_html())
+            self.put(key, html)
+        return html
+
+    def stats(self):
+        """Return the (hits, misses) counters."""
+        return self.hits, self.misses
+
+
+def cached_markdown_to_html_node(markdown, cache):
+    """
+    Convert a markdown document to an HTMLNode, reusing cached blocks.
+
+    Each block becomes a leaf holding its rendered HTML, already rebased to
+    the cache's basepath.
+
+    Args:
+        markdown: Markdown text
+        cache: BlockCache to look blocks up in
+    """
+    block_nodes = [
+        LeafNode(None, cache.render_block(block_type, block))
+        for block_type, block in iter_blocks(markdown)
+    ]
+    return ParentNode("div", block_nodes)
+
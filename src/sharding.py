@@ -0,0 +1,165 @@
+import argparse
+import hashlib
+import json
+import os
+
+
+# Where each shard writes its report for verify_shards
+SHARD_DIR = os.path.join(".ssg-cache", "shards")
+
+
+def shard_index(rel_path, count):
+    """
+    Return the 1-based shard a source file belongs to.
+
+    The hash depends only on the path relative to the content directory,
+    with / separators, so every machine partitions the tree the same way
+    regardless of where it is checked out or of Python's hash seed.
+
+    Args:
+        rel_path: Source path relative to the content directory
+        count: Number of shards
+    """
+    digest = hashlib.blake2b(rel_path.replace(os.sep, "/").encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count + 1
+
+
+def _relative(path, root):
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+class Shard:
+    """
+    One of count shards of a build, numbered from 1.
+
+    A shard renders only the pages whose source paths hash to it, into the
+    same docs/ layout as a full build. Shard 1 also copies the static files.
+    """
+
+    def __init__(self, index, count):
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"Invalid shard {index}/{count}: need 1 <= i <= N")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Parse an "i/N" command line value.
+
+        Raises:
+            argparse.ArgumentTypeError: If text is not a valid shard
+        """
+        try:
+            index, count = (int(part) for part in text.split("/"))
+            return cls(index, count)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected i/N with 1 <= i <= N, got {text!r}")
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+    @property
+    def copies_static(self):
+        """Whether this shard copies the static files."""
+        return self.index == 1
+
+    def owns(self, src_path, content_dir):
+        """Whether the page built from src_path belongs to this shard."""
+        return shard_index(_relative(src_path, content_dir), self.count) == self.index
+
+    def manifest_path(self, manifest_path):
+        """Return this shard's own variant of an incremental build manifest path."""
+        root, ext = os.path.splitext(manifest_path)
+        return f"{root}-shard-{self.index}-of-{self.count}{ext}"
+
+    def report_path(self, shard_dir=SHARD_DIR):
+        """Return the path of this shard's report."""
+        return os.path.join(shard_dir, f"shard-{self.index}-of-{self.count}.json")
+
+    def write_report(self, dest_dir, pages, static=None, settings=None, shard_dir=SHARD_DIR):
+        """
+        Record what this shard produced, for verify_shards.
+
+        Args:
+            dest_dir: Output directory the paths are under
+            pages: HTML paths of the pages this shard is responsible for
+            static: Output paths of the static files, if this shard
+                copied them
+            settings: Build settings every shard must agree on
+            shard_dir: Directory of the reports (default: SHARD_DIR)
+
+        Returns:
+            Path of the report
+        """
+        report = {
+            "shard": self.index,
+            "count": self.count,
+            "settings": settings or {},
+            "pages": sorted(_relative(path, dest_dir) for path in pages),
+            "static": None if static is None else sorted(_relative(path, dest_dir) for path in static),
+        }
+        path = self.report_path(shard_dir)
+        os.makedirs(shard_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f)
+        os.replace(tmp_path, path)
+        return path
+
+
+def verify_shards(count, expected_pages, dest_dir, shard_dir=SHARD_DIR):
+    """
+    Check that the shards of a build together produced the whole site.
+
+    Every shard must have reported with the same settings, every page must
+    have been rendered by exactly the shard that owns it, exactly one shard
+    must have copied the static files, and every reported output must exist
+    under dest_dir.
+
+    Args:
+        count: Number of shards the build was split into
+        expected_pages: HTML paths of all pages of the site, under dest_dir
+        dest_dir: Merged output directory
+        shard_dir: Directory of the shard reports (default: SHARD_DIR)
+
+    Returns:
+        List of problems found; empty if the build is complete
+    """
+    problems = []
+    reports = []
+    for index in range(1, count + 1):
+        path = Shard(index, count).report_path(shard_dir)
+        try:
+            with open(path, 'r') as f:
+                reports.append(json.load(f))
+        except (OSError, ValueError):
+            problems.append(f"Shard {index}/{count}: no report at {path}")
+
+    if len({json.dumps(report["settings"], sort_keys=True) for report in reports}) > 1:
+        problems.append("Shards were built with different settings")
+
+    owners = {}
+    for report in reports:
+        for page in report["pages"]:
+            owners.setdefault(page, []).append(report["shard"])
+    for page, shards in sorted(owners.items()):
+        if len(shards) > 1:
+            problems.append(f"{page}: rendered by shards {', '.join(map(str, shards))}")
+
+    if len(reports) == count:
+        for page in sorted({_relative(path, dest_dir) for path in expected_pages} - set(owners)):
+            problems.append(f"{page}: not rendered by any shard")
+
+    static_reports = [report for report in reports if report["static"] is not None]
+    if len(reports) == count and len(static_reports) != 1:
+        problems.append(f"Static files copied by {len(static_reports)} shards, expected 1")
+
+    outputs = set(owners)
+    for report in static_reports:
+        outputs.update(report["static"])
+    for output in sorted(outputs):
+        if not os.path.isfile(os.path.join(dest_dir, output)):
+            problems.append(f"{output}: missing from {dest_dir}")
+
+    return problems
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+from inline_markdown import extract_markdown_images, extract_markdown_links
+from mapped_source import decode_markdown
+from markdown_blocks import BlockType, extract_title, iter_blocks
+from parse_cache import parser_version
+
+
+SITE_INDEX_PATH = os.path.join(".ssg-cache", "site_index.json")
+
+
+def index_markdown(markdown):
+    """
+    Collect the site-wide facts of one markdown document in a single pass
+    over its blocks.
+
+    Links and images inside fenced code are not rendered as such, so they
+    are not recorded either.
+
+    Args:
+        markdown: Markdown text
+
+    Returns:
+        Dict with the title (None without an h1), the headings as
+        [level, text] pairs and the links and images as [text, url] pairs
+    """
+    try:
+        title = extract_title(markdown)
+    except Exception:
+        title = None
+
+    headings = []
+    links = []
+    images = []
+    for block_type, block in iter_blocks(markdown):
+        if block_type == BlockType.CODE:
+            continue
+        if block_type == BlockType.HEADING:
+            level = len(block) - len(block.lstrip("#"))
+            headings.append([level, block[level + 1:]])
+        if "](" in block:
+            links.extend(list(link) for link in extract_markdown_links(block))
+            images.extend(list(image) for image in extract_markdown_images(block))
+
+    return {"title": title, "headings": headings, "links": links, "images": images}
+
+
+def page_url(dest_path, dest_dir):
+    """
+    Return the root-relative URL a generated page is served at.
+
+    Args:
+        dest_path: Path of the generated HTML file
+        dest_dir: Root of the generated site
+    """
+    url = "/" + os.path.relpath(dest_path, dest_dir).replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        url = url[:-len("index.html")]
+    return url
+
+
+def _normalize_url(url):
+    url = url.split("#", 1)[0]
+    return url.rstrip("/") or "/"
+
+
+class SiteIndex:
+    """
+    Titles, headings, links and images of every page of the site.
+
+    update() reads each markdown file once; files whose size and mtime
+    match the previous index are not read at all. The build then asks the
+    index for page titles and content hashes instead of reading the files
+    for them again. The index is saved as JSON so incremental builds start
+    from it, and it is thrown away when the parser changed, since the
+    recorded facts depend on it.
+    """
+
+    def __init__(self, path=SITE_INDEX_PATH, data=None, version=None):
+        self.path = path
+        self.version = version or parser_version()
+        data = data or {}
+        self.pages = data.get("pages", {}) if data.get("version") == self.version else {}
+        self.indexed = 0
+        self.reused = 0
+
+    @classmethod
+    def load(cls, path=SITE_INDEX_PATH, version=None):
+        """
+        Load an index from disk, or return an empty one.
+
+        Args:
+            path: Path of the index file
+            version: Parser fingerprint (default: parser_version())
+        """
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        return cls(path, data, version)
+
+    def update(self, tasks, dest_dir):
+        """
+        Bring the index in line with the pages of this build.
+
+        Pages no longer in tasks are dropped.
+
+        Args:
+            tasks: List of (markdown path, HTML path) tuples
+            dest_dir: Root of the generated site, for the page URLs
+
+        Returns:
+            self
+        """
+        previous = self.pages
+        self.pages = {}
+        self.indexed = self.reused = 0
+        for src_path, dest_path in tasks:
+            stat = os.stat(src_path)
+            entry = previous.get(src_path)
+            if (entry is not None and entry["size"] == stat.st_size
+                    and entry["mtime_ns"] == stat.st_mtime_ns and entry["dest"] == dest_path):
+                self.reused += 1
+            else:
+                with open(src_path, 'rb') as f:
+                    data = f.read()
+                entry = index_markdown(decode_markdown(data))
+                entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, dest=dest_path,
+                             hash=hashlib.sha256(data).hexdigest())
+                self.indexed += 1
+            entry["url"] = page_url(dest_path, dest_dir)
+            self.pages[src_path] = entry
+        return self
+
+    def title(self, src_path):
+        """Return the title of a page, or None."""
+        entry = self.pages.get(src_path)
+        return entry["title"] if entry is not None else None
+
+    def source_titles(self):
+        """Return {markdown path: title} for every page with a title."""
+        return {src_path: entry["title"] for src_path, entry in self.pages.items()
+                if entry["title"] is not None}
+
+    def digest(self, src_path):
+        """
+        Return the SHA-256 hex digest of a page's markdown as it was
+        indexed, the same digest manifest.hash_file computes, or None.
+        """
+        entry = self.pages.get(src_path)
+        return entry.get("hash") if entry is not None else None
+
+    def titles(self):
+        """Return {page URL: title} for every page."""
+        return {entry["url"]: entry["title"] for entry in self.pages.values()}
+
+    def backlinks(self, url):
+        """
+        Return the URLs of the pages linking to url.
+
+        Trailing slashes and #fragments are ignored when comparing.
+        """
+        target = _normalize_url(url)
+        return sorted(
+            entry["url"] for entry in self.pages.values()
+            if any(_normalize_url(link_url) == target for _, link_url in entry["links"])
+        )
+
+    def assets(self):
+        """Return the set of image URLs used anywhere on the site."""
+        return {url for entry in self.pages.values() for _, url in entry["images"]}
+
+    def save(self):
+        """Write the index to disk."""
+        index_dir = os.path.dirname(self.path)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+
+        # Per process, so concurrent shards never write the same file
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": self.version, "pages": self.pages}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def summary(self):
+        """Describe the last update in one line."""
+        return f"Site index: {len(self.pages)} pages, {self.indexed} indexed, {self.reused} unchanged"
@@ -0,0 +1,264 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from manifest import hash_file
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+
+# ioctl request that clones a file's extents (Btrfs, XFS, ...) on Linux
+FICLONE = 0x40049409
+
+# How a changed static file is placed in the output directory
+LINK_MODES = ("copy", "reflink", "hardlink")
+
+
+def format_bytes(size):
+    """Format a byte count for the build report."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _reflink(src_path, dest_path):
+    """Clone src_path into dest_path without copying data, if supported."""
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+
+
+def copy_file_data(src_path, dest_path):
+    """
+    Copy file contents inside the kernel where possible.
+
+    Uses os.copy_file_range, then os.sendfile, and falls back to a buffered
+    copy on platforms or filesystems that support neither.
+
+    Args:
+        src_path: Source file path
+        dest_path: Destination file path, created or truncated
+    """
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+        size = os.fstat(src.fileno()).st_size
+        for copy_range in (getattr(os, "copy_file_range", None), getattr(os, "sendfile", None)):
+            if copy_range is None:
+                continue
+            offset = 0
+            try:
+                while offset < size:
+                    if copy_range is os.sendfile:
+                        sent = os.sendfile(dest.fileno(), src.fileno(), offset, size - offset)
+                    else:
+                        sent = os.copy_file_range(src.fileno(), dest.fileno(), size - offset, offset, offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            except OSError:
+                if offset == 0:
+                    # Not supported for these files, try the next method
+                    continue
+                raise
+            if offset >= size:
+                return
+
+        # Buffered copy of whatever is left
+        src.seek(0)
+        dest.seek(0)
+        dest.truncate()
+        shutil.copyfileobj(src, dest, 1 << 20)
+
+
+def transfer_file(src_path, dest_path, link_mode="copy"):
+    """
+    Place a copy of src_path at dest_path.
+
+    The file is written next to dest_path first and moved into place, so a
+    half-copied file is never visible. Modification times are preserved
+    so the next sync can compare them.
+
+    Args:
+        src_path: Source file path
+        dest_path: Destination file path
+        link_mode: "copy", "reflink" (copy-on-write clone, falling back to a
+            copy) or "hardlink" (share the source's inode, falling back to
+            a copy)
+
+    Returns:
+        The method actually used: "copy", "reflink" or "hardlink"
+    """
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    method = "copy"
+    try:
+        if link_mode == "hardlink":
+            try:
+                os.link(src_path, tmp_path)
+                method = "hardlink"
+            except OSError:
+                pass
+        elif link_mode == "reflink":
+            try:
+                _reflink(src_path, tmp_path)
+                shutil.copystat(src_path, tmp_path)
+                method = "reflink"
+            except OSError:
+                pass
+
+        if method == "copy":
+            copy_file_data(src_path, tmp_path)
+            shutil.copystat(src_path, tmp_path)
+
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return method
+
+
+class SyncReport:
+    """Counts of what a static sync did."""
+
+    def __init__(self):
+        self.copied = 0
+        self.linked = 0
+        self.skipped = 0
+        self.bytes_copied = 0
+        self.bytes_skipped = 0
+
+    def summary(self):
+        """Describe the sync in one line."""
+        linked = f", {self.linked} linked" if self.linked else ""
+        return (f"Static files: {self.copied} copied ({format_bytes(self.bytes_copied)}{linked}), "
+                f"{self.skipped} unchanged ({format_bytes(self.bytes_skipped)} skipped)")
+
+
+class StaticSync:
+    """
+    Mirrors a static directory into the output directory, copying only
+    files that changed.
+
+    Without a manifest a file is considered unchanged when the output has
+    the same size and mtime as the source (or the same content hash when
+    checksum is set). With a BuildManifest, the manifest's record of the
+    previous build decides instead.
+
+    The source tree is walked first, creating output directories parent
+    first and deciding what to copy; the copies then run on a thread pool.
+    """
+
+    def __init__(self, checksum=False, link_mode="copy", manifest=None, workers=8):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Invalid link mode: {link_mode}")
+        self.checksum = checksum
+        self.link_mode = link_mode
+        self.manifest = manifest
+        self.workers = workers
+        self.report = SyncReport()
+        self.outputs = set()
+
+    def is_current(self, src_path, dest_path, src_stat):
+        """
+        Whether dest_path already holds the contents of src_path.
+
+        Args:
+            src_path: Source file path
+            dest_path: Destination file path
+            src_stat: os.stat() result of src_path
+        """
+        if self.manifest is not None:
+            return not self.manifest.needs_build("static", src_path, dest_path)
+
+        try:
+            dest_stat = os.stat(dest_path)
+        except OSError:
+            return False
+        if dest_stat.st_size != src_stat.st_size:
+            return False
+        if self.checksum:
+            return hash_file(src_path) == hash_file(dest_path)
+        return dest_stat.st_mtime_ns == src_stat.st_mtime_ns
+
+    def sync(self, src_dir, dest_dir):
+        """
+        Bring dest_dir up to date with src_dir.
+
+        Args:
+            src_dir: Source directory path
+            dest_dir: Destination directory path
+
+        Returns:
+            The SyncReport of this syncer
+        """
+        os.makedirs(dest_dir, exist_ok=True)
+        copies = []
+        self._scan_directory(src_dir, dest_dir, copies)
+
+        def transfer(copy):
+            src_path, dest_path, _ = copy
+            return transfer_file(src_path, dest_path, self.link_mode)
+
+        if self.workers > 1 and len(copies) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                methods = list(executor.map(transfer, copies))
+        else:
+            methods = [transfer(copy) for copy in copies]
+
+        for method, (_, _, size) in zip(methods, copies):
+            if method != "copy":
+                self.report.linked += 1
+            self.report.copied += 1
+            self.report.bytes_copied += size
+
+        return self.report
+
+    def _scan_directory(self, src_dir, dest_dir, copies):
+        """Create output directories and list the files that need copying."""
+        # List all items in source directory
+        items = os.listdir(src_dir)
+
+        for item in items:
+            src_path = os.path.join(src_dir, item)
+            dest_path = os.path.join(dest_dir, item)
+
+            if os.path.isfile(src_path):
+                self.outputs.add(os.path.normpath(dest_path))
+                src_stat = os.stat(src_path)
+
+                if self.is_current(src_path, dest_path, src_stat):
+                    self.report.skipped += 1
+                    self.report.bytes_skipped += src_stat.st_size
+                else:
+                    copies.append((src_path, dest_path, src_stat.st_size))
+            else:
+                # Create the directory before anything is copied into it
+                if not os.path.isdir(dest_path):
+                    os.mkdir(dest_path)
+                self._scan_directory(src_path, dest_path, copies)
+
+
+def remove_stale_files(dest_dir, keep):
+    """
+    Delete files under dest_dir that are not in keep, then empty directories.
+
+    Args:
+        dest_dir: Output directory path
+        keep: Set of normalized paths of files produced by this build
+
+    Returns:
+        List of removed file paths
+    """
+    removed = []
+    for dirpath, dirnames, filenames in os.walk(dest_dir, topdown=False):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if os.path.normpath(path) not in keep:
+                print(f"Removing stale output: {path}")
+                os.remove(path)
+                removed.append(path)
+        if dirpath != dest_dir and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+    return removed
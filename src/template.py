@@ -0,0 +1,122 @@
+import re
+from htmlnode import escape_html
+
+
+# Placeholders recognised in template.html
+SLOT_PATTERN = re.compile(r"\{\{ (Title|Content) \}\}")
+
+# Attributes whose root-relative URLs are prefixed with the basepath
+URL_ATTRIBUTES = ("href", "src")
+
+
+class Template:
+    """
+    A page template compiled into literal segments and slots.
+
+    The template text is split on its {{ Title }} and {{ Content }}
+    placeholders once, and the basepath is applied to the literal segments
+    at that point, so rendering a page is a single join.
+    """
+
+    def __init__(self, text, basepath="/"):
+        self.basepath = basepath
+        self._parts = []
+
+        pos = 0
+        for match in SLOT_PATTERN.finditer(text):
+            self._add_literal(text[pos:match.start()])
+            self._parts.append((True, match.group(1)))
+            pos = match.end()
+        self._add_literal(text[pos:])
+
+    @classmethod
+    def from_file(cls, path, basepath="/"):
+        """
+        Load and compile a template file.
+
+        Args:
+            path: Path to HTML template file
+            basepath: Base path for URLs (default: "/")
+        """
+        with open(path, 'r') as f:
+            return cls(f.read(), basepath)
+
+    def _add_literal(self, text):
+        if text:
+            self._parts.append((False, rebase_html(text, self.basepath)))
+
+    def render(self, title, content):
+        """
+        Fill the template's slots.
+
+        Args:
+            title: Page title, as plain text
+            content: Rendered page body
+
+        Returns:
+            The final HTML document
+        """
+        values = {"Title": escape_html(title), "Content": content}
+        return "".join([values[part] if is_slot else part for is_slot, part in self._parts])
+
+    def write(self, out, title, content):
+        """
+        Stream the filled template to a file-like object.
+
+        Args:
+            out: Object with a write() method, such as an open file
+            title: Page title, as plain text
+            content: Rendered page body, or an HTMLNode that is streamed
+                with write_html() instead of being rendered to a string
+        """
+        for is_slot, part in self._parts:
+            if not is_slot:
+                out.write(part)
+            elif part == "Title":
+                out.write(escape_html(title))
+            elif hasattr(content, "write_html"):
+                content.write_html(out)
+            else:
+                out.write(content)
+
+
+def rebase_html(html, basepath):
+    """
+    Prefix root-relative href and src URLs in an HTML string with basepath.
+
+    Args:
+        html: HTML text
+        basepath: Base path for URLs
+    """
+    if basepath == "/":
+        return html
+    for attr in URL_ATTRIBUTES:
+        html = html.replace(f'{attr}="/', f'{attr}="{basepath}')
+    return html
+
+
+def rebase_urls(node, basepath):
+    """
+    Prefix root-relative href and src props in an HTMLNode tree with basepath.
+
+    This touches only the link and image nodes instead of re-scanning the
+    rendered HTML.
+
+    Args:
+        node: Root HTMLNode
+        basepath: Base path for URLs
+    """
+    if basepath == "/":
+        return node
+
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.props:
+            for attr in URL_ATTRIBUTES:
+                url = current.props.get(attr)
+                if url is not None and url.startswith("/"):
+                    current.props[attr] = basepath + url[1:]
+        if current.children:
+            stack.extend(current.children)
+    return node
@@ -0,0 +1,145 @@
+import os
+import tempfile
+import threading
+import unittest
+from async_pipeline import AsyncPipeline
+from main import collect_page_tasks, generate_pages_recursive
+from page_renderer import PageRenderer
+from parse_cache import ParseCache
+from profiling import Profiler
+from template import Template
+
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+class _TrackingRenderer(PageRenderer):
+    """Records how many pages are read but not yet written."""
+
+    def __init__(self, template):
+        super().__init__(template)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _read_source(self, from_path):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return super()._read_source(from_path)
+
+    def write_output(self, dest_path, html):
+        counters = super().write_output(dest_path, html)
+        with self.lock:
+            self.in_flight -= 1
+        return counters
+
+
+class TestAsyncPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, 'w') as f:
+            f.write(TEMPLATE)
+        for i in range(40):
+            path = os.path.join(self.content, f"section{i % 3}", f"page{i}", "index.md")
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(f"# Page {i}\n\nSee [home](/) and `code <{i}>`.\n\n- one\n- two\n")
+
+    def _read_tree(self, root):
+        result = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, 'rb') as f:
+                    result[os.path.relpath(path, root)] = f.read()
+        return result
+
+    def _dest(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_matches_serial_build(self):
+        generate_pages_recursive(self.content, self.template, self._dest("serial"), "/base/")
+        expected = self._read_tree(self._dest("serial"))
+        self.assertEqual(len(expected), 40)
+
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                dest = self._dest(f"pipeline{jobs}")
+                pages = generate_pages_recursive(self.content, self.template, dest, "/base/", jobs=jobs,
+                                                 pipeline=AsyncPipeline(io_threads=3, read_queue=2,
+                                                                        write_queue=2))
+                self.assertEqual(len(pages), 40)
+                self.assertEqual(self._read_tree(dest), expected)
+
+    def test_parse_cache(self):
+        generate_pages_recursive(self.content, self.template, self._dest("serial"))
+        renderer = PageRenderer(Template(TEMPLATE), parse_cache=ParseCache(self._dest("parse-cache")))
+        dest = self._dest("pipeline")
+        tasks = collect_page_tasks(self.content, dest)
+        renderer.prepare_outputs(dest for _, dest in tasks)
+        first = AsyncPipeline().run(tasks, renderer)
+        second = AsyncPipeline().run(tasks, renderer)
+        self.assertEqual((first["parse_misses"], first["output_written"]), (40, 40))
+        self.assertEqual((second["parse_hits"], second["output_unchanged"]), (40, 40))
+        self.assertEqual(self._read_tree(dest), self._read_tree(self._dest("serial")))
+
+    def test_queues_bound_pages_in_flight(self):
+        renderer = _TrackingRenderer(Template(TEMPLATE))
+        tasks = collect_page_tasks(self.content, self._dest("docs"))
+        renderer.prepare_outputs(dest for _, dest in tasks)
+        written = []
+        AsyncPipeline(io_threads=2, read_queue=1, write_queue=1).run(
+            tasks, renderer, on_page=lambda src, dest: written.append(dest))
+        self.assertEqual(sorted(written), sorted(dest for _, dest in tasks))
+        # Two being read, one queued, one rendering, one queued and two being written
+        self.assertLessEqual(renderer.max_in_flight, 7)
+
+    def test_tasks_are_pulled_off_the_event_loop(self):
+        tasks = collect_page_tasks(self.content, self._dest("docs"))
+        renderer = PageRenderer(Template(TEMPLATE))
+        renderer.prepare_outputs(dest for _, dest in tasks)
+        threads = set()
+
+        def pull():
+            for task in tasks:
+                threads.add(threading.current_thread())
+                yield task
+        AsyncPipeline(io_threads=2).run(pull(), renderer)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_profiled_pages(self):
+        tasks = collect_page_tasks(self.content, self._dest("docs"))
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                renderer = PageRenderer(Template(TEMPLATE))
+                renderer.prepare_outputs(dest for _, dest in tasks)
+                profiler = Profiler().install()
+                try:
+                    AsyncPipeline(io_threads=2).run(tasks, renderer, jobs)
+                finally:
+                    profiler.uninstall()
+                self.assertEqual(sorted(page["page"] for page in profiler.pages),
+                                 sorted(src for src, _ in tasks))
+                for page in profiler.pages:
+                    for stage in ("read", "block_split", "template", "write"):
+                        self.assertGreater(page["stages"][stage][0], 0, (page["page"], stage))
+                    self.assertGreater(page["wall"], 0)
+
+    def test_errors_propagate(self):
+        with open(os.path.join(self.content, "broken.md"), 'w') as f:
+            f.write("No title here")
+        with self.assertRaises(Exception):
+            generate_pages_recursive(self.content, self.template, self._dest("docs"),
+                                     pipeline=AsyncPipeline())
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            AsyncPipeline(read_queue=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
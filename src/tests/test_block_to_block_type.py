@@ -1,5 +1,5 @@
 import unittest
-from inline_markdown import block_to_block_type, BlockType
+from markdown_blocks import block_to_block_type, BlockType
 
 
 class TestBlockToBlockType(unittest.TestCase):
@@ -216,6 +216,12 @@ class TestBlockToBlockType(unittest.TestCase):
         block = ">Quote line\n- List item"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_inline_markdown_compatibility_names(self):
+        import inline_markdown
+        self.assertIs(inline_markdown.BlockType, BlockType)
+        self.assertIs(inline_markdown.block_to_block_type, block_to_block_type)
+        self.assertEqual(inline_markdown.markdown_to_blocks("a\n\nb"), ["a", "b"])
+
 
 if __name__ == "__main__":
     unittest.main()
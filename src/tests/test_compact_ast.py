@@ -0,0 +1,136 @@
+import tracemalloc
+import unittest
+import markdown_blocks
+from compact_ast import CompactDocument, NodeKind, markdown_to_compact
+from htmlnode import LeafNode
+from markdown_blocks import BlockType, markdown_to_html_node, register_block_type
+
+
+SAMPLE = """# Welcome to *my* site
+
+A paragraph with **bold**, `x < y` and [a link](/about
+"spread") over
+two lines, with ![an image](/a.png) & more.
+
+> A quote with **bold
+> across** lines
+>and [a link](/q)
+
+```
+code <b>
+  indented & raw
+```
+
+- one [item](/1)
+* two _items_
+
+1. first
+2. second `code`
+
+### Third level"""
+
+
+class TestCompactDocument(unittest.TestCase):
+    def test_renders_like_the_node_tree(self):
+        for markdown in (SAMPLE, "", "plain", "1. a\n3. b", "a\n\n\n\nb"):
+            with self.subTest(markdown=markdown):
+                self.assertEqual(markdown_to_compact(markdown).to_html(),
+                                 markdown_to_html_node(markdown).to_html())
+
+    def test_structure(self):
+        document = markdown_to_compact(SAMPLE)
+        blocks = list(document.children())
+        self.assertEqual([document.kind(block) for block in blocks], [
+            NodeKind.HEADING1, NodeKind.PARAGRAPH, NodeKind.QUOTE, NodeKind.CODE_BLOCK,
+            NodeKind.UNORDERED_LIST, NodeKind.ORDERED_LIST, NodeKind.HEADING3,
+        ])
+
+        items = list(document.children(blocks[4]))
+        self.assertEqual([document.kind(item) for item in items], [NodeKind.LIST_ITEM] * 2)
+        start, end = document.span(items[0])
+        self.assertEqual(SAMPLE[start:end], "- one [item](/1)")
+
+        link = list(document.children(items[0]))[1]
+        self.assertEqual(document.kind(link), NodeKind.LINK)
+        start, end = document.span(link)
+        self.assertEqual(SAMPLE[start:end], "[item](/1)")
+        self.assertEqual((document.text_of(link), document.url(link)), ("item", "/1"))
+
+    def test_leaf_text(self):
+        document = markdown_to_compact(SAMPLE)
+        paragraph = list(document.children())[1]
+        leaves = list(document.children(paragraph))
+        self.assertEqual(document.text_of(leaves[1]), "bold")
+        self.assertEqual(document.text_of(leaves[3]), "x < y")
+        # Line breaks in paragraphs read as spaces
+        self.assertEqual(document.url(leaves[5]), '/about "spread"')
+        self.assertEqual(document.text_of(leaves[6]), " over two lines, with ")
+        code = list(document.children())[3]
+        self.assertEqual(document.text_of(code), "code <b>\n  indented & raw\n")
+        with self.assertRaises(ValueError):
+            document.text_of(paragraph)
+        with self.assertRaises(ValueError):
+            document.url(leaves[1])
+
+    def test_quote_text_follows_the_source(self):
+        document = markdown_to_compact(SAMPLE)
+        quote = list(document.children())[2]
+        bold = list(document.children(quote))[1]
+        self.assertGreaterEqual(document.span(bold)[0], document.source_length)
+        self.assertEqual(document.text_of(bold), "bold\nacross")
+        self.assertEqual(document.source, SAMPLE)
+
+    def test_round_trip(self):
+        document = markdown_to_compact(SAMPLE + "\n\nUnicode: é ✓")
+        data = document.to_bytes()
+        loaded = CompactDocument.from_bytes(data)
+        self.assertEqual(loaded, document)
+        self.assertEqual(loaded.to_html(), document.to_html())
+
+    def test_from_bytes_rejects_other_data(self):
+        data = markdown_to_compact(SAMPLE).to_bytes()
+        for bad in (b"", b"not a document at all", data[:-1], b"SSGB" + data[4:]):
+            with self.assertRaises(ValueError):
+                CompactDocument.from_bytes(bad)
+
+    def test_allocations_do_not_grow_with_nodes(self):
+        markdown = "\n\n".join([SAMPLE] * 20)
+        markdown_to_compact(markdown)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        document = markdown_to_compact(markdown)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+        self.assertGreater(len(document), 500)
+        self.assertLess(blocks, 50)
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            markdown_to_compact("This is **unclosed")
+
+
+class TestCompactPluginBlocks(unittest.TestCase):
+    def setUp(self):
+        converters = dict(markdown_blocks.BLOCK_CONVERTERS)
+        matchers = list(markdown_blocks._BLOCK_MATCHERS)
+
+        def restore():
+            markdown_blocks.BLOCK_CONVERTERS.clear()
+            markdown_blocks.BLOCK_CONVERTERS.update(converters)
+            markdown_blocks._BLOCK_MATCHERS[:] = matchers
+        self.addCleanup(restore)
+
+    def test_plugin_blocks_are_stored_as_html(self):
+        register_block_type("note", lambda block: LeafNode("aside", block[4:]),
+                            lambda block: block.startswith("!!! "))
+        register_block_type(BlockType.CODE, lambda block: LeafNode("samp", block.strip("`\n")))
+        markdown = "Intro\n\n!!! Careful <now>\n\n```\nx\n```"
+        document = markdown_to_compact(markdown)
+        self.assertEqual([document.kind(block) for block in document.children()],
+                         [NodeKind.PARAGRAPH, NodeKind.HTML, NodeKind.HTML])
+        self.assertEqual(document.to_html(), markdown_to_html_node(markdown).to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -57,6 +57,15 @@ No h1 here!"""
         # Should return the first h1
         self.assertEqual(extract_title(markdown), "First Title")
 
+    def test_extract_title_from_lines_stops_at_title(self):
+        lines = iter(["Intro\n", "# Title\n", "rest\n"])
+        self.assertEqual(extract_title(lines), "Title")
+        self.assertEqual(next(lines), "rest\n")
+
+    def test_extract_title_empty_title_line_from_file_lines(self):
+        with self.assertRaises(Exception):
+            extract_title(["# \n", "text\n"])
+
 
 if __name__ == "__main__":
     unittest.main()
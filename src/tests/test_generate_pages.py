@@ -0,0 +1,154 @@
+import os
+import sys
+import tempfile
+import tracemalloc
+import unittest
+import main
+from main import collect_page_tasks, generate_pages_parallel, generate_pages_recursive, iter_page_tasks
+from page_renderer import PageRenderer
+from template import Template
+
+
+TEMPLATE = """<html><head><title>{{ Title }}</title><link href="/index.css" /></head>
+<body>{{ Content }}</body></html>"""
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, 'w') as f:
+            f.write(TEMPLATE)
+        pages = {
+            "index.md": "# Home\n\nSee [the blog](/blog/post).",
+            os.path.join("blog", "post", "index.md"): "# Post\n\n- one\n- two",
+            os.path.join("blog", "notes.md"): "# Notes\n\n![img](/images/a.png)",
+        }
+        for rel_path, text in pages.items():
+            path = os.path.join(self.content, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(text)
+
+    def _read_tree(self, root):
+        result = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, 'rb') as f:
+                    result[os.path.relpath(path, root)] = f.read()
+        return result
+
+    def test_collect_page_tasks(self):
+        dest = os.path.join(self.tmp.name, "docs")
+        tasks = collect_page_tasks(self.content, dest)
+        self.assertEqual(
+            sorted(tasks),
+            sorted([
+                (os.path.join(self.content, "index.md"), os.path.join(dest, "index.html")),
+                (os.path.join(self.content, "blog", "post", "index.md"),
+                 os.path.join(dest, "blog", "post", "index.html")),
+                (os.path.join(self.content, "blog", "notes.md"),
+                 os.path.join(dest, "blog", "notes.html")),
+            ]),
+        )
+
+    def test_md_in_directory_name_is_kept(self):
+        path = os.path.join(self.content, "notes.md.d", "page.md")
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write("# Page")
+        dest = os.path.join(self.tmp.name, "docs")
+        self.assertIn((path, os.path.join(dest, "notes.md.d", "page.html")), collect_page_tasks(self.content, dest))
+
+    def test_deeply_nested_tree(self):
+        # Deeper than the recursion limit allows a recursive walk to go
+        parts = ["d"] * 300
+        deep = os.path.join(self.content, *parts)
+        os.makedirs(deep)
+        with open(os.path.join(deep, "page.md"), 'w') as f:
+            f.write("# Deep")
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(200)
+        try:
+            tasks = collect_page_tasks(self.content, "docs")
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertIn((os.path.join(deep, "page.md"), os.path.join("docs", *parts, "page.html")), tasks)
+
+    def test_iter_page_tasks_is_lazy(self):
+        tasks = iter_page_tasks(self.content, "docs")
+        self.assertEqual(next(tasks), (os.path.join(self.content, "index.md"), os.path.join("docs", "index.html")))
+
+    def test_parallel_submission_is_bounded(self):
+        for i in range(200):
+            with open(os.path.join(self.content, f"page{i}.md"), 'w') as f:
+                f.write(f"# Page {i}")
+        all_tasks = collect_page_tasks(self.content, os.path.join(self.tmp.name, "docs"))
+        consumed = []
+        ahead = []
+
+        def tasks():
+            for task in all_tasks:
+                # Pulled but not yet written, this one included
+                written = sum(os.path.exists(dest_path) for _, dest_path in consumed)
+                consumed.append(task)
+                ahead.append(len(consumed) - written)
+                yield task
+
+        renderer = PageRenderer(Template(TEMPLATE))
+        for name, value in (("BATCHES_PER_WORKER", 1), ("MAX_BATCH_SIZE", 4)):
+            self.addCleanup(setattr, main, name, getattr(main, name))
+            setattr(main, name, value)
+        jobs = 2
+        generate_pages_parallel(tasks(), self.template, renderer, jobs=jobs)
+        self.assertEqual(len(consumed), len(all_tasks))
+        self.assertLessEqual(max(ahead), jobs * main.BATCHES_PER_WORKER * main.MAX_BATCH_SIZE)
+        for _, dest_path in all_tasks:
+            self.assertTrue(os.path.exists(dest_path))
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, "/base/", jobs=1)
+        generate_pages_recursive(self.content, self.template, parallel, "/base/", jobs=2)
+        serial_files = self._read_tree(serial)
+        self.assertEqual(len(serial_files), 3)
+        self.assertEqual(serial_files, self._read_tree(parallel))
+        self.assertIn(b'href="/base/blog/post"', serial_files["index.html"])
+
+    def test_streaming_output_matches_tree(self):
+        path = os.path.join(self.content, "big.md")
+        with open(path, 'w') as f:
+            f.write("Intro\n\n# Big\n\n```\ncode\n\nmore\n```\n\n> quote\n\n1. one\n2. [two](/two)\n")
+        for block_cache_bytes in (0, 1024 * 1024):
+            tree = os.path.join(self.tmp.name, f"tree{block_cache_bytes}")
+            streamed = os.path.join(self.tmp.name, f"streamed{block_cache_bytes}")
+            generate_pages_recursive(self.content, self.template, tree, "/base/",
+                                     block_cache_bytes=block_cache_bytes)
+            generate_pages_recursive(self.content, self.template, streamed, "/base/",
+                                     block_cache_bytes=block_cache_bytes, streaming=True)
+            tree_files = self._read_tree(tree)
+            self.assertEqual(len(tree_files), 4)
+            self.assertEqual(tree_files, self._read_tree(streamed))
+            self.assertIn(b'<a href="/base/two">', tree_files["big.html"])
+
+    def test_streaming_memory_is_bounded_by_block(self):
+        path = os.path.join(self.content, "index.md")
+        paragraph = "Some [linked](/page) text with **bold** words.\n\n"
+        with open(path, 'w') as f:
+            f.write("# Huge\n\n" + paragraph * 20000)
+        size = os.path.getsize(path)
+
+        tracemalloc.start()
+        generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, "docs"),
+                                 streaming=True)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertLess(peak, size / 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 from textnode import TextNode, TextType
-from inline_markdown import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes
+from inline_markdown import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, iter_inline_spans
 
 
 class TestSplitNodesDelimiter(unittest.TestCase):
@@ -654,6 +654,95 @@ class TestTextToTextnodes(unittest.TestCase):
         ]
         self.assertListEqual(expected, nodes)
 
+    def test_text_to_textnodes_underscore_italic(self):
+        nodes = text_to_textnodes("Disney _didn't ruin it_ yet")
+        expected = [
+            TextNode("Disney ", TextType.TEXT),
+            TextNode("didn't ruin it", TextType.ITALIC),
+            TextNode(" yet", TextType.TEXT),
+        ]
+        self.assertListEqual(expected, nodes)
+
+    def test_text_to_textnodes_link_url_with_delimiters(self):
+        nodes = text_to_textnodes("See [docs](https://example.com/a_b_c) and *more*")
+        expected = [
+            TextNode("See ", TextType.TEXT),
+            TextNode("docs", TextType.LINK, "https://example.com/a_b_c"),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("more", TextType.ITALIC),
+        ]
+        self.assertListEqual(expected, nodes)
+
+    def test_text_to_textnodes_code_is_not_parsed(self):
+        nodes = text_to_textnodes("Run `a * b` now")
+        expected = [
+            TextNode("Run ", TextType.TEXT),
+            TextNode("a * b", TextType.CODE),
+            TextNode(" now", TextType.TEXT),
+        ]
+        self.assertListEqual(expected, nodes)
+
+    def test_text_to_textnodes_brackets_without_url(self):
+        nodes = text_to_textnodes("A [note] and ![alt] and [link](u)")
+        expected = [
+            TextNode("A [note] and ![alt] and ", TextType.TEXT),
+            TextNode("link", TextType.LINK, "u"),
+        ]
+        self.assertListEqual(expected, nodes)
+
+    def test_text_to_textnodes_unclosed_delimiter_raises_error(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **unclosed bold")
+
+    def test_text_to_textnodes_empty(self):
+        self.assertListEqual([], text_to_textnodes(""))
+
+    def test_text_to_textnodes_many_links(self):
+        text = "see [a](b) " * 1000
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 2001)
+        self.assertEqual(nodes[-1], TextNode(" ", TextType.TEXT))
+
+
+class TestIterInlineSpans(unittest.TestCase):
+    def test_spans_cover_the_syntax(self):
+        text = "A **b** and ![c](d) then [e](f) `g`"
+        spans = [(text_type, text[start:end]) for text_type, start, end in iter_inline_spans(text)]
+        self.assertEqual(spans, [
+            (TextType.TEXT, "A "),
+            (TextType.BOLD, "**b**"),
+            (TextType.TEXT, " and "),
+            (TextType.IMAGE, "![c](d)"),
+            (TextType.TEXT, " then "),
+            (TextType.LINK, "[e](f)"),
+            (TextType.TEXT, " "),
+            (TextType.CODE, "`g`"),
+        ])
+
+    def test_region(self):
+        text = "# Title with *emphasis*"
+        self.assertEqual(list(iter_inline_spans(text, 2, 13)), [(TextType.TEXT, 2, 13)])
+        self.assertEqual(list(iter_inline_spans(text, 13)), [(TextType.ITALIC, 13, len(text))])
+        with self.assertRaises(ValueError):
+            # The region ends before the closing delimiter
+            list(iter_inline_spans(text, 2, len(text) - 1))
+
+    def test_agrees_with_text_to_textnodes(self):
+        for text in ("x __ y [a [b](c) ![d](e) **f** _g_ [h](i(j)",
+                     "**a***b* `c`_d_ ! [ ]( ) ![e]() [f](g h)",
+                     "plain", "", "``**x**"):
+            with self.subTest(text=text):
+                spans = list(iter_inline_spans(text))
+                nodes = text_to_textnodes(text)
+                self.assertEqual([text_type for text_type, _, _ in spans],
+                                 [node.text_type for node in nodes])
+                for (text_type, start, end), node in zip(spans, nodes):
+                    self.assertIn(node.text, text[start:end])
+
+    def test_unclosed_delimiter_raises_error(self):
+        with self.assertRaises(ValueError):
+            list(iter_inline_spans("This is **unclosed bold"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from htmlnode import LeafNode
+from htmlnode import LeafNode, Markup, escape_html
 
 
 class TestLeafNode(unittest.TestCase):
@@ -36,6 +36,29 @@ class TestLeafNode(unittest.TestCase):
         self.assertEqual(
             node.to_html(), '<img src="image.png" alt="An image"></img>')
 
+    def test_leaf_to_html_escapes_value(self):
+        node = LeafNode("p", "1 < 2 && 3 > 2")
+        self.assertEqual(node.to_html(), "<p>1 &lt; 2 &amp;&amp; 3 &gt; 2</p>")
+        self.assertEqual(LeafNode(None, "<script>").to_html(), "&lt;script&gt;")
+
+    def test_leaf_to_html_escapes_props(self):
+        node = LeafNode("img", "", {"src": "/a?b=1&c=2", "alt": 'Say "hi" <3'})
+        self.assertEqual(
+            node.to_html(), '<img src="/a?b=1&amp;c=2" alt="Say &quot;hi&quot; &lt;3"></img>')
+
+    def test_leaf_to_html_markup_is_not_escaped(self):
+        node = LeafNode(None, Markup("<b>already &amp; escaped</b>"))
+        self.assertEqual(node.to_html(), "<b>already &amp; escaped</b>")
+
+    def test_leaf_to_html_non_str_values(self):
+        self.assertEqual(LeafNode("img", "", {"width": 100}).to_html(), '<img width="100"></img>')
+        self.assertEqual(LeafNode("a", "link", {"href": None}).to_html(), '<a href="None">link</a>')
+        self.assertEqual(LeafNode("td", 3).to_html(), "<td>3</td>")
+
+    def test_escape_html_returns_clean_text_unchanged(self):
+        text = "Nothing to escape here"
+        self.assertIs(escape_html(text), text)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+from main import parse_args
+from manifest import BuildManifest, hash_file
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.manifest_path = os.path.join(self.tmp.name, "cache", "manifest.json")
+        self.src = self._write("index.md", "# Hello")
+        self.dest = self._write("index.html", "<h1>Hello</h1>")
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def _build(self, **settings):
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.start(**settings)
+        result = manifest.needs_build("pages", self.src, self.dest)
+        manifest.save()
+        return result, manifest
+
+    def test_first_build_needs_everything(self):
+        result, manifest = self._build(template="t")
+        self.assertTrue(result)
+        self.assertEqual(manifest.built["pages"], 1)
+
+    def test_unchanged_source_is_skipped(self):
+        self._build(template="t")
+        result, manifest = self._build(template="t")
+        self.assertFalse(result)
+        self.assertEqual(manifest.skipped["pages"], 1)
+
+    def test_changed_source_is_rebuilt(self):
+        self._build(template="t")
+        self._write("index.md", "# Goodbye")
+        result, _ = self._build(template="t")
+        self.assertTrue(result)
+
+    def test_touched_but_identical_source_is_skipped(self):
+        self._build(template="t")
+        os.utime(self.src, ns=(0, 0))
+        result, _ = self._build(template="t")
+        self.assertFalse(result)
+
+    def test_settings_change_rebuilds(self):
+        self._build(template="t")
+        result, _ = self._build(template="changed")
+        self.assertTrue(result)
+
+    def test_missing_output_is_rebuilt(self):
+        self._build(template="t")
+        os.remove(self.dest)
+        result, _ = self._build(template="t")
+        self.assertTrue(result)
+
+    def test_stale_outputs_are_removed(self):
+        self._build(template="t")
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.start(template="t")
+        removed = manifest.remove_stale_outputs()
+        self.assertEqual(removed, [self.dest])
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_rewritten_output_is_rebuilt(self):
+        self._build(template="t")
+        # Another build replaced the output behind the manifest's back
+        self._write("index.html", "<h1>Hello from elsewhere</h1>")
+        result, _ = self._build(template="t")
+        self.assertTrue(result)
+        result, _ = self._build(template="t")
+        self.assertFalse(result)
+
+    def test_stale_output_directories_are_pruned(self):
+        root = os.path.join(self.tmp.name, "docs")
+        self.dest = os.path.join(root, "blog", "tom", "index.html")
+        os.makedirs(os.path.dirname(self.dest))
+        self._write(os.path.relpath(self.dest, self.tmp.name), "<h1>Tom</h1>")
+        self._build(template="t")
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.start(template="t")
+        manifest.remove_stale_outputs(root)
+        self.assertEqual(os.listdir(self.tmp.name).count("docs"), 1)
+        self.assertEqual(os.listdir(root), [])
+
+    def test_corrupt_manifest_is_ignored(self):
+        os.makedirs(os.path.dirname(self.manifest_path))
+        with open(self.manifest_path, 'w') as f:
+            f.write("not json")
+        result, _ = self._build(template="t")
+        self.assertTrue(result)
+
+    def test_incremental_clean_is_refused(self):
+        stderr = StringIO()
+        with self.assertRaises(SystemExit), redirect_stderr(stderr):
+            parse_args(["--incremental", "--clean"])
+        self.assertIn("--clean cannot be combined with --incremental", stderr.getvalue())
+
+    def test_hash_file(self):
+        self.assertEqual(hash_file(self.src), hash_file(self._write("copy.md", "# Hello")))
+
+
+if __name__ == "__main__":
+    unittest.main()
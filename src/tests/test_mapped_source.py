@@ -0,0 +1,78 @@
+import os
+import random
+import tempfile
+import unittest
+from mapped_source import decode_markdown, extract_mapped_title, iter_block_chunks, iter_mapped_blocks, map_file
+from markdown_blocks import extract_title, iter_blocks
+
+
+LINES = [
+    "# Title", "## Sub", "text", "more *text*", "", "", "   ", "```", "```python", "code()", "```",
+    "> quote", "- item", "1. first", "2. second", "#no space", "[link](/a)",
+    " ```", "x ```", "```x```", "   ```  ",
+]
+
+
+class TestMappedSource(unittest.TestCase):
+    def _check(self, text, chunk_size=1):
+        data = text.encode()
+        expected = list(iter_blocks(text.replace("\r\n", "\n")))
+        self.assertEqual(list(iter_mapped_blocks(data, chunk_size)), expected, text)
+        self.assertEqual(list(iter_mapped_blocks(data)), expected, text)
+
+    def test_matches_iter_blocks(self):
+        self._check("# Title\n\nPara\n\n```\ncode\n\nmore\n```\n\n- a\n- b\n")
+
+    def test_unclosed_fence_falls_back(self):
+        self._check("# Title\n\n```\ncode\n\nmore\n\nlast")
+
+    def test_crlf_line_endings(self):
+        self._check("# Title\r\n\r\nPara\r\n\r\n```\r\ncode\r\n\r\n```\r\n")
+
+    def test_random_documents(self):
+        rng = random.Random(7)
+        for _ in range(2000):
+            newline = rng.choice(("\n", "\r\n"))
+            text = newline.join(rng.choice(LINES) for _ in range(rng.randint(0, 30)))
+            self._check(text, chunk_size=rng.choice((1, 8, 64)))
+
+    def test_chunks_end_on_block_boundaries(self):
+        text = "".join(f"Paragraph {i}\n\n" for i in range(100))
+        chunks = list(iter_block_chunks(text.encode(), chunk_size=50))
+        self.assertGreater(len(chunks), 10)
+        self.assertEqual("".join(chunks), text)
+        self.assertTrue(all(chunk.endswith("\n\n") for chunk in chunks))
+
+    def test_extract_mapped_title(self):
+        for text in ("# Hello", "Intro\n#Nope\n## Sub\n# Real title  \nrest", "text # not\r\n# Title\r\n"):
+            self.assertEqual(extract_mapped_title(text.encode()), extract_title(text.replace("\r", "")))
+
+    def test_decode_markdown_matches_text_mode(self):
+        text = "# Tïtle\r\n\r\nOld\rMac\nUnix\r"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'wb') as f:
+                f.write(text.encode())
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(decode_markdown(text.encode()), f.read())
+
+    def test_extract_mapped_title_missing(self):
+        with self.assertRaises(Exception):
+            extract_mapped_title(b"## Only h2\n\ntext # not a title")
+
+    def test_map_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'wb') as f:
+                f.write("# Tïtle\n\nBody".encode())
+            with map_file(path) as buffer:
+                self.assertEqual(extract_mapped_title(buffer), "Tïtle")
+                self.assertEqual(list(iter_mapped_blocks(buffer)), list(iter_blocks("# Tïtle\n\nBody")))
+
+            open(path, 'w').close()
+            with map_file(path) as buffer:
+                self.assertEqual(list(iter_mapped_blocks(buffer)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
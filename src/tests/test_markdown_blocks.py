@@ -1,8 +1,15 @@
 import unittest
+import markdown_blocks
+from htmlnode import LeafNode, ParentNode
 from markdown_blocks import (
+    BlockType,
+    iter_blocks,
+    iter_block_spans,
     markdown_to_blocks,
     block_to_block_type,
-    markdown_to_html_node
+    block_to_html_node,
+    markdown_to_html_node,
+    register_block_type,
 )
 
 
@@ -38,8 +45,67 @@ Block 3"""
         self.assertEqual(blocks[1], "Block 2")
         self.assertEqual(blocks[2], "Block 3")
 
+    def test_markdown_to_blocks_code_fence_with_blank_lines(self):
+        markdown = """Intro
+
+```
+first
+
+second
+```
+
+Outro"""
+        blocks = markdown_to_blocks(markdown)
+        self.assertEqual(blocks, ["Intro", "```\nfirst\n\nsecond\n```", "Outro"])
+
+    def test_markdown_to_blocks_unclosed_code_fence(self):
+        markdown = "```\nnever closed\n\nParagraph\n\n# Heading"
+        blocks = markdown_to_blocks(markdown)
+        self.assertEqual(blocks, ["```\nnever closed", "Paragraph", "# Heading"])
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_iter_blocks_classifies(self):
+        markdown = "# Title\n\n* one\n* two\n\n1. a\n2. b\n\n>quote\n\ntext"
+        self.assertEqual(
+            list(iter_blocks(markdown)),
+            [
+                ("heading", "# Title"),
+                ("unordered_list", "* one\n* two"),
+                ("ordered_list", "1. a\n2. b"),
+                ("quote", ">quote"),
+                ("paragraph", "text"),
+            ],
+        )
+
+    def test_iter_blocks_from_lines(self):
+        lines = ["# Title\n", "\n", "para\n", "graph\n"]
+        self.assertEqual(
+            list(iter_blocks(lines)),
+            [("heading", "# Title"), ("paragraph", "para\ngraph")],
+        )
+
+    def test_iter_block_spans_match_iter_blocks(self):
+        for markdown in (
+            "  # Title  \n\n* one\n* two\n\n\n>quote\n \ntext",
+            "```\ncode\n\nmore\n```\n\nafter",
+            "```\nunclosed\n\nfence",
+            "",
+        ):
+            with self.subTest(markdown=markdown):
+                spans = [(block_type, markdown[start:end])
+                         for block_type, start, end in iter_block_spans(markdown)]
+                self.assertEqual(spans, list(iter_blocks(markdown)))
+
 
 class TestBlockToBlockType(unittest.TestCase):
+    def test_codeblock_is_escaped(self):
+        node = markdown_to_html_node("```\nif a < b && c:\n    print(\"<p>\")\n```")
+        self.assertEqual(
+            node.to_html(),
+            '<div><pre><code>if a &lt; b &amp;&amp; c:\n    print("&lt;p&gt;")\n</code></pre></div>',
+        )
+
     def test_heading(self):
         self.assertEqual(block_to_block_type("# Heading 1"), "heading")
         self.assertEqual(block_to_block_type("## Heading 2"), "heading")
@@ -61,6 +127,14 @@ class TestBlockToBlockType(unittest.TestCase):
     def test_paragraph(self):
         self.assertEqual(block_to_block_type("Just a paragraph"), "paragraph")
 
+    def test_near_misses_are_paragraphs(self):
+        self.assertEqual(block_to_block_type("#no space"), "paragraph")
+        self.assertEqual(block_to_block_type("```\nunclosed"), "paragraph")
+        self.assertEqual(block_to_block_type(">quote\nplain"), "paragraph")
+        self.assertEqual(block_to_block_type("- item\nplain"), "paragraph")
+        self.assertEqual(block_to_block_type("1. item\nplain"), "paragraph")
+        self.assertEqual(block_to_block_type("1.5 million"), "paragraph")
+
 
 class TestMarkdownToHtmlNode(unittest.TestCase):
     def test_paragraphs(self):
@@ -173,6 +247,53 @@ def hello():
         self.assertIn("<pre><code>", html)
         self.assertIn("<blockquote>", html)
 
+    def test_codeblock_with_blank_line(self):
+        md = "```\nline one\n\nline three\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>line one\n\nline three\n</code></pre></div>",
+        )
+
+
+class TestBlockRegistry(unittest.TestCase):
+    def setUp(self):
+        converters = dict(markdown_blocks.BLOCK_CONVERTERS)
+        matchers = list(markdown_blocks._BLOCK_MATCHERS)
+
+        def restore():
+            markdown_blocks.BLOCK_CONVERTERS.clear()
+            markdown_blocks.BLOCK_CONVERTERS.update(converters)
+            markdown_blocks._BLOCK_MATCHERS[:] = matchers
+        self.addCleanup(restore)
+
+    def test_block_types_are_enum_members(self):
+        block_type = block_to_block_type("# Heading")
+        self.assertIs(block_type, BlockType.HEADING)
+        self.assertEqual(block_type, "heading")
+
+    def test_register_new_block_type(self):
+        register_block_type(
+            "note",
+            lambda block: ParentNode("aside", [LeafNode(None, block[4:])]),
+            lambda block: block.startswith("!!! "),
+        )
+        self.assertEqual(block_to_block_type("!!! Careful"), "note")
+        html = markdown_to_html_node("Intro\n\n!!! Careful").to_html()
+        self.assertEqual(html, "<div><p>Intro</p><aside>Careful</aside></div>")
+
+    def test_replace_builtin_converter(self):
+        register_block_type(BlockType.CODE, lambda block: LeafNode("samp", block.strip("`\n")))
+        self.assertEqual(markdown_to_html_node("```\nx\n```").to_html(), "<div><samp>x</samp></div>")
+
+    def test_new_block_type_needs_matcher(self):
+        with self.assertRaises(ValueError):
+            register_block_type("note", lambda block: LeafNode(None, block))
+
+    def test_unknown_block_type(self):
+        with self.assertRaises(ValueError):
+            block_to_html_node("table", "| a |")
+
 
 if __name__ == "__main__":
     unittest.main()
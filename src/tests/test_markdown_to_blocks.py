@@ -1,5 +1,5 @@
 import unittest
-from inline_markdown import markdown_to_blocks
+from markdown_blocks import markdown_to_blocks
 
 
 class TestMarkdownToBlocks(unittest.TestCase):
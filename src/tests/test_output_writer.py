@@ -0,0 +1,131 @@
+import os
+import tempfile
+import unittest
+from collections import Counter
+from unittest import mock
+from main import generate_pages_recursive
+from output_writer import BUFFER_SIZE, AtomicOutput, make_dirs
+
+
+class TestAtomicOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "page.html")
+
+    def _write(self, text, counters=None):
+        with AtomicOutput(self.path, counters) as out:
+            out.write(text)
+
+    def _read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_writes_new_file(self):
+        counters = Counter()
+        self._write("<p>new</p>", counters)
+        self.assertEqual(self._read(), "<p>new</p>")
+        self.assertEqual(counters, Counter(output_written=1))
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_identical_output_is_not_rewritten(self):
+        self._write("<p>same</p>")
+        os.utime(self.path, ns=(0, 0))
+        counters = Counter()
+        self._write("<p>same</p>", counters)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertEqual(counters, Counter(output_unchanged=1))
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_changed_output_of_same_size_is_replaced(self):
+        self._write("<p>aaa</p>")
+        os.utime(self.path, ns=(0, 0))
+        self._write("<p>bbb</p>")
+        self.assertEqual(self._read(), "<p>bbb</p>")
+        self.assertNotEqual(os.stat(self.path).st_mtime_ns, 0)
+
+    def test_unchanged_output_creates_no_temporary_file(self):
+        self._write("<p>same</p>")
+        with mock.patch("builtins.open", wraps=open) as opened:
+            self._write("<p>same</p>")
+        self.assertEqual([call.args[1] for call in opened.call_args_list], ['rb'])
+
+    def test_changed_size_is_not_read(self):
+        self._write("<p>old</p>")
+        with mock.patch("builtins.open", wraps=open) as opened:
+            self._write("<p>longer</p>")
+        self.assertEqual([call.args[1] for call in opened.call_args_list], ['wb'])
+        self.assertEqual(self._read(), "<p>longer</p>")
+
+    def test_large_outputs_are_compared_in_chunks(self):
+        page = "".join(f"<p>{i}</p>" for i in range(3 * BUFFER_SIZE // 8))
+        self._write(page)
+        for changed in (page, page[:-1] + "!", "X" + page[1:], page[:BUFFER_SIZE * 2], page + "tail",
+                        page.replace("<p>20000</p>", "<p>2000!</p>")):
+            counters = Counter()
+            with AtomicOutput(self.path, counters) as out:
+                for i in range(0, len(changed), 1000):
+                    out.write(changed[i:i + 1000])
+            self.assertEqual(self._read(), changed)
+            outcome = "output_unchanged" if changed == page else "output_written"
+            self.assertEqual(counters, Counter({outcome: 1}))
+            self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+            self._write(page)
+
+    def test_deleted_directory_is_recreated(self):
+        # As when the directory was deleted after the renderer created it
+        path = os.path.join(self.tmp.name, "gone", "page.html")
+        with AtomicOutput(path) as out:
+            out.write("<p>new</p>")
+        with open(path) as f:
+            self.assertEqual(f.read(), "<p>new</p>")
+
+    def test_error_leaves_destination_untouched(self):
+        self._write("<p>old</p>")
+        with self.assertRaises(RuntimeError):
+            with AtomicOutput(self.path) as out:
+                out.write("<p>half")
+                raise RuntimeError("render failed")
+        self.assertEqual(self._read(), "<p>old</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+
+class TestMakeDirs(unittest.TestCase):
+    def test_creates_each_directory_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, *parts) for parts in
+                     (("a", "b", "x.html"), ("a", "b", "y.html"), ("a", "z.html"), ("top.html",))]
+            known = set()
+            with mock.patch("os.makedirs", wraps=os.makedirs) as makedirs:
+                make_dirs(paths, known)
+                make_dirs(paths, known)
+            self.assertEqual(makedirs.call_count, 3)
+            self.assertTrue(os.path.isdir(os.path.join(tmp, "a", "b")))
+
+
+class TestRebuild(unittest.TestCase):
+    def test_rebuild_keeps_unchanged_pages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            dest = os.path.join(tmp, "docs")
+            template = os.path.join(tmp, "template.html")
+            with open(template, 'w') as f:
+                f.write("{{ Title }}{{ Content }}")
+            for name in ("a", "b"):
+                os.makedirs(os.path.join(content, name))
+                with open(os.path.join(content, name, "index.md"), 'w') as f:
+                    f.write(f"# {name}\n\ntext")
+
+            generate_pages_recursive(content, template, dest)
+            for name in ("a", "b"):
+                os.utime(os.path.join(dest, name, "index.html"), ns=(0, 0))
+            with open(os.path.join(content, "b", "index.md"), 'w') as f:
+                f.write("# b\n\nchanged")
+            generate_pages_recursive(content, template, dest)
+
+            self.assertEqual(os.stat(os.path.join(dest, "a", "index.html")).st_mtime_ns, 0)
+            self.assertNotEqual(os.stat(os.path.join(dest, "b", "index.html")).st_mtime_ns, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import ParentNode, LeafNode
 
@@ -90,6 +91,31 @@ class TestParentNode(unittest.TestCase):
             "<div><p><b>Bold</b><i>Italic</i></p><span>Span text</span></div>",
         )
 
+    def test_write_html_streams_to_file_like(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+            LeafNode("span", "tail", {"class": "x"}),
+        ])
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+        self.assertEqual(
+            out.getvalue(),
+            '<div><p><b>Bold</b> text</p><span class="x">tail</span></div>',
+        )
+
+    def test_to_html_wide_tree(self):
+        items = [ParentNode("li", [LeafNode(None, str(i))]) for i in range(5000)]
+        html = ParentNode("ul", items).to_html()
+        self.assertTrue(html.startswith("<ul><li>0</li><li>1</li>"))
+        self.assertTrue(html.endswith("<li>4999</li></ul>"))
+
+    def test_write_html_error_before_output(self):
+        out = io.StringIO()
+        with self.assertRaises(ValueError):
+            ParentNode("div", None).write_html(out)
+        self.assertEqual(out.getvalue(), "")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,129 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+import markdown_blocks
+from htmlnode import LeafNode
+from markdown_blocks import BlockType, has_block_plugins, register_block_type
+from page_renderer import PageRenderer
+from parse_cache import ParseCache, parser_version
+from template import Template
+
+
+MARKDOWN = "# Title\n\nSee [home](/) and ![pic](/images/a.png).\n"
+TEMPLATE = '<title>{{ Title }}</title><link href="/index.css" />{{ Content }}'
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = ParseCache(os.path.join(self.tmp.name, "pages"), version="v1")
+
+    def test_put_get_roundtrip(self):
+        key = self.cache.key(b"# Title")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "Title", "<div>\n<p>x</p>\r\n</div>")
+        self.assertEqual(self.cache.get(key), ("Title", "<div>\n<p>x</p>\r\n</div>"))
+
+    def test_key_depends_on_version_and_content(self):
+        other = ParseCache(self.cache.directory, version="v2")
+        self.assertNotEqual(self.cache.key(b"a"), other.key(b"a"))
+        self.assertNotEqual(self.cache.key(b"a"), self.cache.key(b"b"))
+        self.assertEqual(self.cache.key(b"a"), self.cache.key(b"a"))
+
+    def test_parser_version_is_stable(self):
+        self.assertEqual(parser_version(), parser_version())
+
+    def test_prune_by_age(self):
+        old_key, new_key = self.cache.key(b"old"), self.cache.key(b"new")
+        self.cache.put(old_key, "Old", "<p>old</p>")
+        self.cache.put(new_key, "New", "<p>new</p>")
+        past = time.time() - 3600
+        os.utime(self.cache._path(old_key), (past, past))
+        self.assertEqual(self.cache.prune(max_age=60)[0], 1)
+        self.assertIsNone(self.cache.get(old_key))
+        self.assertIsNotNone(self.cache.get(new_key))
+
+    def test_prune_by_size_drops_least_recently_used(self):
+        keys = [self.cache.key(bytes([i])) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, "T", "x" * 100)
+            os.utime(self.cache._path(key), (1000 + i, 1000 + i))
+        removed, freed = self.cache.prune(max_bytes=150)
+        self.assertEqual(removed, 2)
+        self.assertEqual(freed, 2 * 102)
+        self.assertIsNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+
+class TestPageRendererParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = ParseCache(os.path.join(self.tmp.name, "pages"))
+        self.src = os.path.join(self.tmp.name, "index.md")
+        with open(self.src, 'w') as f:
+            f.write(MARKDOWN)
+
+    def _generate(self, renderer):
+        dest = os.path.join(self.tmp.name, "out", "index.html")
+        renderer.generate(self.src, dest)
+        with open(dest) as f:
+            return f.read()
+
+    def test_cached_output_matches_uncached(self):
+        for basepath in ("/", "/base/"):
+            template = Template(TEMPLATE, basepath)
+            expected = PageRenderer(template).render_page(MARKDOWN)
+            renderer = PageRenderer(template, parse_cache=self.cache)
+            self.assertEqual(self._generate(renderer), expected)
+            self.assertEqual(self._generate(renderer), expected)
+        self.assertEqual(renderer.stats()["parse_hits"], 2)
+
+    def test_nul_in_markdown_is_not_taken_for_the_basepath(self):
+        markdown = "# Title\n\nA \x00 byte and [home](/)\n"
+        with open(self.src, 'w') as f:
+            f.write(markdown)
+        template = Template(TEMPLATE, "/base/")
+        expected = PageRenderer(template).render_page(markdown)
+        self.assertIn("A \x00 byte", expected)
+        for block_cache_bytes in (0, 1 << 20):
+            renderer = PageRenderer(template, parse_cache=self.cache, block_cache_bytes=block_cache_bytes)
+            self.assertEqual(self._generate(renderer), expected)
+            self.assertEqual(self._generate(renderer), expected)
+            self.assertEqual(renderer.stats()["parse_hits"], 0)
+
+    def test_block_plugins_bypass_the_cache(self):
+        template = Template(TEMPLATE, "/base/")
+        self._generate(PageRenderer(template, parse_cache=self.cache))
+        converters = dict(markdown_blocks.BLOCK_CONVERTERS)
+
+        def restore():
+            markdown_blocks.BLOCK_CONVERTERS.clear()
+            markdown_blocks.BLOCK_CONVERTERS.update(converters)
+        self.addCleanup(restore)
+        register_block_type(BlockType.PARAGRAPH, lambda block: LeafNode("aside", block))
+
+        self.assertTrue(has_block_plugins())
+        renderer = PageRenderer(template, parse_cache=self.cache, block_cache_bytes=1 << 20)
+        html = self._generate(renderer)
+        self.assertEqual(html, PageRenderer(template).render_page(MARKDOWN))
+        self.assertIn("<aside>See [home](/) and", html)
+        self.assertEqual(renderer.stats()["parse_hits"], 0)
+        restore()
+        self.assertFalse(has_block_plugins())
+
+    def test_basepath_change_reuses_entry(self):
+        self._generate(PageRenderer(Template(TEMPLATE, "/"), parse_cache=self.cache))
+        renderer = PageRenderer(Template(TEMPLATE, "/base/"), parse_cache=self.cache, block_cache_bytes=1 << 20)
+        html = self._generate(renderer)
+        self.assertEqual(renderer.stats()["parse_hits"], 1)
+        self.assertEqual(renderer.stats()["parse_misses"], 0)
+        self.assertIn('<a href="/base/">home</a>', html)
+        self.assertIn('<link href="/base/index.css" />', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
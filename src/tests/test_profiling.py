@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+import markdown_blocks
+import profiling
+from main import generate_pages_recursive
+from page_renderer import PageRenderer
+from profiling import Profiler, STAGES
+
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, 'w') as f:
+            f.write(TEMPLATE)
+        for name in ("a", "b", "c"):
+            path = os.path.join(self.content, name, "index.md")
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(f"# Page {name}\n\nSome **bold** text.\n\n- one\n- two\n")
+
+    def _install(self):
+        profiler = Profiler().install()
+        self.addCleanup(profiler.uninstall)
+        return profiler
+
+    def test_off_by_default(self):
+        self.assertIsNone(profiling.current())
+        with profiling.stage("walk"):
+            pass
+
+    def test_uninstall_restores_functions(self):
+        originals = (PageRenderer.generate, markdown_blocks.iter_blocks, markdown_blocks.text_to_textnodes)
+        profiler = Profiler().install()
+        self.assertIs(profiling.current(), profiler)
+        self.assertIsNot(markdown_blocks.iter_blocks, originals[1])
+        profiler.uninstall()
+        self.assertIsNone(profiling.current())
+        self.assertEqual(
+            (PageRenderer.generate, markdown_blocks.iter_blocks, markdown_blocks.text_to_textnodes),
+            originals,
+        )
+
+    def test_records_stages_per_page(self):
+        profiler = self._install()
+        dest = os.path.join(self.tmp.name, "docs")
+        generate_pages_recursive(self.content, self.template, dest)
+
+        self.assertEqual(len(profiler.pages), 3)
+        for name in ("walk", "read", "block_split", "block_classify", "inline_parse", "template", "write"):
+            self.assertGreater(profiler.stages[name][0], 0, name)
+        for page in profiler.pages:
+            stage_wall = sum(wall for wall, _ in page["stages"].values())
+            self.assertEqual(stage_wall, page["wall"])
+        with open(os.path.join(dest, "a", "index.html")) as f:
+            self.assertIn("<b>bold</b>", f.read())
+
+    def test_parallel_workers_report_timings(self):
+        profiler = self._install()
+        generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, "docs"), jobs=2)
+        self.assertEqual(len(profiler.pages), 3)
+        self.assertGreater(profiler.stages["inline_parse"][0], 0)
+
+    def test_report_and_export(self):
+        profiler = self._install()
+        generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, "docs"))
+        profiler.uninstall()
+
+        lines = profiler.report(top=2)
+        self.assertTrue(lines[0].startswith("Profile: 3 pages"))
+        self.assertEqual(lines[2 + len(STAGES)], "Slowest 2 pages:")
+
+        with mock.patch("os.replace", wraps=os.replace) as replace:
+            profile_path, trace_path = profiler.export(os.path.join(self.tmp.name, "profile"))
+        # Written through per-process temporary files, as concurrent shards export too
+        self.assertEqual([call.args for call in replace.call_args_list],
+                         [(f"{path}.{os.getpid()}.tmp", path) for path in (profile_path, trace_path)])
+        self.assertEqual(sorted(os.listdir(os.path.dirname(profile_path))), ["profile.json", "trace.json"])
+        with open(profile_path) as f:
+            data = json.load(f)
+        self.assertEqual(set(data["site"]), set(STAGES))
+        self.assertEqual(len(data["pages"]), 3)
+        with open(trace_path) as f:
+            events = json.load(f)["traceEvents"]
+        self.assertEqual(sum(1 for event in events if event["args"].get("stage") == "page"), 3)
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from markdown_blocks import markdown_to_html_node
+from render_cache import BlockCache, cached_markdown_to_html_node, ENTRY_OVERHEAD
+from template import rebase_urls
+
+
+MARKDOWN = """# Title
+
+A paragraph with a [link](/about) and **bold** text.
+
+- one
+- two
+
+A paragraph with a [link](/about) and **bold** text."""
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_output_matches_uncached(self):
+        cache = BlockCache(1024 * 1024)
+        self.assertEqual(
+            cached_markdown_to_html_node(MARKDOWN, cache).to_html(),
+            markdown_to_html_node(MARKDOWN).to_html(),
+        )
+
+    def test_cached_html_is_not_escaped_twice(self):
+        markdown = "# A & B\n\nx < y and [link](/a?b=1&c=2)"
+        cache = BlockCache(1024 * 1024)
+        for _ in range(2):
+            self.assertEqual(
+                cached_markdown_to_html_node(markdown, cache).to_html(),
+                markdown_to_html_node(markdown).to_html(),
+            )
+
+    def test_repeated_blocks_hit(self):
+        cache = BlockCache(1024 * 1024)
+        cached_markdown_to_html_node(MARKDOWN, cache)
+        self.assertEqual(cache.stats(), (1, 3))
+        cached_markdown_to_html_node(MARKDOWN, cache)
+        self.assertEqual(cache.stats(), (5, 3))
+
+    def test_key_includes_block_type(self):
+        self.assertNotEqual(
+            BlockCache.key("paragraph", "text"),
+            BlockCache.key("heading", "text"),
+        )
+
+    def test_basepath_is_applied_before_caching(self):
+        cache = BlockCache(1024 * 1024, "/base/")
+        expected = rebase_urls(markdown_to_html_node(MARKDOWN), "/base/").to_html()
+        self.assertEqual(cached_markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(cached_markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+
+    def test_evicts_least_recently_used(self):
+        cache = BlockCache(2 * (ENTRY_OVERHEAD + 100))
+        cache.put(b"a", "a")
+        cache.put(b"b", "b")
+        self.assertEqual(cache.get(b"a"), "a")
+        cache.put(b"c", "c")
+        self.assertIsNone(cache.get(b"b"))
+        self.assertEqual(cache.get(b"a"), "a")
+        self.assertEqual(cache.get(b"c"), "c")
+        self.assertLessEqual(cache.size, cache.max_bytes)
+
+    def test_oversized_entry_is_not_stored(self):
+        cache = BlockCache(ENTRY_OVERHEAD)
+        cache.put(b"big", "x" * 1000)
+        self.assertIsNone(cache.get(b"big"))
+        self.assertEqual(cache.size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from sharding import Shard, shard_index, verify_shards
+
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+class TestShard(unittest.TestCase):
+    def test_shard_index_is_stable(self):
+        # Fixed values: every machine and Python process must agree
+        self.assertEqual(
+            [shard_index(path, 7) for path in ("index.md", "blog/post/index.md", "a/b/c.md")],
+            [2, 1, 3],
+        )
+
+    def test_every_page_has_exactly_one_shard(self):
+        shards = [Shard(index, 4) for index in range(1, 5)]
+        for i in range(500):
+            path = os.path.join("content", f"dir{i % 7}", f"page{i}.md")
+            self.assertEqual(sum(shard.owns(path, "content") for shard in shards), 1)
+
+    def test_parse(self):
+        shard = Shard.parse("2/5")
+        self.assertEqual((shard.index, shard.count, str(shard)), (2, 5, "2/5"))
+        self.assertFalse(shard.copies_static)
+        self.assertTrue(Shard.parse("1/1").copies_static)
+        for text in ("0/3", "4/3", "1/0", "1", "a/b", "1/2/3"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                Shard.parse(text)
+
+    def test_manifest_path(self):
+        self.assertEqual(Shard(2, 3).manifest_path(os.path.join("c", "manifest.json")),
+                         os.path.join("c", "manifest-shard-2-of-3.json"))
+
+
+class TestVerifyShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.shard_dir = os.path.join(self.tmp.name, "shards")
+        self.pages = [os.path.join(self.dest, name, "index.html") for name in ("a", "b", "c")]
+        for path in self.pages + [os.path.join(self.dest, "style.css")]:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'w').close()
+
+    def _report(self, index, pages, static=None, settings=None):
+        Shard(index, 2).write_report(self.dest, pages, static, settings or {"basepath": "/"}, self.shard_dir)
+
+    def test_complete(self):
+        self._report(1, self.pages[:1], [os.path.join(self.dest, "style.css")])
+        self._report(2, self.pages[1:])
+        self.assertEqual(verify_shards(2, self.pages, self.dest, self.shard_dir), [])
+
+    def test_problems(self):
+        self._report(1, self.pages[:2], [os.path.join(self.dest, "missing.css")])
+        self._report(2, self.pages[1:2], settings={"basepath": "/other/"})
+        with open(Shard(2, 2).report_path(self.shard_dir)) as f:
+            self.assertEqual(json.load(f)["pages"], ["b/index.html"])
+
+        problems = verify_shards(2, self.pages, self.dest, self.shard_dir)
+        self.assertEqual(problems, [
+            "Shards were built with different settings",
+            "b/index.html: rendered by shards 1, 2",
+            "c/index.html: not rendered by any shard",
+            "missing.css: missing from " + self.dest,
+        ])
+
+    def test_missing_report(self):
+        self._report(1, self.pages, [])
+        problems = verify_shards(2, self.pages, self.dest, self.shard_dir)
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith("Shard 2/2: no report"))
+
+
+class TestShardedBuild(unittest.TestCase):
+    """Runs several shards as separate processes against one checkout."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        with open(os.path.join(self.root, "template.html"), 'w') as f:
+            f.write('<title>{{ Title }}</title><link href="/style.css">{{ Content }}')
+        os.makedirs(os.path.join(self.root, "static", "images"))
+        for name in ("style.css", os.path.join("images", "a.png")):
+            with open(os.path.join(self.root, "static", name), 'w') as f:
+                f.write(name)
+        for i in range(30):
+            path = os.path.join(self.root, "content", f"section{i % 4}", f"page{i}", "index.md")
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(f"# Page {i}\n\n[Home](/) and **bold** text.\n")
+
+    def _main(self, *args):
+        return subprocess.run([sys.executable, MAIN, *args], cwd=self.root, capture_output=True, text=True)
+
+    def _read_tree(self, root):
+        result = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, 'rb') as f:
+                    result[os.path.relpath(path, root)] = f.read()
+        return result
+
+    def test_shards_together_match_a_full_build(self):
+        self.assertEqual(self._main("/base/").returncode, 0)
+        expected = self._read_tree(os.path.join(self.root, "docs"))
+        shutil.rmtree(os.path.join(self.root, "docs"))
+
+        processes = [
+            subprocess.Popen([sys.executable, MAIN, "/base/", "--shard", f"{i}/3"], cwd=self.root,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            for i in range(1, 4)
+        ]
+        for process in processes:
+            _, stderr = process.communicate()
+            self.assertEqual(process.returncode, 0, stderr)
+
+        verify = self._main("--verify-shards", "3")
+        self.assertEqual(verify.returncode, 0, verify.stdout + verify.stderr)
+        self.assertEqual(self._read_tree(os.path.join(self.root, "docs")), expected)
+
+        os.remove(os.path.join(self.root, "docs", "section1", "page1", "index.html"))
+        verify = self._main("--verify-shards", "3")
+        self.assertNotEqual(verify.returncode, 0)
+        self.assertIn("section1/page1/index.html: missing", verify.stdout)
+
+    def test_clean_is_refused(self):
+        result = self._main("--shard", "1/2", "--clean")
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("--clean cannot be combined with --shard", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from main import collect_page_tasks, generate_pages_recursive
+from manifest import BuildManifest
+from site_index import SiteIndex, index_markdown, page_url
+
+
+PAGE = """# Home
+
+Read [the post](/blog/post) and ![a cat](/images/cat.png).
+
+## Section *one*
+
+```
+[not a link](/code)
+```
+
+- [Contact](/contact/#form)
+"""
+
+
+class TestIndexMarkdown(unittest.TestCase):
+    def test_records_title_headings_links_and_images(self):
+        entry = index_markdown(PAGE)
+        self.assertEqual(entry["title"], "Home")
+        self.assertEqual(entry["headings"], [[1, "Home"], [2, "Section *one*"]])
+        self.assertEqual(entry["links"], [["the post", "/blog/post"], ["Contact", "/contact/#form"]])
+        self.assertEqual(entry["images"], [["a cat", "/images/cat.png"]])
+
+    def test_page_without_title(self):
+        self.assertIsNone(index_markdown("Just text")["title"])
+
+    def test_page_url(self):
+        self.assertEqual(page_url("docs/index.html", "docs"), "/")
+        self.assertEqual(page_url("docs/blog/post/index.html", "docs"), "/blog/post/")
+        self.assertEqual(page_url("docs/notes.html", "docs"), "/notes.html")
+
+
+class TestSiteIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.path = os.path.join(self.tmp.name, "cache", "site_index.json")
+        self._write("index.md", PAGE)
+        self._write("blog/post/index.md", "# Post\n\n[Home](/)")
+
+    def _write(self, name, text):
+        path = os.path.join(self.content, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def _update(self, index=None):
+        index = index or SiteIndex.load(self.path, version="v1")
+        index.update(collect_page_tasks(self.content, self.dest), self.dest)
+        index.save()
+        return index
+
+    def test_queries(self):
+        index = self._update()
+        self.assertEqual(index.titles(), {"/": "Home", "/blog/post/": "Post"})
+        self.assertEqual(index.title(os.path.join(self.content, "index.md")), "Home")
+        self.assertEqual(index.backlinks("/blog/post/"), ["/"])
+        self.assertEqual(index.backlinks("/contact"), ["/"])
+        self.assertEqual(index.backlinks("/"), ["/blog/post/"])
+        self.assertEqual(index.assets(), {"/images/cat.png"})
+
+    def test_unchanged_files_are_not_reindexed(self):
+        self._update()
+        index = self._update()
+        self.assertEqual((index.indexed, index.reused), (0, 2))
+
+        path = os.path.join(self.content, "blog", "post", "index.md")
+        self._write("blog/post/index.md", "# Renamed post\n")
+        os.utime(path, ns=(0, 0))
+        index = self._update()
+        self.assertEqual((index.indexed, index.reused), (1, 1))
+        self.assertEqual(index.titles()["/blog/post/"], "Renamed post")
+
+    def test_saved_through_a_per_process_file(self):
+        index = SiteIndex(self.path)
+        index.update(collect_page_tasks(self.content, self.dest), self.dest)
+        with mock.patch("os.replace", wraps=os.replace) as replace:
+            index.save()
+        replace.assert_called_once_with(f"{self.path}.{os.getpid()}.tmp", self.path)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["site_index.json"])
+
+    def test_deleted_pages_are_dropped(self):
+        self._update()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.assertEqual(list(self._update().titles()), ["/"])
+
+    def test_parser_change_discards_entries(self):
+        self._update()
+        index = self._update(SiteIndex.load(self.path, version="v2"))
+        self.assertEqual((index.indexed, index.reused), (2, 0))
+
+    def test_built_with_pages(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        with open(template, 'w') as f:
+            f.write("{{ Title }}{{ Content }}")
+        index = SiteIndex(self.path)
+        generate_pages_recursive(self.content, template, self.dest, site_index=index)
+        self.assertEqual(index.titles(), {"/": "Home", "/blog/post/": "Post"})
+
+    def test_build_reads_titles_and_hashes_from_the_index(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        with open(template, 'w') as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        generate_pages_recursive(self.content, template, self.dest, manifest=manifest)
+
+        self._write("index.md", PAGE.replace("Read", "Now read"))
+        with mock.patch("page_renderer.extract_title", side_effect=AssertionError("title scanned")), \
+                mock.patch("manifest.hash_file", side_effect=AssertionError("file hashed")):
+            generate_pages_recursive(self.content, template, self.dest, manifest=manifest,
+                                     site_index=SiteIndex(self.path))
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertTrue(f.read().startswith("<title>Home</title><div><h1>Home</h1><p>Now read"))
+
+
+if __name__ == "__main__":
+    unittest.main()
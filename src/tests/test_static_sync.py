@@ -0,0 +1,141 @@
+import os
+import tempfile
+import unittest
+from static_sync import StaticSync, copy_file_data, format_bytes, remove_stale_files, transfer_file
+
+
+class TestStaticSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self._write(os.path.join(self.src, "index.css"), "body {}")
+        self._write(os.path.join(self.src, "images", "a.png"), "png" * 100)
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def _read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_first_sync_copies_everything(self):
+        report = StaticSync().sync(self.src, self.dest)
+        self.assertEqual((report.copied, report.skipped), (2, 0))
+        self.assertEqual(report.bytes_copied, 307)
+        self.assertEqual(self._read(os.path.join(self.dest, "images", "a.png")), "png" * 100)
+
+    def test_unchanged_files_are_skipped(self):
+        StaticSync().sync(self.src, self.dest)
+        report = StaticSync().sync(self.src, self.dest)
+        self.assertEqual((report.copied, report.skipped), (0, 2))
+        self.assertEqual(report.bytes_skipped, 307)
+
+    def test_changed_file_is_copied(self):
+        StaticSync().sync(self.src, self.dest)
+        self._write(os.path.join(self.src, "index.css"), "body { color: red }")
+        report = StaticSync().sync(self.src, self.dest)
+        self.assertEqual((report.copied, report.skipped), (1, 1))
+        self.assertEqual(self._read(os.path.join(self.dest, "index.css")), "body { color: red }")
+
+    def test_checksum_ignores_mtime(self):
+        StaticSync().sync(self.src, self.dest)
+        os.utime(os.path.join(self.src, "index.css"), ns=(0, 0))
+        self.assertEqual(StaticSync(checksum=True).sync(self.src, self.dest).copied, 0)
+        self.assertEqual(StaticSync().sync(self.src, self.dest).copied, 1)
+
+    def test_outputs_are_recorded(self):
+        syncer = StaticSync()
+        syncer.sync(self.src, self.dest)
+        self.assertEqual(syncer.outputs, {
+            os.path.normpath(os.path.join(self.dest, "index.css")),
+            os.path.normpath(os.path.join(self.dest, "images", "a.png")),
+        })
+
+    def test_parallel_sync_matches_serial(self):
+        for i in range(20):
+            self._write(os.path.join(self.src, "deep", str(i % 3), f"{i}.txt"), str(i) * i)
+        serial = os.path.join(self.tmp.name, "serial")
+        StaticSync(workers=1).sync(self.src, serial)
+        report = StaticSync(workers=4).sync(self.src, self.dest)
+        self.assertEqual(report.copied, 22)
+        for i in range(20):
+            rel_path = os.path.join("deep", str(i % 3), f"{i}.txt")
+            self.assertEqual(self._read(os.path.join(self.dest, rel_path)),
+                             self._read(os.path.join(serial, rel_path)))
+
+    def test_invalid_link_mode(self):
+        with self.assertRaises(ValueError):
+            StaticSync(link_mode="symlink")
+
+
+class TestTransferFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.src = os.path.join(self.tmp.name, "src.txt")
+        self.dest = os.path.join(self.tmp.name, "dest.txt")
+        with open(self.src, 'w') as f:
+            f.write("data")
+        with open(self.dest, 'w') as f:
+            f.write("old")
+
+    def test_copy_preserves_mtime(self):
+        os.utime(self.src, ns=(1_000_000_000, 1_000_000_000))
+        self.assertEqual(transfer_file(self.src, self.dest), "copy")
+        self.assertEqual(os.stat(self.dest).st_mtime_ns, 1_000_000_000)
+        self.assertFalse(os.path.samefile(self.src, self.dest))
+
+    def test_hardlink(self):
+        method = transfer_file(self.src, self.dest, "hardlink")
+        if method == "hardlink":
+            self.assertTrue(os.path.samefile(self.src, self.dest))
+        with open(self.dest) as f:
+            self.assertEqual(f.read(), "data")
+
+    def test_reflink_falls_back_to_copy(self):
+        self.assertIn(transfer_file(self.src, self.dest, "reflink"), ("reflink", "copy"))
+        with open(self.dest) as f:
+            self.assertEqual(f.read(), "data")
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["dest.txt", "src.txt"])
+
+
+class TestCopyFileData(unittest.TestCase):
+    def test_copies_large_and_empty_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in (0, 3 * 1024 * 1024 + 7):
+                src = os.path.join(tmp, "src.bin")
+                dest = os.path.join(tmp, "dest.bin")
+                data = os.urandom(size)
+                with open(src, 'wb') as f:
+                    f.write(data)
+                copy_file_data(src, dest)
+                with open(dest, 'rb') as f:
+                    self.assertEqual(f.read(), data)
+
+
+class TestRemoveStaleFiles(unittest.TestCase):
+    def test_removes_unknown_files_and_empty_dirs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            keep = os.path.join(tmp, "index.html")
+            stale = os.path.join(tmp, "old", "page.html")
+            os.makedirs(os.path.dirname(stale))
+            for path in (keep, stale):
+                open(path, 'w').close()
+            removed = remove_stale_files(tmp, {os.path.normpath(keep)})
+            self.assertEqual(removed, [stale])
+            self.assertEqual(os.listdir(tmp), ["index.html"])
+
+
+class TestFormatBytes(unittest.TestCase):
+    def test_format_bytes(self):
+        self.assertEqual(format_bytes(512), "512 B")
+        self.assertEqual(format_bytes(2048), "2.0 KB")
+        self.assertEqual(format_bytes(3 * 1024 * 1024), "3.0 MB")
+
+
+if __name__ == "__main__":
+    unittest.main()
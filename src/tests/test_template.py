@@ -0,0 +1,80 @@
+import io
+import unittest
+from htmlnode import LeafNode, ParentNode
+from template import Template, rebase_html, rebase_urls
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(
+            template.render("Hello", "<p>World</p>"),
+            "<title>Hello</title><body><p>World</p></body>",
+        )
+
+    def test_render_repeated_slot(self):
+        template = Template("{{ Title }} - {{ Title }}")
+        self.assertEqual(template.render("A", ""), "A - A")
+
+    def test_render_without_slots(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render("A", "B"), "<p>static</p>")
+
+    def test_basepath_applied_to_template_literals(self):
+        template = Template('<link href="/index.css" /><img src="/a.png" />{{ Content }}', "/base/")
+        self.assertEqual(
+            template.render("T", '<a href="/untouched">x</a>'),
+            '<link href="/base/index.css" /><img src="/base/a.png" /><a href="/untouched">x</a>',
+        )
+
+    def test_basepath_not_applied_to_slot_values(self):
+        template = Template("<title>{{ Title }}</title>", "/base/")
+        self.assertEqual(template.render('href="/x', ""), '<title>href="/x</title>')
+
+    def test_title_is_escaped(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        self.assertEqual(
+            template.render("Fish & <Chips>", "<p>x</p>"),
+            "<title>Fish &amp; &lt;Chips&gt;</title><p>x</p>",
+        )
+        out = io.StringIO()
+        template.write(out, "Fish & <Chips>", "<p>x</p>")
+        self.assertEqual(out.getvalue(), template.render("Fish & <Chips>", "<p>x</p>"))
+
+    def test_write_streams_node_content(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        node = ParentNode("div", [LeafNode("p", "World")])
+        out = io.StringIO()
+        template.write(out, "Hello", node)
+        self.assertEqual(out.getvalue(), template.render("Hello", node.to_html()))
+
+
+class TestRebase(unittest.TestCase):
+    def test_rebase_html(self):
+        self.assertEqual(
+            rebase_html('<a href="/a">x</a><a href="https://b">y</a>', "/base/"),
+            '<a href="/base/a">x</a><a href="https://b">y</a>',
+        )
+
+    def test_rebase_urls(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("a", "home", {"href": "/"})]),
+            LeafNode("img", "", {"src": "/images/a.png", "alt": "/not-a-url"}),
+            LeafNode("a", "ext", {"href": "https://example.com/"}),
+        ])
+        rebase_urls(node, "/base/")
+        self.assertEqual(
+            node.to_html(),
+            '<div><p><a href="/base/">home</a></p>'
+            '<img src="/base/images/a.png" alt="/not-a-url"></img>'
+            '<a href="https://example.com/">ext</a></div>',
+        )
+
+    def test_rebase_urls_root_basepath_is_noop(self):
+        node = LeafNode("a", "home", {"href": "/x"})
+        rebase_urls(node, "/")
+        self.assertEqual(node.props, {"href": "/x"})
+
+
+if __name__ == "__main__":
+    unittest.main()
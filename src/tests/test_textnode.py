@@ -38,6 +38,12 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("Text", TextType.TEXT, "https://www.boot.dev")
         self.assertNotEqual(node, node2)
 
+    def test_no_instance_dict(self):
+        node = TextNode("Text", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = 1
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,177 @@
+import os
+import tempfile
+import time
+import unittest
+import urllib.request
+from unittest import mock
+from watch import (
+    InotifyWatcher,
+    LiveReload,
+    PollingWatcher,
+    SiteBuilder,
+    inject_live_reload,
+    start_server,
+)
+
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+class WatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self._write(self.template, TEMPLATE)
+        self._write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self._write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nText")
+        self._write(os.path.join(self.static, "index.css"), "body {}")
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def _read(self, path):
+        with open(path) as f:
+            return f.read()
+
+
+class TestSiteBuilder(WatchTestCase):
+    def setUp(self):
+        super().setUp()
+        self.builder = SiteBuilder(self.content, self.static, self.template, self.docs)
+        self.builder.full_build()
+
+    def test_full_build(self):
+        self.assertIn("<h1>Home</h1>", self._read(os.path.join(self.docs, "index.html")))
+        self.assertIn("<h1>Post</h1>", self._read(os.path.join(self.docs, "blog", "post.html")))
+        self.assertEqual(self._read(os.path.join(self.docs, "index.css")), "body {}")
+
+    def test_changed_page_is_regenerated_alone(self):
+        index = os.path.join(self.content, "index.md")
+        self._write(index, "# Home\n\nUpdated")
+        updated = self.builder.apply({index})
+        self.assertEqual(updated, [os.path.join(self.docs, "index.html")])
+        self.assertIn("Updated", self._read(updated[0]))
+
+    def test_deleted_page_is_removed(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        os.remove(post)
+        self.builder.apply({post})
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "post.html")))
+
+    def test_deleted_content_directory_is_removed(self):
+        blog = os.path.join(self.content, "blog")
+        os.remove(os.path.join(blog, "post.md"))
+        os.rmdir(blog)
+        self.builder.apply({blog})
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_changed_static_file_is_copied(self):
+        css = os.path.join(self.static, "index.css")
+        self._write(css, "body { color: red }")
+        updated = self.builder.apply({css})
+        self.assertEqual(updated, [os.path.join(self.docs, "index.css")])
+        self.assertEqual(self._read(updated[0]), "body { color: red }")
+
+    def test_template_change_regenerates_every_page(self):
+        self._write(self.template, "<main>{{ Content }}</main>")
+        updated = self.builder.apply({self.template})
+        self.assertEqual(len(updated), 2)
+        self.assertTrue(self._read(os.path.join(self.docs, "blog", "post.html")).startswith("<main>"))
+
+    def test_static_file_shadowing_a_page_is_kept(self):
+        page = os.path.join(self.static, "blog", "post.html")
+        self._write(page, "static")
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.builder.apply({os.path.join(self.content, "blog", "post.md")})
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "post.html")))
+
+
+class TestWatchers(WatchTestCase):
+    def _check_watcher(self, watcher):
+        self.addCleanup(watcher.close)
+        index = os.path.join(self.content, "index.md")
+        new_page = os.path.join(self.content, "blog", "new.md")
+        time.sleep(0.01)
+        self._write(index, "# Changed")
+        self._write(new_page, "# New")
+        self._write(self.template, "<p>{{ Content }}</p>")
+        self._write(os.path.join(self.tmp.name, "ignored.txt"), "not watched")
+
+        changed = set()
+        deadline = time.monotonic() + 5
+        expected = {index, new_page, self.template}
+        while not expected <= changed and time.monotonic() < deadline:
+            changed |= watcher.wait(timeout=1)
+        self.assertEqual(changed, expected)
+
+    def test_polling_watcher(self):
+        self._check_watcher(PollingWatcher([self.content, self.static], [self.template], interval=0.01))
+
+    def test_polling_watcher_timeout(self):
+        watcher = PollingWatcher([self.content], interval=0.01)
+        self.assertEqual(watcher.wait(timeout=0.05), set())
+
+    def test_polling_watcher_file_deleted_during_scan(self):
+        watcher = PollingWatcher([self.content], interval=0.01)
+        probe = os.path.join(self.content, "4913")
+        self._write(probe, "")
+        scandir = os.scandir
+
+        def scandir_then_delete(path):
+            entries = list(scandir(path))
+            if os.path.exists(probe):
+                os.remove(probe)
+            return iter(entries)
+        with mock.patch("watch.os.scandir", side_effect=scandir_then_delete):
+            self.assertEqual(watcher.wait(timeout=0.05), set())
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.content, self.static], [self.template])
+        except OSError:
+            self.skipTest("inotify is not available")
+        self._check_watcher(watcher)
+
+
+class TestDevServer(WatchTestCase):
+    def test_inject_live_reload(self):
+        html = inject_live_reload("<html><body><p>Hi</p></body></html>")
+        self.assertTrue(html.endswith("</script>\n</body></html>"))
+        self.assertIn("/__livereload", html)
+        self.assertIn("<script>", inject_live_reload("<p>fragment</p>"))
+
+    def test_live_reload_wait(self):
+        live_reload = LiveReload()
+        self.assertEqual(live_reload.wait(1, timeout=0), 0)
+        live_reload.notify()
+        self.assertEqual(live_reload.wait(0, timeout=0), 1)
+
+    def test_server_injects_script(self):
+        SiteBuilder(self.content, self.static, self.template, self.docs).full_build()
+        live_reload = LiveReload()
+        server = start_server(self.docs, live_reload, port=0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        with urllib.request.urlopen(base + "/") as response:
+            page = response.read().decode()
+        self.assertIn("<h1>Home</h1>", page)
+        self.assertIn("/__livereload", page)
+
+        with urllib.request.urlopen(base + "/index.css") as response:
+            self.assertEqual(response.read(), b"body {}")
+
+        live_reload.notify()
+        with urllib.request.urlopen(base + "/__livereload?since=0") as response:
+            self.assertEqual(response.read(), b"1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,589 @@
+import argparse
+import ctypes
+import ctypes.util
+import functools
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from main import collect_page_tasks
+from page_renderer import PageRenderer
+from static_sync import StaticSync, remove_stale_files, transfer_file
+from template import Template
+
+
+# inotify event bits, from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# struct inotify_event header: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct("iIII")
+
+# Endpoint polled by the live reload script
+LIVE_RELOAD_PATH = "/__livereload"
+
+# Long-polls the server and reloads the page once the build generation changes
+LIVE_RELOAD_SCRIPT = f"""<script>
+(function () {{
+  var generation = null;
+  function poll() {{
+    fetch("{LIVE_RELOAD_PATH}" + (generation === null ? "" : "?since=" + generation))
+      .then(function (response) {{ return response.text(); }})
+      .then(function (text) {{
+        if (generation !== null && text !== generation) {{ location.reload(); return; }}
+        generation = text;
+        poll();
+      }})
+      .catch(function () {{ setTimeout(poll, 1000); }});
+  }}
+  poll();
+}})();
+</script>
+"""
+
+
+class PollingWatcher:
+    """
+    Detects changes by comparing the size and mtime of every watched file
+    between scans.
+    """
+
+    def __init__(self, roots, files=(), interval=0.2):
+        """
+        Args:
+            roots: Directories watched recursively
+            files: Individual files watched
+            interval: Seconds between scans (default: 0.2)
+        """
+        self.roots = list(roots)
+        self.files = list(files)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        stack = list(self.roots)
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        # Deleted since the listing, like editors' probe files
+                        continue
+                    snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        for path in self.files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """
+        Block until something changes.
+
+        Args:
+            timeout: Seconds to wait at most; None waits forever
+
+        Returns:
+            Set of changed, created or deleted paths; empty on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {
+                path for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Detects changes with Linux inotify, without scanning the tree.
+
+    Every directory under the roots gets a watch; directories created or
+    moved in later are added as they appear. Raises OSError where inotify
+    is not available.
+    """
+
+    def __init__(self, roots, files=(), settle=0.02):
+        """
+        Args:
+            roots: Directories watched recursively
+            files: Individual files watched, through their parent directory
+            settle: Seconds to keep collecting events after the first one, so
+                an editor's save sequence is handled as one change (default: 0.02)
+        """
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or libc_name is None:
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.roots = list(roots)
+        self.settle = settle
+        self._paths = {}
+        # Watched directory -> names reported in it, None meaning all
+        self._names = {}
+
+        for root in self.roots:
+            self._watch_tree(root)
+        for path in files:
+            directory, name = os.path.split(path)
+            directory = directory or "."
+            if directory not in self._names:
+                self._add_watch(directory, set())
+            if self._names[directory] is not None:
+                self._names[directory].add(name)
+
+    def _add_watch(self, directory, names=None):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+        self._paths[wd] = directory
+        self._names[directory] = names
+
+    def _watch_tree(self, root):
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                self._add_watch(directory)
+                entries = list(os.scandir(directory))
+            except OSError:
+                # Removed again before we got to it
+                continue
+            stack.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+
+    def _forget_tree(self, root):
+        prefix = root + os.sep
+        for wd, directory in list(self._paths.items()):
+            if directory == root or directory.startswith(prefix):
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._paths[wd]
+                self._names.pop(directory, None)
+
+    def _read_events(self, changed):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; report the roots so they are rescanned
+                changed.update(self.roots)
+                continue
+            directory = self._paths.get(wd)
+            if directory is None or mask & IN_IGNORED or not name:
+                continue
+            names = self._names.get(directory)
+            if names is not None and name not in names:
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(path)
+                elif mask & (IN_MOVED_FROM | IN_DELETE):
+                    self._forget_tree(path)
+            elif mask & IN_CREATE:
+                # The content follows with IN_CLOSE_WRITE
+                continue
+            changed.add(path)
+
+    def wait(self, timeout=None):
+        """
+        Block until something changes.
+
+        Args:
+            timeout: Seconds to wait at most; None waits forever
+
+        Returns:
+            Set of changed, created or deleted paths, including directories
+            that were created, moved or removed as a whole; empty on timeout
+        """
+        changed = set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not changed:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not select.select([self.fd], [], [], remaining)[0]:
+                return changed
+            self._read_events(changed)
+
+        while select.select([self.fd], [], [], self.settle)[0]:
+            self._read_events(changed)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(roots, files=(), polling=False):
+    """
+    Return an InotifyWatcher, or a PollingWatcher where inotify is
+    unavailable or polling is requested.
+
+    Args:
+        roots: Directories watched recursively
+        files: Individual files watched
+        polling: Always poll (default: False)
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(roots, files)
+        except OSError:
+            pass
+    return PollingWatcher(roots, files)
+
+
+class SiteBuilder:
+    """
+    Rebuilds only the outputs affected by a set of changed source paths.
+
+    A changed markdown file regenerates its page, a changed static file is
+    copied, and a changed template regenerates every page. Outputs of
+    deleted sources are removed.
+    """
+
+    def __init__(self, content_dir="content", static_dir="static", template_path="template.html",
+                 dest_dir="docs", basepath="/", block_cache_bytes=16 * 1024 * 1024):
+        """
+        Args:
+            content_dir: Directory of markdown sources
+            static_dir: Directory of static assets
+            template_path: Path to HTML template file
+            dest_dir: Output directory
+            basepath: Base path for URLs (default: "/")
+            block_cache_bytes: Memory cap of the rendered block cache kept
+                between rebuilds (default: 16 MB)
+        """
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        self.block_cache_bytes = block_cache_bytes
+        self._load_template()
+
+    def _load_template(self):
+        template = Template.from_file(self.template_path, self.basepath)
+        self.renderer = PageRenderer(template, self.block_cache_bytes)
+
+    def _page_dest(self, rel_path):
+        return os.path.join(self.dest_dir, os.path.splitext(rel_path)[0] + ".html")
+
+    def _generate(self, src_path, dest_path, updated):
+        self.renderer.generate(src_path, dest_path)
+        updated.append(dest_path)
+
+    def _generate_all(self, content_dir, dest_dir, updated):
+        for src_path, dest_path in collect_page_tasks(content_dir, dest_dir):
+            self._generate(src_path, dest_path, updated)
+
+    def full_build(self):
+        """
+        Sync every static file, generate every page and drop stale outputs.
+
+        Returns:
+            List of the output paths written
+        """
+        updated = []
+        syncer = StaticSync()
+        syncer.sync(self.static_dir, self.dest_dir)
+        self._generate_all(self.content_dir, self.dest_dir, updated)
+        remove_stale_files(self.dest_dir, syncer.outputs | {os.path.normpath(path) for path in updated})
+        return updated + sorted(syncer.outputs)
+
+    def _is_backed(self, rel_path):
+        """Whether an output path still has a static or markdown source."""
+        if os.path.isfile(os.path.join(self.static_dir, rel_path)):
+            return True
+        stem, ext = os.path.splitext(rel_path)
+        return ext == ".html" and os.path.isfile(os.path.join(self.content_dir, stem + ".md"))
+
+    def _remove_outputs(self, dest_path, updated):
+        """Remove dest_path, or the files under it, that lost their source."""
+        if os.path.isfile(dest_path):
+            if not self._is_backed(os.path.relpath(dest_path, self.dest_dir)):
+                os.remove(dest_path)
+                updated.append(dest_path)
+            return
+        if not os.path.isdir(dest_path):
+            return
+        for dirpath, _, filenames in os.walk(dest_path, topdown=False):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if not self._is_backed(os.path.relpath(path, self.dest_dir)):
+                    os.remove(path)
+                    updated.append(path)
+            if not os.listdir(dirpath):
+                os.rmdir(dirpath)
+
+    def _apply_content(self, path, rel_path, updated):
+        dest_path = os.path.join(self.dest_dir, rel_path)
+        if os.path.isdir(path):
+            self._generate_all(path, dest_path, updated)
+        elif os.path.isfile(path):
+            if path.endswith(".md"):
+                self._generate(path, self._page_dest(rel_path), updated)
+        elif path.endswith(".md"):
+            self._remove_outputs(self._page_dest(rel_path), updated)
+        else:
+            self._remove_outputs(dest_path, updated)
+
+    def _apply_static(self, path, rel_path, updated):
+        dest_path = os.path.join(self.dest_dir, rel_path)
+        if os.path.isdir(path):
+            syncer = StaticSync()
+            syncer.sync(path, dest_path)
+            updated.extend(sorted(syncer.outputs))
+        elif os.path.isfile(path):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            transfer_file(path, dest_path)
+            updated.append(dest_path)
+        else:
+            self._remove_outputs(dest_path, updated)
+
+    def apply(self, changed_paths):
+        """
+        Bring the outputs up to date with a set of changed source paths.
+
+        Args:
+            changed_paths: Paths reported by a watcher
+
+        Returns:
+            List of the output paths written or removed
+        """
+        updated = []
+        paths = sorted(os.path.normpath(path) for path in changed_paths)
+
+        if self.template_path in paths:
+            if not os.path.isfile(self.template_path):
+                # Editors may delete the template just before writing it
+                return updated
+            self._load_template()
+            self._generate_all(self.content_dir, self.dest_dir, updated)
+            # Every page was just regenerated; only deletions are left to handle
+            paths = [path for path in paths
+                     if not path.startswith(self.content_dir + os.sep) or not os.path.exists(path)]
+
+        for path in paths:
+            for root, apply_change in ((self.content_dir, self._apply_content),
+                                       (self.static_dir, self._apply_static)):
+                if path == root or path.startswith(root + os.sep):
+                    apply_change(path, os.path.relpath(path, root), updated)
+                    break
+
+        return updated
+
+
+class LiveReload:
+    """Build generation counter that browsers long-poll for changes."""
+
+    def __init__(self):
+        self.generation = 0
+        self._changed = threading.Condition()
+
+    def notify(self):
+        """Tell waiting browsers that the site was rebuilt."""
+        with self._changed:
+            self.generation += 1
+            self._changed.notify_all()
+
+    def wait(self, since, timeout=25):
+        """
+        Wait until the generation differs from since.
+
+        Args:
+            since: Generation the browser already has
+            timeout: Seconds to wait at most (default: 25)
+
+        Returns:
+            The current generation
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.generation != since, timeout)
+            return self.generation
+
+
+def inject_live_reload(html):
+    """
+    Add the live reload script to an HTML page, before </body> if present.
+
+    Args:
+        html: Page HTML
+    """
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + LIVE_RELOAD_SCRIPT
+    return html[:index] + LIVE_RELOAD_SCRIPT + html[index:]
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Serves the output directory without caching, injecting the live reload
+    script into HTML pages and answering its long-poll requests.
+    """
+
+    live_reload = None
+
+    def end_headers(self):
+        self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == LIVE_RELOAD_PATH:
+            self._send_generation(url.query)
+            return
+
+        path = self.translate_path(url.path)
+        if os.path.isdir(path) and url.path.endswith("/"):
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            with open(path, 'r') as f:
+                body = inject_live_reload(f.read()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        super().do_GET()
+
+    def _send_generation(self, query):
+        since = parse_qs(query).get("since")
+        if since:
+            generation = self.live_reload.wait(int(since[0]))
+        else:
+            generation = self.live_reload.generation
+        body = str(generation).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(directory, live_reload, host="127.0.0.1", port=8888):
+    """
+    Serve directory from a background thread.
+
+    Args:
+        directory: Directory to serve
+        live_reload: LiveReload polled by the injected script
+        host: Interface to listen on (default: "127.0.0.1")
+        port: Port to listen on; 0 picks a free one (default: 8888)
+
+    Returns:
+        The running ThreadingHTTPServer
+    """
+    handler = type("Handler", (DevRequestHandler,), {"live_reload": live_reload})
+    server = ThreadingHTTPServer((host, port), functools.partial(handler, directory=directory))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def parse_args(argv):
+    """
+    Parse command line arguments.
+
+    Args:
+        argv: Argument list, without the program name
+    """
+    parser = argparse.ArgumentParser(
+        description="Build the site into docs/, rebuild on changes and serve it with live reload.")
+    parser.add_argument("basepath", nargs="?", default="/",
+                        help='Base path for URLs (default: "/")')
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Interface the server listens on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8888,
+                        help="Port the server listens on (default: 8888)")
+    parser.add_argument("--poll", action="store_true",
+                        help="Poll for changes instead of using inotify")
+    parser.add_argument("--no-serve", action="store_true",
+                        help="Only rebuild on changes, without starting the server")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    builder = SiteBuilder(basepath=args.basepath)
+
+    start = time.perf_counter()
+    updated = builder.full_build()
+    print(f"Built {len(updated)} outputs in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    live_reload = LiveReload()
+    if not args.no_serve:
+        start_server(builder.dest_dir, live_reload, args.host, args.port)
+        print(f"Serving {builder.dest_dir} at http://{args.host}:{args.port}/")
+
+    watcher = create_watcher([builder.content_dir, builder.static_dir], [builder.template_path], args.poll)
+    print(f"Watching for changes ({type(watcher).__name__}), press Ctrl+C to stop")
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            try:
+                updated = builder.apply(changed)
+            except Exception as error:
+                print(f"Build error: {error}")
+                continue
+            if updated:
+                elapsed = (time.perf_counter() - start) * 1000
+                for path in updated:
+                    print(f"Updated {path}")
+                print(f"Rebuilt {len(updated)} outputs in {elapsed:.0f} ms")
+                live_reload.notify()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()